@@ -1,14 +1,13 @@
 import customtkinter as ctk
 from customtkinter import CTkFrame, CTkLabel, CTkEntry, CTkButton, CTkRadioButton, CTkCheckBox, CTkProgressBar
-from utils import (USERS_FILE, read_csv, write_csv, hash_password,
+from utils import (USERS_FILE, write_csv, hash_password,
                    verify_password, ensure_dir_exists, get_student_dir,
                    validate_not_empty)
+from storage import get_storage, USER_HEADERS
 import os
 from CTkMessagebox import CTkMessagebox
 import random
 
-USER_HEADERS = ['username', 'password', 'role', 'linked_student']
-
 # Motivational quotes to display
 MOTIVATIONAL_QUOTES = [
     "The beautiful thing about learning is that no one can take it away from you. – B.B. King",
@@ -18,22 +17,79 @@ MOTIVATIONAL_QUOTES = [
     "The only way to do great work is to love what you do. – Steve Jobs"
 ]
 
+class UserDirectory:
+    """In-memory index of users keyed by lower-cased username.
+
+    The index is rebuilt only when the users repository reports a new
+    version (i.e. the file or database was changed by someone else);
+    writes made through the directory update it in place.
+    """
+    def __init__(self, repository):
+        self.repository = repository
+        self._by_name = {}
+        self._version = None
+        self._loaded = False
+
+    def _index_user(self, user):
+        key = user.get('username', '').lower()
+        if key in self._by_name:
+            return # First row wins, matching the old linear scan
+        self._by_name[key] = user
+
+    def _refresh_if_stale(self):
+        version = self.repository.version()
+        if self._loaded and version == self._version:
+            return
+        self._by_name = {}
+        for user in self.repository.list_all():
+            self._index_user(user)
+        self._version = version
+        self._loaded = True
+
+    def get(self, username):
+        """Returns a copy of the user record for a case-insensitive username, or None."""
+        self._refresh_if_stale()
+        user = self._by_name.get((username or '').lower())
+        return dict(user) if user else None
+
+    def add(self, user):
+        """Appends a new user to storage and the index."""
+        self._refresh_if_stale()
+        self.repository.insert(user)
+        self._index_user(dict(user))
+        self._version = self.repository.version()
+
+    def update(self, user):
+        """Writes an existing user back to storage and re-indexes it."""
+        self._refresh_if_stale()
+        self.repository.upsert(user)
+        key = user.get('username', '').lower()
+        self._by_name.pop(key, None)
+        self._index_user(dict(user))
+        self._version = self.repository.version()
+
 class AuthManager:
     """Handles user authentication (login, signup)."""
     def __init__(self):
         ensure_dir_exists(os.path.dirname(USERS_FILE))
         if not os.path.exists(USERS_FILE) or os.path.getsize(USERS_FILE) == 0:
             write_csv(USERS_FILE, [], USER_HEADERS)
+        self.directory = UserDirectory(get_storage().users())
 
-    def _get_users(self):
-        return read_csv(USERS_FILE, USER_HEADERS)
+    def user_exists(self, username):
+        return self.directory.get(username) is not None
 
-    def _save_users(self, users):
-        write_csv(USERS_FILE, users, USER_HEADERS)
+    def student_exists(self, student_id):
+        """Checks for a student account with exactly this username."""
+        user = self.directory.get(student_id)
+        return user is not None and user['username'] == student_id and user['role'] == "student"
 
-    def user_exists(self, username):
-        users = self._get_users()
-        return any(user['username'].lower() == username.lower() for user in users)
+    def update_linked_student(self, parent_username, new_student_id):
+        """Updates the linked_student field for a parent account."""
+        user = self.directory.get(parent_username)
+        if user:
+            user['linked_student'] = new_student_id
+            self.directory.update(user)
 
     def signup(self, username, password, role, linked_student=None):
         if not validate_not_empty(username, "Username"): return False, "Username cannot be empty."
@@ -44,8 +100,7 @@ class AuthManager:
         if self.user_exists(username):
             return False, f"Username '{username}' already exists."
         if role == "parent":
-            all_users = self._get_users()
-            if not any(u['username'] == linked_student and u['role'] == 'student' for u in all_users):
+            if not self.student_exists(linked_student):
                 proceed = CTkMessagebox(
                     title="Student Not Found",
                     message=f"Student ID '{linked_student}' was not found. "
@@ -65,9 +120,7 @@ class AuthManager:
             'linked_student': linked_student if role == "parent" else ""
         }
 
-        users = self._get_users()
-        users.append(new_user)
-        self._save_users(users)
+        self.directory.add(new_user)
 
         if role == 'student':
             get_student_dir(username)
@@ -78,14 +131,12 @@ class AuthManager:
         if not validate_not_empty(username, "Username"): return None, "Username cannot be empty."
         if not validate_not_empty(password, "Password"): return None, "Password cannot be empty."
 
-        users = self._get_users()
-        for user in users:
-            if user['username'].lower() == username.lower():
-                if verify_password(user['password'], password):
-                    return user, f"Login successful as {user['role']}."
-                else:
-                    return None, "Invalid password."
-        return None, f"Username '{username}' not found."
+        user = self.directory.get(username)
+        if user is None:
+            return None, f"Username '{username}' not found."
+        if verify_password(user['password'], password):
+            return user, f"Login successful as {user['role']}."
+        return None, "Invalid password."
 
 # --- GUI Components for Auth ---
 
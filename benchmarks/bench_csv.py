@@ -0,0 +1,92 @@
+"""Benchmark: CSV reading strategies on progress-style files.
+
+Compares the original two-pass read_csv (DictReader, header check, seek,
+second DictReader, list) against the single-pass read_csv and the lazy
+iter_csv generator in dict, tuple and namedtuple modes.
+
+Run from the repository root:
+    python -m benchmarks.bench_csv [rows ...]
+"""
+import csv
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from utils import read_csv, iter_csv, csv_cache
+
+HEADERS = ['date', 'subject', 'study_hours', 'cards_reviewed', 'student_id']
+DEFAULT_SIZES = [10 ** 4, 10 ** 5, 10 ** 6]
+
+
+def legacy_read_csv(file_path, expected_headers=None):
+    """The original read_csv body: header check, rewind, re-parse, materialize."""
+    with open(file_path, 'r', newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        if expected_headers and reader.fieldnames != expected_headers:
+            pass
+        f.seek(0)
+        reader = csv.DictReader(f)
+        return list(reader)
+
+
+def write_sample(file_path, rows):
+    with open(file_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADERS)
+        for i in range(rows):
+            writer.writerow([f"2025-{i % 12 + 1:02d}-{i % 28 + 1:02d}", f"Subject {i % 17}",
+                             str(0.25 + (i % 8) * 0.125), str(i % 40), "student"])
+
+
+def total_hours_from_dicts(rows):
+    return sum(float(row['study_hours']) for row in rows)
+
+
+def total_hours_from_tuples(rows):
+    return sum(float(row[2]) for row in rows)
+
+
+def total_hours_from_namedtuples(rows):
+    return sum(float(row.study_hours) for row in rows)
+
+
+def strategies(file_path):
+    def cold_read_csv():
+        csv_cache.clear()
+        return total_hours_from_dicts(read_csv(file_path, HEADERS))
+    return [
+        ("legacy read_csv", lambda: total_hours_from_dicts(legacy_read_csv(file_path, HEADERS))),
+        ("read_csv (cold)", cold_read_csv),
+        ("iter_csv dict", lambda: total_hours_from_dicts(iter_csv(file_path, HEADERS))),
+        ("iter_csv tuple", lambda: total_hours_from_tuples(iter_csv(file_path, HEADERS, row_format="tuple"))),
+        ("iter_csv namedtuple", lambda: total_hours_from_namedtuples(iter_csv(file_path, HEADERS, row_format="namedtuple"))),
+    ]
+
+
+def measure(func):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main(sizes):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for rows in sizes:
+            file_path = os.path.join(tmp_dir, f"progress_{rows}.csv")
+            write_sample(file_path, rows)
+            print(f"\n{rows:,} rows ({os.path.getsize(file_path) / 1e6:.1f} MB)")
+            print(f"{'strategy':<22}{'time (s)':>10}{'peak MB':>10}")
+            for name, func in strategies(file_path):
+                elapsed, peak = measure(func)
+                print(f"{name:<22}{elapsed:>10.3f}{peak / 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
@@ -0,0 +1,101 @@
+"""Benchmark: columnar deck scans against walking Flashcard records.
+
+For each deck size, writes a flashcards.csv and compares:
+  - loading: the full records (repository.list_all, whose retained memory
+    includes the rows read_csv caches) against just the scheduling columns
+    (DeckColumns.load), with time and retained memory;
+  - queries: due-today count, per-topic due counts and deck statistics as
+    Python loops over the records against DeckColumns column scans.
+
+Run from the repository root:
+    python -m benchmarks.bench_deck_columns [deck_sizes ...]
+"""
+import gc
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+from datetime import date
+
+from deck_index import DeckColumns
+from records import Flashcard
+from storage import CsvRepository, RecordRepository, FLASHCARDS_HEADERS, FLASHCARDS_KEY
+from utils import csv_cache
+
+DEFAULT_SIZES = [10 ** 4, 10 ** 5]
+QUERY_REPEATS = 20
+
+
+def make_deck(size, rng, today_ordinal):
+    return [Flashcard(
+        i,
+        f"What does term {i} mean in chapter {i % 40}?",
+        f"Term {i} is defined as the answer to question {i}, with some explanation.",
+        f"Topic {i % 20}",
+        rng.choice([0, 1, 2.5, 6.25, 15.6, 39.0]),
+        round(rng.uniform(1.3, 2.8), 3),
+        today_ordinal + rng.randint(-10, 60)
+    ) for i in range(1, size + 1)]
+
+
+def loop_queries(cards, today_ordinal):
+    due = sum(1 for card in cards if card.due_ordinal <= today_ordinal)
+    by_topic = Counter(card.topic.lower() for card in cards if card.due_ordinal <= today_ordinal)
+    mean_ease = sum(card.ease_factor for card in cards) / len(cards)
+    mature = sum(1 for card in cards if card.interval >= 21)
+    return due, by_topic, mean_ease, mature
+
+
+def column_queries(columns, today_ordinal):
+    return columns.due_count(today_ordinal), columns.due_counts_by_topic(today_ordinal), columns.statistics()
+
+
+def timed(func, repeats=1):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        result = func()
+    return result, (time.perf_counter() - start) / repeats
+
+
+def retained(build):
+    csv_cache.clear()  # Measure a cold read, with the text owned by what was built
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current
+
+
+def main(sizes):
+    rng = random.Random(0)
+    today_ordinal = date.today().toordinal()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size in sizes:
+            file_path = os.path.join(tmp_dir, f"flashcards_{size}.csv")
+            repository = RecordRepository(CsvRepository(file_path, FLASHCARDS_HEADERS, FLASHCARDS_KEY), Flashcard, "student")
+            repository.replace_all(make_deck(size, rng, today_ordinal))
+
+            print(f"\n{size:,} cards")
+            print(f"{'load':<18}{'time (s)':>10}{'retained MB':>13}")
+            csv_cache.clear()
+            _, records_time = timed(repository.list_all)
+            cards, records_bytes = retained(repository.list_all)
+            _, columns_time = timed(lambda: DeckColumns.load(repository))
+            columns, columns_bytes = retained(lambda: DeckColumns.load(repository))
+            print(f"{'records':<18}{records_time:>10.3f}{records_bytes / 1e6:>13.1f}")
+            print(f"{'columns':<18}{columns_time:>10.3f}{columns_bytes / 1e6:>13.1f}")
+
+            print(f"{'queries':<18}{'ms':>10}")
+            _, loop_time = timed(lambda: loop_queries(cards, today_ordinal), QUERY_REPEATS)
+            _, scan_time = timed(lambda: column_queries(columns, today_ordinal), QUERY_REPEATS)
+            print(f"{'record loops':<18}{loop_time * 1000:>10.2f}")
+            print(f"{'column scans':<18}{scan_time * 1000:>10.2f}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
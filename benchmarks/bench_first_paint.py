@@ -0,0 +1,71 @@
+"""Benchmark: login to first paint, building every tab against only the selected one.
+
+Seeds a student account with a large deck, schedule and progress log in a
+temporary data directory, then times StudyBuddyApp._post_login_setup up to
+the first drawn frame (the app's own first_paint_seconds), once with
+LAZY_TABS off and once on. Prefetch is disabled so it cannot overlap the
+measurement. Needs a display (Tk).
+
+Run from the repository root:
+    python -m benchmarks.bench_first_paint [deck_sizes ...]
+"""
+import os
+import sys
+import tempfile
+from datetime import date
+
+DEFAULT_SIZES = [10 ** 3, 10 ** 4, 5 * 10 ** 4]
+USERNAME = "benchstudent"
+
+
+def seed_account(storage, size, Flashcard, ScheduleItem, ProgressEntry):
+    today = date.today().toordinal()
+    storage.flashcards(USERNAME).replace_all([Flashcard(
+        i, f"What does term {i} mean?", f"Term {i} is defined as answer {i}.", f"Topic {i % 20}",
+        float(i % 30), 2.5, today + i % 40 - 10
+    ) for i in range(1, size + 1)])
+    storage.schedules(USERNAME).replace_all([ScheduleItem(
+        i, f"Subject {i % 12}", f"Topic {i % 20}", "Medium", today + i % 60 - 30, 9 * 60 + i % 8 * 30, 10 * 60 + i % 8 * 30
+    ) for i in range(1, size // 10 + 1)])
+    storage.progress(USERNAME).replace_all([ProgressEntry(
+        today - i // 12, f"Subject {i % 12}", 0.5 + i % 4 * 0.25, i % 30
+    ) for i in range(size // 10)])
+
+
+def first_paint(app, main_module, lazy):
+    """Returns login-to-first-paint seconds with LAZY_TABS set to lazy."""
+    from utils import csv_cache
+    csv_cache.clear()  # Each run reads the account from disk, as after a fresh start
+    main_module.LAZY_TABS = lazy
+    app.first_paint_seconds = None
+    app._post_login_setup({'username': USERNAME, 'role': 'student', 'linked_student': ''})
+    while app.first_paint_seconds is None:
+        app.update()
+    return app.first_paint_seconds
+
+
+def main(sizes):
+    repo_root = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        sys.path.insert(0, repo_root)
+        try:
+            import main as main_module
+            from records import Flashcard, ScheduleItem, ProgressEntry
+            from storage import get_storage
+
+            main_module.TAB_PREFETCH_DELAY_MS = None
+            app = main_module.StudyBuddyApp()
+            print(f"{'cards':>8}{'all tabs ms':>14}{'lazy ms':>10}")
+            for size in sizes:
+                seed_account(get_storage(), size, Flashcard, ScheduleItem, ProgressEntry)
+                eager = first_paint(app, main_module, lazy=False)
+                lazy = first_paint(app, main_module, lazy=True)
+                print(f"{size:>8}{eager * 1000:>14.0f}{lazy * 1000:>10.0f}")
+            app.destroy()
+        finally:
+            os.chdir(repo_root)
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
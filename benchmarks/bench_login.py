@@ -0,0 +1,77 @@
+"""Benchmark: login latency against the number of registered users.
+
+Compares the original linear scan over users.csv (re-read and lower-cased
+on every attempt) with AuthManager.login backed by the UserDirectory index.
+
+Run from the repository root:
+    python -m benchmarks.bench_login [user_counts ...]
+"""
+import csv
+import os
+import sys
+import tempfile
+import time
+
+DEFAULT_COUNTS = [10 ** 3, 10 ** 4, 5 * 10 ** 4]
+LOGINS_PER_COUNT = 200
+
+
+def write_users(file_path, count, hash_password):
+    password_hash = hash_password("secret")
+    with open(file_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['username', 'password', 'role', 'linked_student'])
+        for i in range(count):
+            role = "parent" if i % 5 == 0 else "student"
+            writer.writerow([f"User{i:06d}", password_hash, role, f"User{i + 1:06d}" if role == "parent" else ""])
+
+
+def legacy_login(read_csv, verify_password, users_file, headers, username, password):
+    """The original AuthManager.login: read every user and compare lower-cased names."""
+    for user in read_csv(users_file, headers):
+        if user['username'].lower() == username.lower():
+            return user if verify_password(user['password'], password) else None
+    return None
+
+
+def main(counts):
+    repo_root = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        sys.path.insert(0, repo_root)
+        try:
+            from utils import read_csv, verify_password, hash_password, csv_cache, USERS_FILE
+            from storage import USER_HEADERS
+            from auth import AuthManager
+
+            os.makedirs("data", exist_ok=True)
+            print(f"{'users':>8}{'legacy ms/login':>18}{'indexed ms/login':>18}{'first login ms':>16}")
+            for count in counts:
+                write_users(USERS_FILE, count, hash_password)
+                csv_cache.clear()
+                # Usernames are probed across the whole file, in a different case than stored
+                probes = [f"user{(i * 7919) % count:06d}" for i in range(LOGINS_PER_COUNT)]
+
+                start = time.perf_counter()
+                for name in probes:
+                    csv_cache.clear()
+                    legacy_login(read_csv, verify_password, USERS_FILE, USER_HEADERS, name, "secret")
+                legacy_ms = (time.perf_counter() - start) * 1000 / len(probes)
+
+                manager = AuthManager()
+                start = time.perf_counter()
+                manager.login(probes[0], "secret")
+                first_ms = (time.perf_counter() - start) * 1000
+
+                start = time.perf_counter()
+                for name in probes:
+                    user, _ = manager.login(name, "secret")
+                    assert user is not None
+                indexed_ms = (time.perf_counter() - start) * 1000 / len(probes)
+                print(f"{count:>8}{legacy_ms:>18.3f}{indexed_ms:>18.4f}{first_ms:>16.2f}")
+        finally:
+            os.chdir(repo_root)
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_COUNTS)
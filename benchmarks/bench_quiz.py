@@ -0,0 +1,66 @@
+"""Benchmark: headless quiz throughput with QuizSession.
+
+Runs simulated sessions over random decks with a fixed recall rate (failed
+cards are re-queued until remembered) and reports reviews per second. No
+display is needed.
+
+Run from the repository root:
+    python -m benchmarks.bench_quiz [deck_sizes ...]
+"""
+import random
+import sys
+import time
+from datetime import date
+
+from quiz_session import QuizSession
+from records import Flashcard
+from scheduler import AGAIN, GOOD, EASY
+
+DEFAULT_SIZES = [100, 1000, 10000]
+SESSIONS_PER_SIZE = 20
+RECALL_RATE = 0.85
+
+
+def make_deck(size, rng):
+    due_ordinal = date(2024, 1, 1).toordinal()
+    return [Flashcard(
+        i,
+        f"Question {i}",
+        f"Answer {i}",
+        f"Topic {i % 12}",
+        rng.choice([0, 0, 1, 2.5, 6.25, 15.6]),
+        round(rng.uniform(1.3, 2.8), 3),
+        due_ordinal
+    ) for i in range(size)]
+
+
+def run_session(cards, rng, today):
+    session = QuizSession(cards, today=today)
+    while session.next_card() is not None:
+        session.reveal()
+        if rng.random() < RECALL_RATE:
+            session.assess(EASY if rng.random() < 0.2 else GOOD)
+        else:
+            session.assess(AGAIN)
+    return session.finish()
+
+
+def main(sizes):
+    rng = random.Random(0)
+    today = date.today()
+    print(f"{'deck':>8}{'reviews/session':>17}{'reviews/s':>12}")
+    for size in sizes:
+        reviews = 0
+        elapsed = 0.0
+        for _ in range(SESSIONS_PER_SIZE):
+            deck = make_deck(size, rng)
+            start = time.perf_counter()
+            updated_cards, reviewed, _, _ = run_session(deck, rng, today)
+            elapsed += time.perf_counter() - start
+            assert len(updated_cards) == size
+            reviews += reviewed
+        print(f"{size:>8}{reviews / SESSIONS_PER_SIZE:>17.0f}{reviews / elapsed:>12.0f}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
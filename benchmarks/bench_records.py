@@ -0,0 +1,82 @@
+"""Benchmark: memory held by typed records against the csv.DictReader dicts they replace.
+
+Writes a flashcard deck and a progress log, reads each back with
+csv.DictReader, and measures with tracemalloc what stays allocated once the
+file has been read: the dict rows, or the Flashcard / ProgressEntry records
+built from them (the text they share with the rows included). Also reports
+the time spent converting rows to records.
+
+Run from the repository root:
+    python -m benchmarks.bench_records [rows ...]
+"""
+import csv
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from records import Flashcard, ProgressEntry
+from storage import FLASHCARDS_HEADERS, PROGRESS_HEADERS
+
+DEFAULT_SIZES = [10 ** 4, 10 ** 5]
+
+
+def write_deck(file_path, rows):
+    with open(file_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(FLASHCARDS_HEADERS)
+        for i in range(rows):
+            writer.writerow([str(i), f"What is term {i}?", f"Definition of term {i}", f"Topic {i % 20}",
+                             str(round((i % 30) * 1.7, 2)), f"2025-{i % 12 + 1:02d}-{i % 28 + 1:02d}",
+                             str(round(1.3 + (i % 15) * 0.1, 3)), "student"])
+
+
+def write_progress(file_path, rows):
+    with open(file_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(PROGRESS_HEADERS)
+        for i in range(rows):
+            writer.writerow([f"2025-{i % 12 + 1:02d}-{i % 28 + 1:02d}", f"Subject {i % 17}",
+                             str(0.25 + (i % 8) * 0.125), str(i % 40), "student"])
+
+
+def read_rows(file_path):
+    with open(file_path, 'r', newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+
+def retained(build):
+    """Returns (result, bytes still allocated by build() once it returns)."""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current
+
+
+def main(sizes):
+    cases = [("flashcards", write_deck, Flashcard), ("progress", write_progress, ProgressEntry)]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for rows in sizes:
+            print(f"\n{rows:,} rows")
+            print(f"{'table':<12}{'dicts MB':>10}{'records MB':>12}{'saving':>9}{'convert s':>11}")
+            for name, write_sample, record_type in cases:
+                file_path = os.path.join(tmp_dir, f"{name}_{rows}.csv")
+                write_sample(file_path, rows)
+                dict_rows, dict_bytes = retained(lambda: read_rows(file_path))
+                start = time.perf_counter()
+                [record_type.from_row(row) for row in dict_rows]
+                elapsed = time.perf_counter() - start
+                del dict_rows
+                # The rows are dropped as soon as they are converted, as at the storage boundary
+                _, record_bytes = retained(lambda: [record_type.from_row(row) for row in read_rows(file_path)])
+                print(f"{name:<12}{dict_bytes / 1e6:>10.1f}{record_bytes / 1e6:>12.1f}"
+                      f"{1 - record_bytes / dict_bytes:>9.0%}{elapsed:>11.3f}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
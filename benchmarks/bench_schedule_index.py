@@ -0,0 +1,84 @@
+"""Benchmark: schedule conflict and free-slot queries, linear scan against ScheduleIndex.
+
+Builds a schedule of one-hour sessions spread over several years and
+times, per query, finding the sessions that overlap a new one and listing
+the free slots of at least an hour in a one-week window, by scanning every
+session and with the interval tree.
+
+Run from the repository root:
+    python -m benchmarks.bench_schedule_index [session_counts ...]
+"""
+import random
+import sys
+import time
+from datetime import date
+
+from records import ScheduleItem, MINUTES_PER_DAY
+from schedule_index import ScheduleIndex
+
+DEFAULT_COUNTS = [10 ** 3, 10 ** 4, 10 ** 5]
+QUERIES = 500
+WEEK = 7 * MINUTES_PER_DAY
+
+
+def make_schedule(count, rng, first_day):
+    days = max(1, count // 4)
+    sessions = []
+    for i in range(1, count + 1):
+        start = rng.randrange(8 * 60, 21 * 60, 30)
+        sessions.append(ScheduleItem(i, f"Subject {i % 12}", "Topic", "Medium",
+                                     first_day + rng.randrange(days), start, start + 60))
+    return sessions
+
+
+def scan_conflicts(sessions, start, end):
+    return [item for item in sessions if item.start_key < end and item.end_key > start]
+
+
+def scan_free_slots(sessions, start, end, min_minutes):
+    slots = []
+    cursor = start
+    for item in sorted(scan_conflicts(sessions, start, end), key=lambda item: item.start_key):
+        if item.start_key - cursor >= min_minutes:
+            slots.append((cursor, item.start_key))
+        cursor = max(cursor, item.end_key)
+    if end - cursor >= min_minutes:
+        slots.append((cursor, end))
+    return slots
+
+
+def timed(func, windows):
+    start = time.perf_counter()
+    results = [func(*window) for window in windows]
+    return results, (time.perf_counter() - start) * 1000 / len(windows)
+
+
+def main(counts):
+    rng = random.Random(0)
+    first_day = date.today().toordinal()
+    print(f"{'sessions':>9}{'build ms':>10}{'scan conflict ms':>18}{'index conflict ms':>19}"
+          f"{'scan free ms':>14}{'index free ms':>15}")
+    for count in counts:
+        sessions = make_schedule(count, rng, first_day)
+        span = max(1, count // 4) * MINUTES_PER_DAY
+        starts = [first_day * MINUTES_PER_DAY + rng.randrange(span) // 30 * 30 for _ in range(QUERIES)]
+
+        build_start = time.perf_counter()
+        index = ScheduleIndex(sessions)
+        build_ms = (time.perf_counter() - build_start) * 1000
+
+        conflict_windows = [(start, start + 60) for start in starts]
+        free_windows = [(start, start + WEEK, 60) for start in starts]
+        scanned, scan_conflict_ms = timed(lambda s, e: scan_conflicts(sessions, s, e), conflict_windows)
+        indexed, index_conflict_ms = timed(index.conflicts, conflict_windows)
+        assert [sorted(item.id for item in found) for found in scanned] == \
+               [sorted(item.id for item in found) for found in indexed]
+        scanned, scan_free_ms = timed(lambda s, e, m: scan_free_slots(sessions, s, e, m), free_windows)
+        indexed, index_free_ms = timed(index.free_slots, free_windows)
+        assert scanned == indexed
+        print(f"{count:>9}{build_ms:>10.0f}{scan_conflict_ms:>18.3f}{index_conflict_ms:>19.4f}"
+              f"{scan_free_ms:>14.3f}{index_free_ms:>15.4f}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_COUNTS)
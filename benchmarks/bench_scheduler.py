@@ -0,0 +1,53 @@
+"""Benchmark: batch SM-2 scheduling against the per-card loop.
+
+Builds random decks (including intervals that land exactly on rounding
+ties), checks that scheduler.schedule_reviews returns exactly what
+schedule_review gives card by card, and times both.
+
+Run from the repository root:
+    python -m benchmarks.bench_scheduler [review_counts ...]
+"""
+import sys
+import time
+
+import numpy as np
+
+from scheduler import schedule_review, schedule_reviews, INITIAL_EASE, MIN_EASE
+
+DEFAULT_COUNTS = [10 ** 4, 10 ** 5, 10 ** 6]
+
+
+def random_state(count, seed=0):
+    rng = np.random.default_rng(seed)
+    intervals = np.round(rng.exponential(20.0, count), 2)
+    intervals[rng.random(count) < 0.2] = 0.0
+    # Values like 2.675 and 0.125 sit on (or just beside) a rounding boundary
+    ties = rng.random(count) < 0.05
+    intervals[ties] = rng.integers(0, 4000, ties.sum()) / 8.0 + 0.005
+    eases = np.round(rng.uniform(MIN_EASE, INITIAL_EASE + 0.5, count), 3)
+    ratings = rng.integers(0, 3, count)
+    return intervals, eases, ratings
+
+
+def main(counts):
+    print(f"{'reviews':>10}{'per-card s':>13}{'batch s':>10}{'speedup':>10}")
+    for count in counts:
+        intervals, eases, ratings = random_state(count)
+        interval_list, ease_list, rating_list = intervals.tolist(), eases.tolist(), ratings.tolist()
+
+        start = time.perf_counter()
+        expected = [schedule_review(i, e, r) for i, e, r in zip(interval_list, ease_list, rating_list)]
+        loop_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        new_intervals, new_eases, interval_days = schedule_reviews(intervals, eases, ratings)
+        batch_seconds = time.perf_counter() - start
+
+        assert new_intervals.tolist() == [row[0] for row in expected]
+        assert new_eases.tolist() == [row[1] for row in expected]
+        assert interval_days.tolist() == [row[2] for row in expected]
+        print(f"{count:>10}{loop_seconds:>13.3f}{batch_seconds:>10.3f}{loop_seconds / batch_seconds:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_COUNTS)
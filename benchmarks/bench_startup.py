@@ -0,0 +1,72 @@
+"""Benchmark: import time up to the login screen, with a regression check.
+
+Runs `python -X importtime -c "import main"` in fresh interpreters and
+reports the total import time of a cold start (interpreter startup modules
+plus main, i.e. everything needed to show the login screen) next to the
+total when every tab and matplotlib are imported too, as the app did before
+tabs were loaded on demand. Exits non-zero if
+  - a module that should only load after login (DEFERRED_MODULES) is
+    imported at startup, or
+  - the best startup import time exceeds the budget (STARTUP_BUDGET_MS, or
+    the first argument, in milliseconds).
+
+Run from the repository root:
+    python -m benchmarks.bench_startup [budget_ms]
+"""
+import subprocess
+import sys
+
+STARTUP_BUDGET_MS = 400
+RUNS = 5
+SLOWEST_SHOWN = 8
+DEFERRED_MODULES = ["notes", "scheduling", "flashcards", "progress", "deck_index", "numpy", "matplotlib"]
+LOGIN_IMPORTS = "import main"
+ALL_IMPORTS = "import main, notes, scheduling, flashcards, progress; progress.load_pyplot()"
+
+
+def import_times(code):
+    """Returns ({module: self_us}, total_us) from one -X importtime run of code.
+
+    The total adds up the cumulative times of the top-level imports only, so
+    nested modules are not counted twice.
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            capture_output=True, text=True, check=True)
+    self_times, total_us = {}, 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        self_times[name.strip()] = int(self_us)
+        if not name[1:].startswith(" "):  # Nested imports are indented below their parent
+            total_us += int(cumulative_us)
+    return self_times, total_us
+
+
+def best_run(code):
+    """Returns the run (as import_times) with the lowest total."""
+    return min((import_times(code) for _ in range(RUNS)), key=lambda run: run[1])
+
+
+def main(budget_ms):
+    login, login_us = best_run(LOGIN_IMPORTS)
+    _, all_us = best_run(ALL_IMPORTS)
+    login_ms = login_us / 1000
+
+    print(f"{'imports':<28}{'best of ' + str(RUNS) + ' (ms)':>18}")
+    print(f"{'login screen (main)':<28}{login_ms:>18.1f}")
+    print(f"{'main + all tabs + pyplot':<28}{all_us / 1000:>18.1f}")
+    print("\nslowest modules at startup (self ms):")
+    for name, self_us in sorted(login.items(), key=lambda item: -item[1])[:SLOWEST_SHOWN]:
+        print(f"  {name:<40}{self_us / 1000:>8.1f}")
+
+    failures = [f"{name} is imported before login" for name in DEFERRED_MODULES if name in login]
+    if login_ms > budget_ms:
+        failures.append(f"login screen imports took {login_ms:.1f} ms, over the {budget_ms} ms budget")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(float(sys.argv[1]) if len(sys.argv) > 1 else STARTUP_BUDGET_MS))
@@ -0,0 +1,159 @@
+import csv
+import json
+import os
+from datetime import date
+from records import Flashcard
+
+# --- Import Settings ---
+IMPORT_FILE_TYPES = [("Flashcard exports", "*.tsv *.txt *.csv *.json *.jsonl *.ndjson"), ("All files", "*.*")]
+IMPORT_CHUNK_ROWS = 2000  # Rows handled per step, so the UI can redraw between steps
+DEFAULT_IMPORT_TOPIC = "Imported"
+QUESTION_FIELDS = ('question', 'front', 'q')
+ANSWER_FIELDS = ('answer', 'back', 'a')
+TOPIC_FIELDS = ('topic', 'deck', 'tags', 'subject')
+_END = object()  # Marks the end of the records; None is a record (a JSON null)
+
+def card_key(question, answer):
+    """Returns the key two cards share when they are duplicates (case and spacing ignored)."""
+    return (" ".join(str(question).split()).casefold(), " ".join(str(answer).split()).casefold())
+
+def _pick(record, fields):
+    for field in fields:
+        value = record.get(field)
+        if value not in (None, ''):
+            return value
+    return ''
+
+class _CountingLines:
+    """Iterates a text file's lines while counting the characters read, for progress."""
+    def __init__(self, f):
+        self.f = f
+        self.chars_read = 0
+
+    def __iter__(self):
+        for line in self.f:
+            self.chars_read += len(line)
+            yield line
+
+class FlashcardImporter:
+    """Streams flashcards out of a TSV, CSV, JSON or JSON Lines export.
+
+    Rows are parsed lazily and handled a chunk at a time with step(), so a
+    100k-card file never has to be materialised. Each row is validated,
+    checked against the existing deck (and earlier rows) for duplicates and
+    becomes a Flashcard due today. Ids are given out in one block once the
+    file has been read (assign_ids), so an import reserves exactly as many
+    ids as it adds. Delimited files may
+    have a header naming question/answer/topic columns; without one the
+    columns are taken in that order.
+    """
+    def __init__(self, file_path, existing_cards, default_topic=DEFAULT_IMPORT_TOPIC):
+        self.file_path = file_path
+        self.default_topic = default_topic
+        self.cards = []
+        self.rows_read = 0
+        self.invalid_rows = 0
+        self.duplicate_rows = 0
+        self.seen = {card_key(card.question, card.answer) for card in existing_cards}
+        self.review_ordinal = date.today().toordinal()
+        self.total_chars = max(1, os.path.getsize(file_path))
+        self._file = open(file_path, 'r', newline='', encoding='utf-8-sig')
+        self._lines = _CountingLines(self._file)
+        self._records = self._iter_records()
+        self.finished = False
+
+    # --- Parsing ---
+    def _iter_records(self):
+        extension = os.path.splitext(self.file_path)[1].lower()
+        if extension == '.json':
+            yield from self._iter_json()
+        elif extension in ('.jsonl', '.ndjson'):
+            for line in self._lines:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from self._iter_delimited(',' if extension == '.csv' else '\t')
+
+    def _iter_json(self):
+        # A JSON document has to be parsed whole; it is still turned into cards a chunk at a time
+        data = json.loads("".join(self._lines))
+        if isinstance(data, dict):
+            data = data.get('cards', data.get('flashcards', []))
+        if not isinstance(data, list):
+            raise ValueError("expected a list of cards, or an object with a 'cards' list")
+        yield from data
+
+    def _iter_delimited(self, delimiter):
+        reader = csv.reader(self._lines, delimiter=delimiter)
+        header = next(reader, None)
+        if header is None:
+            return
+        names = [name.strip().lower() for name in header]
+        if any(name in QUESTION_FIELDS for name in names) and any(name in ANSWER_FIELDS for name in names):
+            columns = names
+        else:
+            columns = ['question', 'answer', 'topic']
+            yield dict(zip(columns, header))
+        for values in reader:
+            if values:
+                yield dict(zip(columns, values))
+
+    # --- Import Steps ---
+    @property
+    def progress(self):
+        """Fraction of the file consumed so far (0.0 to 1.0)."""
+        return 1.0 if self.finished else min(1.0, self._lines.chars_read / self.total_chars)
+
+    def step(self, max_rows=IMPORT_CHUNK_ROWS):
+        """Handles up to max_rows rows; returns False once the whole file has been read."""
+        if self.finished:
+            return False
+        try:
+            for _ in range(max_rows):
+                record = next(self._records, _END)
+                if record is _END:
+                    self.close()
+                    return False
+                self._add_record(record)
+        except (ValueError, csv.Error) as e:
+            # Covers malformed JSON and undecodable text as well (both are ValueErrors)
+            self.close()
+            raise ValueError(f"Could not read {os.path.basename(self.file_path)} near row {self.rows_read + 1}: {e}")
+        return True
+
+    def run(self):
+        """Reads the whole file in one go and returns the new cards (ids not yet assigned)."""
+        while self.step():
+            pass
+        return self.cards
+
+    def _add_record(self, record):
+        self.rows_read += 1
+        if not isinstance(record, dict):
+            self.invalid_rows += 1
+            return
+        record = {str(field).strip().lower(): value for field, value in record.items()}
+        question = str(_pick(record, QUESTION_FIELDS)).strip()
+        answer = str(_pick(record, ANSWER_FIELDS)).strip()
+        topic = _pick(record, TOPIC_FIELDS)
+        if isinstance(topic, list):
+            topic = topic[0] if topic else ''
+        topic = str(topic).strip() or self.default_topic
+        if not question or not answer:
+            self.invalid_rows += 1
+            return
+        key = card_key(question, answer)
+        if key in self.seen:
+            self.duplicate_rows += 1
+            return
+        self.seen.add(key)
+        self.cards.append(Flashcard(None, question, answer, topic, due_ordinal=self.review_ordinal))
+
+    def assign_ids(self, first_id):
+        """Numbers the imported cards consecutively from first_id."""
+        for card_id, card in enumerate(self.cards, start=first_id):
+            card.id = card_id
+
+    def close(self):
+        self.finished = True
+        self._file.close()
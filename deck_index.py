@@ -0,0 +1,541 @@
+from bisect import bisect_left, insort
+from datetime import date
+import json
+import os
+import re
+import tempfile
+import threading
+import numpy as np
+from scheduler import forecast_due_counts, INITIAL_EASE
+from records import date_ordinal, parse_float, parse_int
+
+# --- Columnar Deck ---
+DECK_COLUMN_FIELDS = ('id', 'interval', 'ease_factor', 'next_review_date', 'topic')
+MATURE_INTERVAL_DAYS = 21  # Cards at or past this interval count as mature in the deck statistics
+
+class DeckColumns:
+    """The scheduling fields of a deck as parallel NumPy columns, one row per card.
+
+    Ids, intervals, ease factors, due ordinals and topic codes live in
+    arrays with spare capacity: changing a card writes its row in place,
+    adding one is amortized O(1) and removing one moves the last row into
+    the gap. Due queries, per-day counts, statistics and forecasts are
+    vectorized scans over the live rows, so their cost and the memory
+    held both follow the numeric columns, never the card text: load()
+    reads only the scheduling fields. Topics are matched case-insensitively
+    through small integer codes, as the quiz topic filter always has been.
+
+    Card ids are small sequential integers, so the id -> row map is an
+    array indexed by id as well; an id far outside that range (a corrupt
+    row, say) falls back to a dict instead of stretching the array.
+    """
+    def __init__(self, capacity=0):
+        self.size = 0
+        self._ids = np.zeros(capacity, dtype=np.int64)
+        self._intervals = np.zeros(capacity, dtype=np.float64)
+        self._ease_factors = np.zeros(capacity, dtype=np.float64)
+        self._due_ordinals = np.zeros(capacity, dtype=np.int64)
+        self._topic_codes = np.zeros(capacity, dtype=np.int32)
+        self._row_by_id = np.zeros(0, dtype=np.int32)  # card_id -> row + 1, 0 where there is no card
+        self._sparse_rows = {}  # card_id -> row, for ids outside _row_by_id
+        self._topic_code_by_key = {}  # topic_key -> code
+        self._topic_names = []  # code -> topic as first entered
+
+    @classmethod
+    def from_cards(cls, cards):
+        """Builds the columns from Flashcard records."""
+        columns = cls()
+        columns.add_cards(cards)
+        return columns
+
+    @classmethod
+    def from_fields(cls, rows):
+        """Builds the columns from (id, interval, ease_factor, next_review_date, topic) tuples.
+
+        Values may be stored strings or typed values; bad numbers fall back to
+        the defaults and a bad date to today, as they do for Flashcard records.
+        """
+        columns = cls()
+        today_ordinal = date.today().toordinal()
+        latest = {}
+        for card_id, interval, ease_factor, review_date, topic in rows:
+            card_id = parse_int(card_id, None)
+            if card_id is None:
+                continue  # Renumbered when the flashcards tab next loads the deck
+            due_ordinal = date_ordinal(review_date) if isinstance(review_date, str) else None
+            latest[card_id] = (
+                parse_float(interval, 0.0),
+                parse_float(ease_factor, INITIAL_EASE),
+                due_ordinal if due_ordinal is not None else today_ordinal,
+                topic
+            )
+        if latest:
+            columns._append(list(latest), *zip(*latest.values()))
+        return columns
+
+    @classmethod
+    def load(cls, repository):
+        """Reads just the scheduling fields of a flashcard repository; no question or answer text is parsed."""
+        return cls.from_fields(repository.iter_fields(DECK_COLUMN_FIELDS))
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, card_id):
+        return self._row(card_id) is not None
+
+    # --- Updates ---
+    def _topic_code(self, topic):
+        topic = (topic or '').strip()
+        topic_key = topic.lower()
+        code = self._topic_code_by_key.get(topic_key)
+        if code is None:
+            code = len(self._topic_names)
+            self._topic_code_by_key[topic_key] = code
+            self._topic_names.append(topic)
+        return code
+
+    def _reserve(self, capacity):
+        if capacity <= self._ids.size:
+            return
+        capacity = max(capacity, 2 * self._ids.size, 64)
+        for name in ('_ids', '_intervals', '_ease_factors', '_due_ordinals', '_topic_codes'):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    def _row(self, card_id):
+        if self._sparse_rows and card_id in self._sparse_rows:
+            return self._sparse_rows[card_id]
+        if 0 <= card_id < self._row_by_id.size and self._row_by_id[card_id]:
+            return int(self._row_by_id[card_id]) - 1
+        return None
+
+    def _set_rows(self, card_ids, rows):
+        card_ids = np.asarray(card_ids, dtype=np.int64)
+        rows = np.asarray(rows, dtype=np.int64)
+        id_limit = 2 * max(self.size, self._row_by_id.size) + 1024
+        dense = (card_ids >= 0) & (card_ids < id_limit)
+        if self._sparse_rows:
+            dense &= np.array([card_id not in self._sparse_rows for card_id in card_ids.tolist()], dtype=bool)
+        if dense.any():
+            needed = int(card_ids[dense].max()) + 1
+            if needed > self._row_by_id.size:
+                grown = np.zeros(max(needed, 2 * self._row_by_id.size), dtype=np.int32)
+                grown[:self._row_by_id.size] = self._row_by_id
+                self._row_by_id = grown
+            self._row_by_id[card_ids[dense]] = rows[dense] + 1
+        if not dense.all():
+            self._sparse_rows.update(zip(card_ids[~dense].tolist(), rows[~dense].tolist()))
+
+    def _clear_row(self, card_id):
+        if self._sparse_rows.pop(card_id, None) is None:
+            self._row_by_id[card_id] = 0
+
+    def _append(self, card_ids, intervals, ease_factors, due_ordinals, topics):
+        """Appends rows for ids not yet in the columns, in one write per column."""
+        start, end = self.size, self.size + len(card_ids)
+        self._reserve(end)
+        self._ids[start:end] = card_ids
+        self._intervals[start:end] = intervals
+        self._ease_factors[start:end] = ease_factors
+        self._due_ordinals[start:end] = due_ordinals
+        self._topic_codes[start:end] = [self._topic_code(topic) for topic in topics]
+        self.size = end
+        self._set_rows(card_ids, np.arange(start, end))
+
+    def add_card(self, card):
+        """Stores (or overwrites) one card's row."""
+        row = self._row(card.id)
+        if row is None:
+            self._append([card.id], [card.interval], [card.ease_factor], [card.due_ordinal], [card.topic])
+            return
+        self._intervals[row] = card.interval
+        self._ease_factors[row] = card.ease_factor
+        self._due_ordinals[row] = card.due_ordinal
+        self._topic_codes[row] = self._topic_code(card.topic)
+
+    def add_cards(self, cards):
+        """Stores many cards; the new ones are appended in one batch."""
+        new_cards = {}
+        for card in cards:
+            if card.id in self:
+                self.add_card(card)
+            else:
+                new_cards[card.id] = card
+        if new_cards:
+            cards = new_cards.values()
+            self._append(list(new_cards), [card.interval for card in cards], [card.ease_factor for card in cards],
+                         [card.due_ordinal for card in cards], [card.topic for card in cards])
+
+    def remove(self, card_id):
+        """Drops a card's row; unknown ids are ignored."""
+        row = self._row(card_id)
+        if row is None:
+            return
+        self._clear_row(card_id)
+        last = self.size - 1
+        if row != last:
+            for column in (self._ids, self._intervals, self._ease_factors, self._due_ordinals, self._topic_codes):
+                column[row] = column[last]
+            self._set_rows([self._ids[row]], [row])
+        self.size = last
+
+    # --- Column Scans ---
+    @property
+    def ids(self):
+        return self._ids[:self.size]
+
+    @property
+    def intervals(self):
+        return self._intervals[:self.size]
+
+    @property
+    def ease_factors(self):
+        return self._ease_factors[:self.size]
+
+    @property
+    def due_ordinals(self):
+        return self._due_ordinals[:self.size]
+
+    def _due_mask(self, today_ordinal, topic=None):
+        mask = self.due_ordinals <= today_ordinal
+        topic_key = (topic or '').strip().lower()
+        if topic_key:
+            code = self._topic_code_by_key.get(topic_key)
+            if code is None:
+                return np.zeros(self.size, dtype=bool)
+            mask &= self._topic_codes[:self.size] == code
+        return mask
+
+    def due(self, today_ordinal, topic=None):
+        """Returns ids of cards due on or before today_ordinal, earliest first (then by id)."""
+        mask = self._due_mask(today_ordinal, topic)
+        ids = self.ids[mask]
+        return ids[np.lexsort((ids, self.due_ordinals[mask]))].tolist()
+
+    def due_count(self, today_ordinal, topic=None):
+        """Returns how many cards are due on or before today_ordinal."""
+        return int(np.count_nonzero(self._due_mask(today_ordinal, topic)))
+
+    def due_counts_by_topic(self, today_ordinal):
+        """Returns {topic: due count} for every topic with at least one due card."""
+        codes = self._topic_codes[:self.size][self._due_mask(today_ordinal)]
+        counts = np.bincount(codes, minlength=len(self._topic_names))
+        return {self._topic_names[code]: int(counts[code]) for code in np.flatnonzero(counts)}
+
+    def counts_by_day(self, first_ordinal, last_ordinal):
+        """Returns the number of cards due on each day from first_ordinal to last_ordinal inclusive."""
+        due_ordinals = self.due_ordinals
+        in_range = due_ordinals[(due_ordinals >= first_ordinal) & (due_ordinals <= last_ordinal)]
+        return np.bincount(in_range - first_ordinal, minlength=last_ordinal - first_ordinal + 1).tolist()
+
+    def forecast(self, days, load_balance=False, today=None):
+        """Projects daily review counts over the next `days` days, today first."""
+        today_ordinal = (today or date.today()).toordinal()
+        return forecast_due_counts(self.due_ordinals - today_ordinal, self.intervals, self.ease_factors,
+                                   days, load_balance).tolist()
+
+    def statistics(self, today=None):
+        """Returns deck totals: cards, due, overdue, new and mature counts, mean ease and mean interval."""
+        today_ordinal = (today or date.today()).toordinal()
+        intervals = self.intervals
+        return {
+            'cards': self.size,
+            'due': self.due_count(today_ordinal),
+            'overdue': int(np.count_nonzero(self.due_ordinals < today_ordinal)),
+            'new': int(np.count_nonzero(intervals == 0)),
+            'mature': int(np.count_nonzero(intervals >= MATURE_INTERVAL_DAYS)),
+            'average_ease': float(self.ease_factors.mean()) if self.size else 0.0,
+            'average_interval': float(intervals.mean()) if self.size else 0.0
+        }
+
+# --- Near-Duplicate Index ---
+MINHASH_PERMUTATIONS = 64
+MINHASH_BANDS = 16  # 16 bands of 4 rows: pairs above ~0.5 similarity usually share a bucket
+DUPLICATE_THRESHOLD = 0.6  # Estimated Jaccard similarity (of byte trigrams) that counts as a duplicate
+MINHASH_CHUNK_CARDS = 256  # Cards hashed per NumPy batch, to bound memory
+_minhash_rng = np.random.default_rng(20240401)  # Fixed seed, so signatures are stable across runs
+_MINHASH_A = _minhash_rng.integers(0, 1 << 63, MINHASH_PERMUTATIONS, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+_MINHASH_B = _minhash_rng.integers(0, 1 << 63, MINHASH_PERMUTATIONS, dtype=np.uint64)
+
+def card_text(card):
+    """Returns the normalized question and answer text compared for duplicates."""
+    text = f"{card.question} | {card.answer}"
+    return " ".join(text.split()).casefold()
+
+def minhash_signatures(texts):
+    """Returns a (len(texts), MINHASH_PERMUTATIONS) uint32 array of MinHash signatures.
+
+    Shingles are UTF-8 byte trigrams, built for the whole batch at once from
+    one concatenated buffer; each permutation is a multiply-shift hash
+    (a * x + b) >> 32 in wrapping 64-bit arithmetic, and np.minimum.reduceat
+    takes the per-text minimum.
+    """
+    signatures = np.empty((len(texts), MINHASH_PERMUTATIONS), dtype=np.uint32)
+    for start in range(0, len(texts), MINHASH_CHUNK_CARDS):
+        chunk = [text.encode('utf-8').ljust(3) for text in texts[start:start + MINHASH_CHUNK_CARDS]]
+        lengths = np.array([len(encoded) for encoded in chunk], dtype=np.int64)
+        buffer = np.frombuffer(b"".join(chunk), dtype=np.uint8).astype(np.uint64)
+        grams = (buffer[:-2] << 16) | (buffer[1:-1] << 8) | buffer[2:]
+        # Keep only trigrams that start and end inside the same text
+        owners = np.repeat(np.arange(len(chunk)), lengths)[:-2]
+        offsets = np.arange(grams.size) - (np.cumsum(lengths) - lengths)[owners]
+        inside = offsets <= lengths[owners] - 3
+        grams, owners = grams[inside], owners[inside]
+        hashed = (_MINHASH_A[:, None] * grams[None, :] + _MINHASH_B[:, None]) >> np.uint64(32)
+        segment_starts = np.flatnonzero(np.r_[True, owners[1:] != owners[:-1]])
+        signatures[start:start + len(chunk)] = np.minimum.reduceat(hashed, segment_starts, axis=1).T
+    return signatures
+
+class NearDuplicateIndex:
+    """MinHash/LSH index for spotting near-identical flashcards.
+
+    Each card's question and answer are reduced to a MinHash signature and
+    filed under one bucket per LSH band, so finding a card's likely
+    duplicates touches a handful of buckets instead of the whole deck.
+    Candidates sharing a bucket are confirmed by the fraction of matching
+    signature values, an estimate of their Jaccard similarity.
+    """
+    def __init__(self, threshold=DUPLICATE_THRESHOLD):
+        self.threshold = threshold
+        self._rows_per_band = MINHASH_PERMUTATIONS // MINHASH_BANDS
+        self._signatures = {}  # card_id -> signature
+        self._buckets = [{} for _ in range(MINHASH_BANDS)]  # band -> {band bytes: set of card ids}
+
+    @classmethod
+    def from_cards(cls, cards, threshold=DUPLICATE_THRESHOLD):
+        index = cls(threshold)
+        index.add_cards(cards)
+        return index
+
+    def __len__(self):
+        return len(self._signatures)
+
+    def _band_keys(self, signature):
+        rows = self._rows_per_band
+        return [signature[band * rows:(band + 1) * rows].tobytes() for band in range(MINHASH_BANDS)]
+
+    def _add_signature(self, card_id, signature):
+        self.remove(card_id)
+        self._signatures[card_id] = signature
+        for buckets, key in zip(self._buckets, self._band_keys(signature)):
+            buckets.setdefault(key, set()).add(card_id)
+
+    def add_card(self, card):
+        """Indexes (or re-indexes, after an edit) one card."""
+        self._add_signature(card.id, minhash_signatures([card_text(card)])[0])
+
+    def add_cards(self, cards):
+        """Indexes many cards, hashing them in NumPy batches."""
+        cards = list(cards)
+        signatures = minhash_signatures([card_text(card) for card in cards])
+        for card, signature in zip(cards, signatures):
+            self._add_signature(card.id, signature)
+
+    def remove(self, card_id):
+        """Drops a card from the index; unknown ids are ignored."""
+        signature = self._signatures.pop(card_id, None)
+        if signature is None:
+            return
+        for buckets, key in zip(self._buckets, self._band_keys(signature)):
+            bucket = buckets.get(key)
+            if bucket is not None:
+                bucket.discard(card_id)
+                if not bucket:
+                    del buckets[key]
+
+    def _matches(self, signature, exclude=None):
+        candidates = set()
+        for buckets, key in zip(self._buckets, self._band_keys(signature)):
+            candidates.update(buckets.get(key, ()))
+        candidates.discard(exclude)
+        matches = []
+        for card_id in candidates:
+            similarity = float(np.mean(self._signatures[card_id] == signature))
+            if similarity >= self.threshold:
+                matches.append((card_id, similarity))
+        matches.sort(key=lambda match: -match[1])
+        return matches
+
+    def similar_to(self, card):
+        """Returns [(card_id, similarity)] for indexed cards that look like this one, most similar first."""
+        return self._matches(minhash_signatures([card_text(card)])[0], exclude=card.id)
+
+    def duplicate_groups(self):
+        """Returns groups (lists of card ids, smallest id first) of cards that look alike, for a whole-deck report."""
+        parent = {}
+
+        def find(card_id):
+            while parent.get(card_id, card_id) != card_id:
+                parent[card_id] = parent.get(parent[card_id], parent[card_id])
+                card_id = parent[card_id]
+            return card_id
+
+        checked = set()
+        for buckets in self._buckets:
+            for bucket in buckets.values():
+                if len(bucket) < 2:
+                    continue
+                members = sorted(bucket)
+                for i, first in enumerate(members):
+                    for second in members[i + 1:]:
+                        if (first, second) in checked:
+                            continue
+                        checked.add((first, second))
+                        similarity = np.mean(self._signatures[first] == self._signatures[second])
+                        if similarity >= self.threshold:
+                            parent.setdefault(first, first)
+                            parent[find(second)] = find(first)
+
+        groups = {}
+        for card_id in parent:
+            groups.setdefault(find(card_id), []).append(card_id)
+        return sorted((sorted(group) for group in groups.values() if len(group) > 1), key=lambda group: group[0])
+
+# --- Full-Text Search Index ---
+SEARCH_INDEX_FORMAT = 1
+_search_index_write_lock = threading.Lock()  # Background saves write one at a time
+_search_index_saves_lock = threading.Lock()  # Guards _search_index_saves only, so save() never waits for a write
+_search_index_saves = {}  # file path -> number of the latest save requested, so older ones are skipped
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+def search_tokens(text):
+    """Splits text into the lower-cased word tokens the search index uses."""
+    return _TOKEN_PATTERN.findall(str(text).casefold())
+
+def card_search_tokens(card):
+    return set(search_tokens(f"{card.question} {card.answer} {card.topic}"))
+
+class SearchIndex:
+    """Inverted index from word tokens to the ids of the cards containing them.
+
+    Covers question, answer and topic. Every query term matches as a prefix:
+    the sorted vocabulary turns a prefix into a bisected range of tokens, whose
+    posting sets are unioned, and the terms are intersected smallest first.
+    Cards are removed using the text they were indexed with, so callers remove
+    a card before editing it and add it back afterwards.
+    """
+    def __init__(self):
+        self._postings = {}  # token -> set of card ids
+        self._vocabulary = []  # sorted tokens, for prefix ranges
+
+    @classmethod
+    def from_cards(cls, cards):
+        index = cls()
+        index.add_cards(cards)
+        return index
+
+    def add_card(self, card):
+        card_id = card.id
+        for token in card_search_tokens(card):
+            ids = self._postings.get(token)
+            if ids is None:
+                self._postings[token] = {card_id}
+                insort(self._vocabulary, token)
+            else:
+                ids.add(card_id)
+
+    def add_cards(self, cards):
+        """Indexes many cards, re-sorting the vocabulary once."""
+        for card in cards:
+            card_id = card.id
+            for token in card_search_tokens(card):
+                self._postings.setdefault(token, set()).add(card_id)
+        self._vocabulary = sorted(self._postings)
+
+    def remove_card(self, card):
+        card_id = card.id
+        for token in card_search_tokens(card):
+            ids = self._postings.get(token)
+            if ids is None:
+                continue
+            ids.discard(card_id)
+            if not ids:
+                del self._postings[token]
+                position = bisect_left(self._vocabulary, token)
+                if position < len(self._vocabulary) and self._vocabulary[position] == token:
+                    del self._vocabulary[position]
+
+    def _prefix_matches(self, prefix):
+        start = bisect_left(self._vocabulary, prefix)
+        end = bisect_left(self._vocabulary, prefix + "\U0010ffff")
+        tokens = self._vocabulary[start:end]
+        if len(tokens) == 1:
+            return self._postings[tokens[0]]
+        return set().union(*(self._postings[token] for token in tokens))
+
+    def search(self, query):
+        """Returns the set of ids of cards matching every term of query, or None for an empty query."""
+        terms = search_tokens(query)
+        if not terms:
+            return None
+        # Longer terms match fewer tokens, so start with them to keep the intersection small
+        matches = None
+        for term in sorted(set(terms), key=len, reverse=True):
+            term_matches = self._prefix_matches(term)
+            matches = set(term_matches) if matches is None else matches & term_matches
+            if not matches:
+                break
+        return matches
+
+    # --- Persistence ---
+    def save(self, file_path, version, background=False):
+        """Writes the index next to the deck, tagged with the deck file's version token.
+
+        The postings are copied on the calling thread; with background=True
+        the file itself is written on a daemon thread. Saves are written one
+        at a time, and one overtaken by a later save of the same file is
+        dropped, so an older index never replaces a newer one.
+        """
+        data = {
+            'format': SEARCH_INDEX_FORMAT,
+            'version': list(version) if version is not None else None,
+            'postings': {token: list(ids) for token, ids in self._postings.items()}
+        }
+        with _search_index_saves_lock:
+            number = _search_index_saves.get(file_path, 0) + 1
+            _search_index_saves[file_path] = number
+        if background:
+            threading.Thread(target=self._write, args=(file_path, data, number), daemon=True).start()
+        else:
+            self._write(file_path, data, number)
+
+    @staticmethod
+    def _write(file_path, data, number):
+        with _search_index_write_lock:
+            with _search_index_saves_lock:
+                if _search_index_saves.get(file_path) != number:
+                    return
+            temp_path = None
+            try:
+                # A temp file of its own, renamed over the index only once it is complete
+                with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=os.path.dirname(file_path) or ".",
+                                                 prefix=os.path.basename(file_path) + ".", suffix=".tmp",
+                                                 delete=False) as f:
+                    temp_path = f.name
+                    json.dump(data, f, separators=(',', ':'))
+                os.replace(temp_path, file_path)
+            except (OSError, TypeError) as e:
+                print(f"Warning: Could not save search index {file_path}: {e}")
+                if temp_path is not None and os.path.exists(temp_path):
+                    os.remove(temp_path)
+
+    @classmethod
+    def load(cls, file_path, version):
+        """Returns the saved index if it matches the deck file's current version, else None."""
+        if version is None or not os.path.exists(file_path):
+            return None
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Warning: Could not read search index {file_path}: {e}")
+            return None
+        if data.get('format') != SEARCH_INDEX_FORMAT or data.get('version') != list(version):
+            return None
+        index = cls()
+        index._postings = {token: set(ids) for token, ids in data.get('postings', {}).items()}
+        index._vocabulary = sorted(index._postings)
+        return index
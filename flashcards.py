@@ -1,22 +1,22 @@
 import customtkinter as ctk
-from customtkinter import CTkFrame, CTkLabel, CTkEntry, CTkButton, CTkScrollableFrame, CTkToplevel, CTkProgressBar
-from utils import (get_student_data_path, read_csv, write_csv,
-                   get_current_date_str, add_days_to_date, parse_date_str,
-                   DATE_FORMAT, validate_not_empty)
+from customtkinter import CTkFrame, CTkLabel, CTkEntry, CTkButton, CTkCheckBox, CTkTextbox, CTkToplevel, CTkProgressBar
+from utils import (get_student_data_path, get_current_date_str, add_days_to_date,
+                   validate_not_empty)
+from storage import get_storage, QuizJournal, SEARCH_INDEX_FILE
+from deck_index import DeckColumns, NearDuplicateIndex, SearchIndex
+from revlog import ReviewLog, highest_logged_card_id
+from scheduler import balance_interval_days, load_balance_tolerance
+from records import Flashcard, intern_text
+from quiz_session import QuizSession
+from workers import get_workers
+from card_import import FlashcardImporter, IMPORT_FILE_TYPES
+from virtual_table import VirtualTable
 import os
 import random
 from datetime import date, datetime, timedelta
-import time
+from tkinter import filedialog
 from CTkMessagebox import CTkMessagebox
 
-FLASHCARDS_FILE = "flashcards.csv"
-FLASHCARDS_HEADERS = ['id', 'question', 'answer', 'topic', 'interval', 'next_review_date', 'ease_factor', 'student_id']
-
-# SM2 Algorithm Constants
-INITIAL_EASE = 2.5
-MIN_EASE = 1.3
-EASY_BONUS = 1.2
-
 # Study Tips for Flashcards
 STUDY_TIPS = [
     "Break your study sessions into 25-minute chunks with 5-minute breaks (Pomodoro Technique)!",
@@ -26,19 +26,32 @@ STUDY_TIPS = [
     "Reward yourself after completing a quiz session to stay motivated!"
 ]
 
+FORECAST_DAYS = 7
+SEARCH_INDEX_SAVE_DELAY_MS = 2000  # Save the search index once edits have paused for this long
+
 class FlashcardsTab(CTkFrame):
     """GUI Frame for managing and reviewing flashcards."""
     def __init__(self, parent, username, progress_logger):
         super().__init__(parent, corner_radius=15, fg_color=("#e6f0ff", "#1a2a44"))
         self.username = username
         self.progress_logger = progress_logger
-        self.flashcards_file_path = get_student_data_path(self.username, FLASHCARDS_FILE)
+        self.repository = get_storage().flashcards(self.username)
+        self.quiz_journal = QuizJournal(self.username)
+        self.review_log = ReviewLog(self.username)
         self.flashcards_data = []
-        self.next_id = 1
+        self.id_sequence = get_storage().id_sequence(self.username, "flashcards")
         self.current_edit_id = None
-        self.selected_row = None
         self.selected_id = None
-        self.row_frames = []
+        self.deck_columns = DeckColumns()  # Scheduling fields only, for due counts and forecasts
+        self.duplicate_index = None  # Built on an I/O worker when the deck loads, then kept up to date
+        self.duplicate_index_build = None  # Future of the build in progress
+        self.duplicate_index_changes = []  # (card, removed id) changes made during the build, replayed onto it
+        self.duplicate_index_generation = 0  # Bumped per build, so a superseded build is dropped
+        self.search_index = SearchIndex()
+        # File-stat versions survive restarts, so the index is only saved for the CSV backend
+        self.search_index_path = get_student_data_path(self.username, SEARCH_INDEX_FILE) if get_storage().name == "csv" else None
+        self.search_index_save_job = None
+        self.cards_by_id = {}
 
         # Inner frame for shadow effect
         self.inner_frame = CTkFrame(self, corner_radius=15, fg_color=("#ffffff", "#2b2b2b"), border_width=2, border_color=("#1f77b4", "#4a90e2"))
@@ -146,8 +159,38 @@ class FlashcardsTab(CTkFrame):
         self.delete_button.pack(side="left", padx=5)
         self.delete_button.bind("<Enter>", lambda event: self._scale_button_in(self.delete_button))
         self.delete_button.bind("<Leave>", lambda event: self._scale_button_out(self.delete_button))
+
+        self.import_button = CTkButton(
+            buttons_frame,
+            text="Import Cards 📥",
+            command=self._import_flashcards,
+            corner_radius=8,
+            font=("Helvetica", 12, "bold"),
+            fg_color=("#34c759", "#2ba844"),
+            hover_color=("#2eb350", "#25933b")
+        )
+        self.import_button.pack(side="left", padx=5)
+        self.import_button.bind("<Enter>", lambda event: self._scale_button_in(self.import_button))
+        self.import_button.bind("<Leave>", lambda event: self._scale_button_out(self.import_button))
+
+        self.duplicates_button = CTkButton(
+            buttons_frame,
+            text="Find Duplicates 🔍",
+            command=self._show_duplicate_report,
+            corner_radius=8,
+            font=("Helvetica", 12, "bold"),
+            fg_color=("#1f77b4", "#4a90e2"),
+            hover_color=("#165a92", "#357abd")
+        )
+        self.duplicates_button.pack(side="left", padx=5)
+        self.duplicates_button.bind("<Enter>", lambda event: self._scale_button_in(self.duplicates_button))
+        self.duplicates_button.bind("<Leave>", lambda event: self._scale_button_out(self.duplicates_button))
         buttons_frame.pack(pady=10)
 
+        # Import Progress Bar (hidden until an import runs)
+        self.import_progress_bar = CTkProgressBar(manage_frame, mode="determinate", width=300)
+        self.import_progress_bar.pack_forget()
+
         # --- Quiz UI ---
         self.quiz_title_label = CTkLabel(quiz_frame, text="", font=("Comic Sans MS", 18, "bold"))
         self.quiz_title_label.pack(pady=5)
@@ -176,19 +219,53 @@ class FlashcardsTab(CTkFrame):
         self.start_quiz_button.pack(side="left", padx=10)
         self.start_quiz_button.bind("<Enter>", lambda event: self._scale_button_in(self.start_quiz_button))
         self.start_quiz_button.bind("<Leave>", lambda event: self._scale_button_out(self.start_quiz_button))
+        # Spreads each new due date over a few nearby days so reviews don't pile up on one day
+        self.load_balance_var = ctk.BooleanVar(value=False)
+        CTkCheckBox(
+            f_quiz,
+            text="Balance review load",
+            variable=self.load_balance_var,
+            command=self._update_forecast_label,
+            fg_color=("#1f77b4", "#4a90e2"),
+            hover_color=("#165a92", "#357abd")
+        ).pack(side="left", padx=5)
         f_quiz.pack(pady=10, padx=20, fill="x")
 
+        self.due_label = CTkLabel(quiz_frame, text="", font=("Helvetica", 11, "italic"), wraplength=600)
+        self.due_label.pack(pady=(0, 5))
+        self.forecast_label = CTkLabel(quiz_frame, text="", font=("Helvetica", 11, "italic"), wraplength=600)
+        self.forecast_label.pack(pady=(0, 5))
+
         # --- Flashcard Display ---
-        self.display_scroll = CTkScrollableFrame(display_frame, corner_radius=10)
-        self.display_scroll.pack(fill="both", expand=True)
+        f_search = CTkFrame(display_frame, fg_color="transparent")
+        CTkLabel(f_search, text="🔎 Search:", width=80, anchor="w", font=("Helvetica", 12)).pack(side="left", padx=5)
+        self.search_entry = CTkEntry(
+            f_search,
+            width=300,
+            placeholder_text="Search questions, answers and topics",
+            corner_radius=8,
+            border_width=0,
+            fg_color=("#e0e0e0", "#444444")
+        )
+        self.search_entry.pack(side="left", padx=5, fill="x", expand=True)
+        self.search_entry.bind("<KeyRelease>", self._apply_search)
+        f_search.pack(pady=5, padx=5, fill="x")
 
-        # Add headers
-        self.header_frame = CTkFrame(self.display_scroll, fg_color=("#d3d3d3", "#555555"))
+        # Only the rows in view get widgets; click a header to sort by that column
         headers = ["ID", "Topic", "Question", "Answer", "Next Review", "Interval (d)", "Ease Factor"]
         self.header_widths = [40, 100, 250, 250, 100, 80, 80]
-        for header, width in zip(headers, self.header_widths):
-            CTkLabel(self.header_frame, text=header, width=width, anchor="w", font=("Helvetica", 10, "bold")).pack(side="left", padx=2)
-        self.header_frame.pack(fill="x")
+        self.card_table = VirtualTable(
+            display_frame,
+            columns=list(zip(headers, self.header_widths)),
+            key_func=lambda card: card.id,
+            values_func=self._card_display_values,
+            sort_key=lambda card: (card.topic.lower(), card.question.lower()),
+            on_select=self._select_row,
+            on_double_click=self._load_selected_for_edit,
+            corner_radius=10
+        )
+        self.card_table.pack(fill="both", expand=True)
+        self.header_frame = self.card_table.header_frame
 
         # Load initial data
         self._load_flashcards()
@@ -209,103 +286,185 @@ class FlashcardsTab(CTkFrame):
 
 
 
-    def _get_max_id(self):
-        if not self.flashcards_data:
-            return 0
-        max_id = 0
-        for card in self.flashcards_data:
-            try:
-                card_id = int(card.get('id', 0))
-                if card_id > max_id:
-                    max_id = card_id
-            except (ValueError, TypeError):
-                continue
-        return max_id
-
     def _load_flashcards(self):
-        self.flashcards_data = read_csv(self.flashcards_file_path, FLASHCARDS_HEADERS)
-        today_str = get_current_date_str()
-        for card in self.flashcards_data:
-            try:
-                card['id'] = int(card.get('id', 0))
-                card['interval'] = float(card.get('interval', 0))
-                card['ease_factor'] = float(card.get('ease_factor', INITIAL_EASE))
-                if not parse_date_str(card.get('next_review_date')):
-                    card['next_review_date'] = today_str
-            except (ValueError, TypeError) as e:
-                print(f"Warning: Error parsing card data: {card}. Error: {e}. Using defaults.")
-                card['id'] = card.get('id', 0) if isinstance(card.get('id'), int) else 0
-                card['interval'] = card.get('interval', 0) if isinstance(card.get('interval'), (int, float)) else 0
-                card['ease_factor'] = card.get('ease_factor', INITIAL_EASE) if isinstance(card.get('ease_factor'), (int, float)) else INITIAL_EASE
-                card['next_review_date'] = card.get('next_review_date') if parse_date_str(card.get('next_review_date')) else today_str
-
-        self.next_id = self._get_max_id() + 1
+        recovered = self.quiz_journal.recover(self.repository)
+        if recovered:
+            print(f"Recovered {recovered} reviews from an interrupted quiz.")
+        self.flashcards_data = self.repository.list_all()  # Flashcard records, already typed
+        # Stored before any delete, so the newest id is never handed out again; ids in the log stay taken too
+        self.id_sequence.ensure_stored(lambda: highest_logged_card_id(self.username))
+        self._renumber_damaged_cards()
+        self.cards_by_id = {card.id: card for card in self.flashcards_data}
+        self.deck_columns = DeckColumns.from_cards(self.flashcards_data)
+        self._start_duplicate_index_build()
+        self._load_search_index()
         self._populate_treeview()
+        self._apply_search()
+        self._update_due_label()
+        self._update_forecast_label()
+
+    def _renumber_damaged_cards(self):
+        """Gives cards whose stored id did not parse fresh ids, so none shares a key with another."""
+        damaged = [card for card in self.flashcards_data if card.id is None]
+        if not damaged:
+            return
+        first_id = self.id_sequence.reserve(len(damaged))
+        for offset, card in enumerate(damaged):
+            card.id = first_id + offset
+        self._save_flashcards()  # Rewrites the file, replacing the damaged rows
+        print(f"Warning: Gave {len(damaged)} flashcards with unreadable ids new ids.")
+
+    # --- Search ---
+    def _load_search_index(self):
+        """Uses the saved search index if it matches flashcards.csv, otherwise rebuilds and saves it."""
+        if self.search_index_path:
+            saved_index = SearchIndex.load(self.search_index_path, self.repository.version())
+            if saved_index is not None:
+                self.search_index = saved_index
+                return
+        self.search_index = SearchIndex.from_cards(self.flashcards_data)
+        self._schedule_search_index_save()
 
-    def _save_flashcards(self):
-        data_to_save = []
-        for card in self.flashcards_data:
-            save_card = card.copy()
-            save_card['id'] = str(save_card.get('id', ''))
-            save_card['interval'] = str(save_card.get('interval', '0'))
-            save_card['ease_factor'] = str(round(save_card.get('ease_factor', INITIAL_EASE), 3))
-            save_card['next_review_date'] = str(save_card.get('next_review_date', ''))
-            data_to_save.append(save_card)
-
-        write_csv(self.flashcards_file_path, data_to_save, FLASHCARDS_HEADERS)
-
-    def _populate_treeview(self):
-        for row_frame in self.row_frames:
-            row_frame.destroy()
-        self.row_frames = []
-        self.selected_row = None
-        self.selected_id = None
+    def _schedule_search_index_save(self):
+        """Saves the search index after a pause, so it stays valid for the next start-up."""
+        if not self.search_index_path:
+            return
+        if self.search_index_save_job is not None:
+            self.after_cancel(self.search_index_save_job)
+        self.search_index_save_job = self.after(SEARCH_INDEX_SAVE_DELAY_MS, self._save_search_index)
+
+    def _save_search_index(self):
+        self.search_index_save_job = None
+        self.search_index.save(self.search_index_path, self.repository.version(), background=True)
+
+    def _apply_search(self, event=None):
+        """Filters the table to the cards matching every word typed (each as a prefix)."""
+        self.card_table.set_filter(self.search_index.search(self.search_entry.get()))
+
+    def _update_due_label(self):
+        """Shows how many cards are due today, per topic, from a scan of the due-date column."""
+        today_ordinal = date.today().toordinal()
+        total = self.deck_columns.due_count(today_ordinal)
+        if not total:
+            self.due_label.configure(text="✅ No cards due today.")
+            return
+        per_topic = self.deck_columns.due_counts_by_topic(today_ordinal)
+        breakdown = ", ".join(f"{topic}: {count}" for topic, count in sorted(per_topic.items()))
+        self.due_label.configure(text=f"📅 Due today: {total} ({breakdown})")
 
-        self.flashcards_data.sort(key=lambda x: (x.get('topic', '').lower(), x.get('question', '').lower()))
-
-        for idx, card in enumerate(self.flashcards_data):
-            ease_display = f"{card.get('ease_factor', INITIAL_EASE):.2f}"
-            values = (
-                card.get('id', ''),
-                card.get('topic', ''),
-                card.get('question', ''),
-                card.get('answer', ''),
-                card.get('next_review_date', ''),
-                card.get('interval', ''),
-                ease_display
-            )
+    def _update_forecast_label(self):
+        """Shows the projected number of reviews for each of the next FORECAST_DAYS days."""
+        today = date.today()
+        counts = self.deck_columns.forecast(FORECAST_DAYS, self.load_balance_var.get(), today)
+        days = ", ".join(f"{(today + timedelta(days=offset)).strftime('%a')}: {count}" for offset, count in enumerate(counts))
+        self.forecast_label.configure(text=f"🔮 Next {FORECAST_DAYS} days: {days}")
+
+    def _balanced_interval_days(self, interval_days):
+        """Moves a new due date to the least busy day within its tolerance window."""
+        tolerance = int(load_balance_tolerance(interval_days))
+        if not tolerance:
+            return interval_days
+        target_ordinal = date.today().toordinal() + interval_days
+        window_loads = self.deck_columns.counts_by_day(target_ordinal - tolerance, target_ordinal + tolerance)
+        return balance_interval_days(interval_days, window_loads)
+
+    def _start_duplicate_index_build(self):
+        """Hashes the whole deck on an I/O worker, so the first add does not wait seconds for it."""
+        self.duplicate_index = None
+        self.duplicate_index_changes = []
+        self.duplicate_index_generation += 1
+        generation = self.duplicate_index_generation
+        self.duplicate_index_build = get_workers().run_io(
+            NearDuplicateIndex.from_cards, list(self.flashcards_data),
+            on_done=lambda index: self._install_duplicate_index(generation, index),
+            on_error=lambda error: print(f"Warning: Could not build the duplicate index: {error!r}"))
+
+    def _install_duplicate_index(self, generation, index):
+        if generation != self.duplicate_index_generation or self.duplicate_index is not None:
+            return
+        # Cards edited, added or deleted while the worker hashed the deck
+        for card, removed_id in self.duplicate_index_changes:
+            if card is not None:
+                index.add_card(card)
+            else:
+                index.remove(removed_id)
+        self.duplicate_index = index
+        self.duplicate_index_changes = []
 
-            row_frame = CTkFrame(self.display_scroll, fg_color=("gray90", "gray20") if idx % 2 == 0 else ("gray80", "gray30"))
-            row_frame.pack(fill="x", pady=2)
+    def _get_duplicate_index(self):
+        """Returns the index, waiting for the background build if it has not finished yet."""
+        if self.duplicate_index is None:
+            try:
+                index = self.duplicate_index_build.result()
+            except Exception:  # The build failed (already reported); build it here instead
+                index = NearDuplicateIndex.from_cards(self.flashcards_data)
+                self.duplicate_index_changes = []
+            self._install_duplicate_index(self.duplicate_index_generation, index)
+        return self.duplicate_index
+
+    def _index_duplicate_cards(self, cards):
+        if self.duplicate_index is not None:
+            self.duplicate_index.add_cards(cards)
+        else:
+            self.duplicate_index_changes.extend((card, None) for card in cards)
 
-            for value, width in zip(values, self.header_widths):
-                label = CTkLabel(row_frame, text=str(value), width=width, anchor="w")
-                label.pack(side="left", padx=2)
+    def _unindex_duplicate_card(self, card_id):
+        if self.duplicate_index is not None:
+            self.duplicate_index.remove(card_id)
+        else:
+            self.duplicate_index_changes.append((None, card_id))
 
-            row_frame.bind("<Button-1>", lambda event, card_id=card['id']: self._select_row(row_frame, card_id))
-            for child in row_frame.winfo_children():
-                child.bind("<Button-1>", lambda event, card_id=card['id']: self._select_row(row_frame, card_id))
+    def _show_duplicate_report(self):
+        """Lists groups of near-identical cards across the whole deck."""
+        groups = self._get_duplicate_index().duplicate_groups()
+        if not groups:
+            CTkMessagebox(title="Duplicates", message="No near-duplicate flashcards found.", icon="info").get()
+            return
 
-            row_frame.bind("<Double-1>", lambda event, card_id=card['id']: self._load_selected_for_edit(card_id))
-            for child in row_frame.winfo_children():
-                child.bind("<Double-1>", lambda event, card_id=card['id']: self._load_selected_for_edit(card_id))
+        report = CTkToplevel(self)
+        report.title("Near-Duplicate Flashcards")
+        report.geometry("600x400")
+        report.transient(self)
+        CTkLabel(report, text=f"{len(groups)} groups of similar cards", font=("Helvetica", 14, "bold")).pack(pady=5)
+        textbox = CTkTextbox(report, wrap="word", font=("Helvetica", 12))
+        textbox.pack(padx=10, pady=10, fill="both", expand=True)
+        lines = []
+        for number, group in enumerate(groups, start=1):
+            lines.append(f"Group {number}:")
+            for card_id in group:
+                card = self.cards_by_id.get(card_id)
+                if card is not None:
+                    lines.append(f"  #{card_id} [{card.topic}] {card.question} → {card.answer}")
+            lines.append("")
+        textbox.insert("1.0", "\n".join(lines))
+        textbox.configure(state="disabled")
 
-            row_frame.bind("<Enter>", lambda event, rf=row_frame: rf.configure(fg_color=("gray75", "gray25")))
-            row_frame.bind("<Leave>", lambda event, rf=row_frame, idx=idx: rf.configure(fg_color=("gray90", "gray20") if idx % 2 == 0 else ("gray80", "gray30")))
-            self.row_frames.append(row_frame)
+    def _save_flashcards(self):
+        self.repository.replace_all(self.flashcards_data)
+
+    def _save_cards(self, cards):
+        """Persists only the given cards (a single-row upsert on the SQLite backend)."""
+        self.repository.upsert_many(cards)
+
+    def _card_display_values(self, card):
+        return (
+            card.id,
+            card.topic,
+            card.question,
+            card.answer,
+            card.next_review_date,
+            card.interval,
+            f"{card.ease_factor:.2f}"
+        )
 
-    def _select_row(self, row_frame, card_id):
-        if self.selected_row:
-            idx = self.row_frames.index(self.selected_row)
-            self.selected_row.configure(fg_color=("gray90", "gray20") if idx % 2 == 0 else ("gray80", "gray30"))
-            for child in self.selected_row.winfo_children():
-                child.configure(fg_color=("gray90", "gray20") if idx % 2 == 0 else ("gray80", "gray30"))
+    def _populate_treeview(self):
+        """Rebuilds the table from flashcards_data; single edits go through the card_table instead."""
+        self.selected_id = None
+        self.card_table.selected_key = None
+        self.card_table.set_items(self.flashcards_data)
 
-        self.selected_row = row_frame
+    def _select_row(self, card_id):
         self.selected_id = card_id
-        self.selected_row.configure(fg_color=("gray75", "gray25"))
-        for child in self.selected_row.winfo_children():
-            child.configure(fg_color=("gray75", "gray25"))
 
     def _clear_fields(self):
         self.question_entry.delete(0, "end")
@@ -313,12 +472,7 @@ class FlashcardsTab(CTkFrame):
         self.topic_entry.delete(0, "end")
         self.current_edit_id = None
         self.add_update_button.configure(text="Add Card")
-        if self.selected_row:
-            idx = self.row_frames.index(self.selected_row)
-            self.selected_row.configure(fg_color=("gray90", "gray20") if idx % 2 == 0 else ("gray80", "gray30"))
-            for child in self.selected_row.winfo_children():
-                child.configure(fg_color=("gray90", "gray20") if idx % 2 == 0 else ("gray80", "gray30"))
-        self.selected_row = None
+        self.card_table.clear_selection()
         self.selected_id = None
 
     def _load_selected_for_edit(self, card_id=None):
@@ -326,20 +480,16 @@ class FlashcardsTab(CTkFrame):
             return
 
         item_id = int(card_id)
-        card_to_edit = None
-        for card in self.flashcards_data:
-            if card.get('id') == item_id:
-                card_to_edit = card
-                break
+        card_to_edit = self.cards_by_id.get(item_id)
 
         if card_to_edit:
             self.current_edit_id = item_id
             self.question_entry.delete(0, "end")
-            self.question_entry.insert(0, card_to_edit.get('question', ''))
+            self.question_entry.insert(0, card_to_edit.question)
             self.answer_entry.delete(0, "end")
-            self.answer_entry.insert(0, card_to_edit.get('answer', ''))
+            self.answer_entry.insert(0, card_to_edit.answer)
             self.topic_entry.delete(0, "end")
-            self.topic_entry.insert(0, card_to_edit.get('topic', ''))
+            self.topic_entry.insert(0, card_to_edit.topic)
             self.add_update_button.configure(text="Update Card")
 
     def _add_or_update_flashcard(self):
@@ -358,37 +508,50 @@ class FlashcardsTab(CTkFrame):
             return
 
         if self.current_edit_id is not None:
-            updated = False
-            for i, card in enumerate(self.flashcards_data):
-                if card.get('id') == self.current_edit_id:
-                    self.flashcards_data[i]['question'] = question
-                    self.flashcards_data[i]['answer'] = answer
-                    self.flashcards_data[i]['topic'] = topic
-                    updated = True
-                    break
-            if updated:
+            card = self.cards_by_id.get(self.current_edit_id)
+            if card is not None:
+                filter_keys = self.card_table.filter_keys
+                was_shown = filter_keys is None or card.id in filter_keys
+                self.search_index.remove_card(card)  # Un-index the old text before it changes
+                card.question = question
+                card.answer = answer
+                card.topic = intern_text(topic)
+                self._save_cards([card])
+                self.deck_columns.add_card(card)
+                self.search_index.add_card(card)
+                self._index_duplicate_cards([card])
+                # Re-filter only if the edit changed whether the card matches the search, and stay in place
+                matches = self.search_index.search(self.search_entry.get())
+                if matches is not None and (card.id in matches) != was_shown:
+                    self.card_table.set_filter(matches, keep_offset=True)
+                self.card_table.update_item(card)
                 CTkMessagebox(title="Update Success", message="Flashcard updated successfully.", icon="check").get()
             else:
                 CTkMessagebox(title="Update Error", message="Could not find the card to update.", icon="cancel").get()
                 self._clear_fields()
                 return
         else:
-            new_card = {
-                'id': self.next_id,
-                'question': question,
-                'answer': answer,
-                'topic': topic,
-                'interval': 0,
-                'next_review_date': get_current_date_str(),
-                'ease_factor': INITIAL_EASE,
-                'student_id': self.username
-            }
-            self.flashcards_data.append(new_card)
-            self.next_id += 1
+            new_card = Flashcard(None, question, answer, topic)  # Numbered once it is confirmed
+            matches = self._get_duplicate_index().similar_to(new_card)
+            if matches:
+                similar_card = self.cards_by_id[matches[0][0]]
+                if CTkMessagebox(title="Possible Duplicate", message=f"This looks like card #{matches[0][0]}: \"{similar_card.question}\". Add it anyway?", option_1="Yes", option_2="No").get() != "Yes":
+                    return
+            new_card.id = self.id_sequence.allocate()
+            self._save_cards([new_card])
+            self.cards_by_id[new_card.id] = new_card
+            self.deck_columns.add_card(new_card)
+            self.duplicate_index.add_card(new_card)
+            self.search_index.add_card(new_card)
+            self._apply_search()
+            # The table shares flashcards_data, so this also inserts the card into it
+            table_row = self.card_table.insert_item(new_card)
+            if table_row is not None:
+                self.card_table.scroll_to(table_row)
             CTkMessagebox(title="Add Success", message="Flashcard added successfully.", icon="check").get()
 
-        self._save_flashcards()
-        self._populate_treeview()
+        self._update_due_label()
+        self._schedule_search_index_save()
         self._clear_fields()
 
     def _delete_flashcard(self):
@@ -400,28 +563,86 @@ class FlashcardsTab(CTkFrame):
         item_id_to_delete = self.selected_id
 
         if CTkMessagebox(title="Confirm Delete", message="Are you sure you want to delete this flashcard?", option_1="Yes", option_2="No").get() == "Yes":
-            initial_length = len(self.flashcards_data)
-            self.flashcards_data = [card for card in self.flashcards_data if card.get('id') != item_id_to_delete]
-
-            if len(self.flashcards_data) < initial_length:
-                self._save_flashcards()
-                self._populate_treeview()
+            # The table shares flashcards_data, so this removes the card from it as well
+            if self.card_table.remove_item(item_id_to_delete):
+                self.repository.delete(item_id_to_delete)
+                deleted_card = self.cards_by_id.pop(item_id_to_delete, None)
+                self.deck_columns.remove(item_id_to_delete)
+                if deleted_card is not None:
+                    self.search_index.remove_card(deleted_card)
+                self._unindex_duplicate_card(item_id_to_delete)
+                self._update_due_label()
+                self._schedule_search_index_save()
                 self._clear_fields()
                 CTkMessagebox(title="Delete Success", message="Flashcard deleted.", icon="check").get()
             else:
                 CTkMessagebox(title="Delete Error", message="Could not find the selected card to delete.", icon="cancel").get()
     
 
+    def _import_flashcards(self):
+        """Imports a TSV, CSV or JSON export, a chunk of rows per Tk idle step."""
+        file_path = filedialog.askopenfilename(title="Import Flashcards", filetypes=IMPORT_FILE_TYPES)
+        if not file_path:
+            return
+        try:
+            importer = FlashcardImporter(file_path, self.flashcards_data)
+        except OSError as e:
+            CTkMessagebox(title="Import Error", message=f"Could not open {file_path}: {e}", icon="cancel").get()
+            return
+
+        self.import_button.configure(state="disabled")
+        self.import_progress_bar.set(0)
+        self.import_progress_bar.pack(pady=(0, 10))
+        self.after(1, self._continue_import, importer)
+
+    def _continue_import(self, importer):
+        try:
+            more = importer.step()
+        except ValueError as e:
+            self._end_import()
+            CTkMessagebox(title="Import Error", message=f"{e}\nNo cards were imported.", icon="cancel").get()
+            return
+        self.import_progress_bar.set(importer.progress)
+        if more:
+            self.after(1, self._continue_import, importer)
+        else:
+            self._finish_import(importer)
+
+    def _finish_import(self, importer):
+        new_cards = importer.cards
+        if new_cards:
+            # One block of ids and one batched write, then the indexes and the table are built once
+            importer.assign_ids(self.id_sequence.reserve(len(new_cards)))
+            self.repository.upsert_many(new_cards)
+            self.flashcards_data.extend(new_cards)
+            for card in new_cards:
+                self.cards_by_id[card.id] = card
+            self.deck_columns.add_cards(new_cards)
+            self._index_duplicate_cards(new_cards)
+            self.search_index.add_cards(new_cards)
+            self._populate_treeview()
+            self._apply_search()
+            self._schedule_search_index_save()
+            self._update_due_label()
+            self._update_forecast_label()
+        self._end_import()
+
+        message = f"Imported {len(new_cards)} of {importer.rows_read} rows."
+        if importer.duplicate_rows:
+            message += f"\nSkipped {importer.duplicate_rows} duplicates."
+        if importer.invalid_rows:
+            message += f"\nSkipped {importer.invalid_rows} rows without a question or answer."
+        CTkMessagebox(title="Import Complete", message=message, icon="check").get()
+
+    def _end_import(self):
+        self.import_progress_bar.pack_forget()
+        self.import_button.configure(state="normal")
+
     def _start_quiz(self):
-        today = date.today()
         topic_filter = self.quiz_topic_filter_entry.get().strip().lower()
 
-        cards_to_review = []
-        for card in self.flashcards_data:
-            review_date = parse_date_str(card.get('next_review_date'))
-            if review_date and review_date <= today:
-                if not topic_filter or (topic_filter and card.get('topic', '').lower() == topic_filter):
-                    cards_to_review.append(card.copy())
+        due_ids = self.deck_columns.due(date.today().toordinal(), topic_filter or None)
+        cards_to_review = [self.cards_by_id[card_id].copy() for card_id in due_ids if card_id in self.cards_by_id]
 
         if not cards_to_review:
             CTkMessagebox(title="Quiz", message="No flashcards due for review today" + (f" with topic '{topic_filter}'." if topic_filter else "."), icon="info").get()
@@ -429,26 +650,37 @@ class FlashcardsTab(CTkFrame):
             return
 
         random.shuffle(cards_to_review)
-        quiz_window = QuizWindow(self, cards_to_review, self.username, self._quiz_finished_callback)
+        load_balancer = self._balanced_interval_days if self.load_balance_var.get() else None
+        quiz_window = QuizWindow(self, cards_to_review, self.username, self._quiz_finished_callback,
+                                 on_review=self._record_review, load_balancer=load_balancer)
+
+    def _record_review(self, card, rating, previous_interval, previous_ease, response_time):
+        """Writes one assessed card through to the quiz journal and the review log as soon as it is rated."""
+        self.quiz_journal.append(card)
+        self.deck_columns.add_card(card)  # Later cards in the quiz balance against this one
+        self.review_log.append(card.id, rating, previous_interval, card.interval,
+                               previous_ease, card.ease_factor, response_time)
 
     def _quiz_finished_callback(self, updated_cards, cards_reviewed_count, duration_seconds, subject_times):
+        self.review_log.close()
         if not updated_cards:
             print("Quiz cancelled or no cards reviewed.")
             return
 
-        updated_ids = {card['id'] for card in updated_cards}
-        new_flashcards_data = []
-        for original_card in self.flashcards_data:
-            if original_card['id'] in updated_ids:
-                updated_version = next((uc for uc in updated_cards if uc['id'] == original_card['id']), None)
-                if updated_version:
-                    new_flashcards_data.append(updated_version)
-            else:
-                new_flashcards_data.append(original_card)
-
-        self.flashcards_data = new_flashcards_data
-        self._save_flashcards()
-        self._populate_treeview()
+        # Merge into the shared cards by id; flashcards_data and the table see the change directly
+        for updated_card in updated_cards:
+            card = self.cards_by_id.get(updated_card.id)
+            if card is None:
+                continue
+            card.interval = updated_card.interval
+            card.ease_factor = updated_card.ease_factor
+            card.due_ordinal = updated_card.due_ordinal
+            self.deck_columns.add_card(card)
+            self.card_table.update_item(card)
+        self.quiz_journal.fold(self.repository, updated_cards)
+        self._schedule_search_index_save()  # The text is unchanged, but the saved copy is tied to the file version
+        self._update_due_label()
+        self._update_forecast_label()
 
         if cards_reviewed_count > 0 and duration_seconds > 0:
             study_hours = duration_seconds / 3600.0
@@ -470,8 +702,8 @@ class FlashcardsTab(CTkFrame):
             self.header_frame.configure(fg_color="#555555")
 
 class QuizWindow(ctk.CTkToplevel):
-    """Modal window for the flashcard quiz process."""
-    def __init__(self, parent, cards_to_review, username, callback):
+    """Modal window for the flashcard quiz process; the quiz state lives in a QuizSession."""
+    def __init__(self, parent, cards_to_review, username, callback, on_review=None, load_balancer=None):
         super().__init__(parent)
         self.transient(parent)
         self.grab_set()
@@ -479,22 +711,16 @@ class QuizWindow(ctk.CTkToplevel):
         self.geometry("500x400")
         self.configure(fg_color=("#e6f0ff", "#1a2a44"))
 
-        self.cards = cards_to_review
+        self.session = QuizSession(cards_to_review, on_review=on_review, load_balancer=load_balancer)
         self.username = username
         self.callback = callback
-        self.current_card_index = 0
-        self.updated_cards_data = []
-        self.start_time = time.time()
-        self.cards_reviewed_count = 0
-        self.subject_times = {}
-        self.current_card_start_time = time.time()
 
         # Inner frame for card effect
         self.inner_frame = CTkFrame(self, corner_radius=15, fg_color=("#ffffff", "#2b2b2b"), border_width=2, border_color=("#1f77b4", "#4a90e2"))
         self.inner_frame.pack(padx=10, pady=10, fill="both", expand=True)
 
         # Progress Indicator
-        self.progress_label = CTkLabel(self.inner_frame, text=f"Card 1/{len(self.cards)}", font=("Helvetica", 12))
+        self.progress_label = CTkLabel(self.inner_frame, text=f"Card 1/{self.session.total}", font=("Helvetica", 12))
         self.progress_label.pack(pady=5)
 
         # Card Frame for Flip Animation
@@ -562,7 +788,7 @@ class QuizWindow(ctk.CTkToplevel):
         self.easy_button.bind("<Leave>", lambda event: self._scale_button_out(self.easy_button))
 
         # Load first card
-        if self.cards:
+        if not self.session.is_finished:
             self._load_card()
         else:
             self.destroy()
@@ -588,24 +814,22 @@ class QuizWindow(ctk.CTkToplevel):
         flip()
 
     def _load_card(self):
-        if self.current_card_index < len(self.cards):
-            card = self.cards[self.current_card_index]
-            self.question_label.configure(text=f"Q: {card.get('question', '')}")
-            self.progress_label.configure(text=f"Card {self.current_card_index + 1}/{len(self.cards)}")
+        card = self.session.next_card()
+        if card is not None:
+            self.question_label.configure(text=f"Q: {card.question}")
+            self.progress_label.configure(text=f"Card {self.session.position}/{self.session.total}")
 
             self.answer_label.pack_forget()
             self.answer_label.configure(text="")
             self.assessment_frame.pack_forget()
             self.show_answer_button.pack(pady=10)
-
-            self.current_card_start_time = time.time()
         else:
             self._finish_quiz()
 
     def _show_answer(self):
-        if self.current_card_index < len(self.cards):
-            card = self.cards[self.current_card_index]
-            self.answer_label.configure(text=f"A: {card.get('answer', '')}")
+        card = self.session.reveal()
+        if card is not None:
+            self.answer_label.configure(text=f"A: {card.answer}")
             self._flip_animation(lambda: (
                 self.show_answer_button.pack_forget(),
                 self.answer_label.pack(pady=10, padx=10),
@@ -613,64 +837,14 @@ class QuizWindow(ctk.CTkToplevel):
             ))
 
     def _assess(self, rating):
-        if self.current_card_index >= len(self.cards):
+        if self.session.assess(rating) is None:
             return
-
-        card = self.cards[self.current_card_index]
-        today = date.today()
-
-        try:
-            interval = float(card.get('interval', 0))
-            ease_factor = float(card.get('ease_factor', INITIAL_EASE))
-        except (ValueError, TypeError):
-            interval = 0.0
-            ease_factor = INITIAL_EASE
-
-        if rating == 0:
-            interval = 0
-            ease_factor = max(MIN_EASE, ease_factor - 0.2)
-        else:
-            if interval == 0:
-                if rating == 1:
-                    interval = 1
-                    ease_factor += 0.05
-                elif rating == 2:
-                    interval = 4
-                    ease_factor += 0.1
-            else:
-                if rating == 1:
-                    interval = interval * ease_factor
-                    ease_factor += 0.05
-                elif rating == 2:
-                    interval = interval * ease_factor * EASY_BONUS
-                    ease_factor += 0.1
-            ease_factor = max(MIN_EASE, ease_factor)
-
-        interval_days = max(1, round(interval)) if rating > 0 else 0
-        next_review_date_obj = today + timedelta(days=interval_days)
-        next_review_date_str = next_review_date_obj.strftime(DATE_FORMAT)
-
-        card['interval'] = round(interval, 2)
-        card['ease_factor'] = round(ease_factor, 3)
-        card['next_review_date'] = next_review_date_str
-
-        self.updated_cards_data.append(card.copy())
-        self.cards_reviewed_count += 1
-
-        time_spent_on_card = time.time() - self.current_card_start_time
-        subject = card.get('topic', 'Unknown')
-        self.subject_times[subject] = self.subject_times.get(subject, 0) + time_spent_on_card
-
-        self.current_card_index += 1
         self._load_card()
 
     def _finish_quiz(self):
-        duration = time.time() - self.start_time
-        self.callback(self.updated_cards_data, self.cards_reviewed_count, duration, self.subject_times)
+        self.callback(*self.session.finish())
         self.destroy()
 
     def _on_close(self):
         if CTkMessagebox(title="Exit Quiz", message="Are you sure you want to exit the quiz? Progress on the current card will be lost, but previous reviews in this session will be saved.", option_1="Yes", option_2="No").get() == "Yes":
-            duration = time.time() - self.start_time
-            self.callback(self.updated_cards_data, self.cards_reviewed_count, duration, self.subject_times)
-            self.destroy()
\ No newline at end of file
+            self._finish_quiz()
\ No newline at end of file
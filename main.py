@@ -1,18 +1,21 @@
 import customtkinter as ctk
 from customtkinter import CTk, CTkFrame, CTkLabel, CTkButton, CTkEntry, CTkTabview
-from utils import get_current_datetime_str, TIME_FORMAT_DISPLAY, ensure_dir_exists, read_csv, write_csv
+from utils import get_current_datetime_str, TIME_FORMAT_DISPLAY, ensure_dir_exists
 from auth import LoginScreen, SignupScreen, AuthManager
-from notes import NotesTab
-from scheduling import SchedulingTab
-from flashcards import FlashcardsTab
-from progress import ProgressTab, log_study_session as log_flashcard_progress
+from workers import get_workers
 from CTkMessagebox import CTkMessagebox
 import sys
 import os
+import time
 
-# Constants for user data
-USERS_FILE = "data/users.csv"
-USER_HEADERS = ['username', 'password', 'role', 'linked_student']
+# --- Tab Loading ---
+LAZY_TABS = True  # Build a tab's content only when it is first selected
+TAB_PREFETCH_DELAY_MS = 1500  # After the first paint, build the other tabs in the background (None turns this off)
+TAB_PREFETCH_GAP_MS = 200  # Pause between prefetched tabs, so input is handled in between
+STARTUP_TIMING_ENV_VAR = "STUDYBUDDY_TIMING"  # Set to print the login-to-first-paint time
+# The tab modules (and matplotlib and numpy behind them) are imported by the
+# _make_*_tab factories when a tab is first built, so only the login screen's
+# imports are paid at startup. benchmarks/bench_startup.py checks this.
 
 class StudyBuddyApp(CTk):
     """Main application class for Study Buddy."""
@@ -29,6 +32,9 @@ class StudyBuddyApp(CTk):
         self.current_role = None
         self.linked_student = None  # For parent role
         self.current_theme = "light"  # Default theme
+        self.tab_factories = {}  # tab name -> (attribute, function building the tab's content)
+        self.prefetch_job = None
+        self.first_paint_seconds = None  # Login to first paint of the last login
 
         # Set CustomTkinter appearance mode (light/dark)
         ctk.set_appearance_mode("light")  # Start with light mode (blue-and-white)
@@ -75,6 +81,9 @@ class StudyBuddyApp(CTk):
         # Start clock update loop (will be visible once top_bar is packed)
         self._update_clock()
 
+        # Deliver background job results (workers.py) on this, the Tk, thread
+        get_workers().attach(self)
+
     def _scale_button_in(self, button):
         """Scale button up on hover."""
         button.configure(height=32)
@@ -87,10 +96,17 @@ class StudyBuddyApp(CTk):
         """Handle program exit with confirmation."""
         if CTkMessagebox(title="Confirm Exit", message="Are you sure you want to exit the program?\nAll unsaved changes will be lost.",
                          option_1="Yes", option_2="No").get() == "Yes":
+            get_workers().shutdown()
             sys.exit()
 
     def _clear_main_content(self):
         """Removes all widgets from the main content frame."""
+        self._cancel_tab_prefetch()
+        self.tab_factories = {}
+        self.schedule_tab = None
+        self.notes_tab = None
+        self.flashcards_tab = None
+        self.progress_tab = None
         for widget in self.main_content_frame.winfo_children():
             widget.destroy()
         # Hide top bar when logged out
@@ -114,17 +130,11 @@ class StudyBuddyApp(CTk):
         """Check if a student exists in users.csv."""
         if not student_id:
             return False
-        users = read_csv(USERS_FILE, USER_HEADERS)
-        return any(user['username'] == student_id and user['role'] == "student" for user in users)
+        return self.auth_manager.student_exists(student_id)
 
     def _update_linked_student(self, new_student_id):
         """Update the linked_student field for the current parent in users.csv."""
-        users = read_csv(USERS_FILE, USER_HEADERS)
-        for user in users:
-            if user['username'] == self.current_user:
-                user['linked_student'] = new_student_id
-                break
-        write_csv(USERS_FILE, users, USER_HEADERS)
+        self.auth_manager.update_linked_student(self.current_user, new_student_id)
         self.linked_student = new_student_id
 
     def _show_link_student_screen(self):
@@ -186,7 +196,8 @@ class StudyBuddyApp(CTk):
 
 
     def _post_login_setup(self, user_data):
-        """Sets up the main interface after successful login."""
+        """Sets up the main interface after successful login; only the selected tab is built straight away."""
+        login_time = time.perf_counter()
         self.current_user = user_data['username']
         self.current_role = user_data['role']
         self.linked_student = user_data.get('linked_student')  # Might be None or empty
@@ -207,37 +218,91 @@ class StudyBuddyApp(CTk):
         self.top_bar.pack(fill="x", side="top")
 
         # --- Tabbed Interface ---
-        self.notebook = CTkTabview(self.main_content_frame, corner_radius=10)
+        # Each tab's content (its widgets and the data it loads) is built on first selection
+        self.notebook = CTkTabview(self.main_content_frame, corner_radius=10, command=self._on_tab_selected)
 
         if self.current_role == "student":
-            # Add tabs for students
-            self.notebook.add("Scheduling")
-            self.notebook.add("Notes")
-            self.notebook.add("Flashcards")
-            self.notebook.add("Progress")
-
-            # Initialize tab content
-            self.schedule_tab = SchedulingTab(self.notebook.tab("Scheduling"), self.current_user)
-            self.notes_tab = NotesTab(self.notebook.tab("Notes"), self.current_user)
-            self.flashcards_tab = FlashcardsTab(self.notebook.tab("Flashcards"), self.current_user, log_flashcard_progress)
-            self.progress_tab = ProgressTab(self.notebook.tab("Progress"), self.current_user, self.current_role)
-
-            # Pack tab content
-            self.schedule_tab.pack(fill="both", expand=True, padx=10, pady=10)
-            self.notes_tab.pack(fill="both", expand=True, padx=10, pady=10)
-            self.flashcards_tab.pack(fill="both", expand=True, padx=10, pady=10)
-            self.progress_tab.pack(fill="both", expand=True, padx=10, pady=10)
-
+            # Tabs for students
+            self.tab_factories = {
+                "Scheduling": ('schedule_tab', self._make_scheduling_tab),
+                "Notes": ('notes_tab', self._make_notes_tab),
+                "Flashcards": ('flashcards_tab', self._make_flashcards_tab),
+                "Progress": ('progress_tab', self._make_progress_tab),
+            }
         elif self.current_role == "parent":
-            # Add only Progress tab for parents
-            self.notebook.add(f"Progress ({self.linked_student})")
-            self.progress_tab = ProgressTab(self.notebook.tab(f"Progress ({self.linked_student})"), self.current_user, self.current_role, self.linked_student)
-            self.progress_tab.pack(fill="both", expand=True, padx=10, pady=10)
+            # Only the Progress tab for parents
+            self.tab_factories = {
+                f"Progress ({self.linked_student})": ('progress_tab', self._make_progress_tab),
+            }
 
+        for tab_name in self.tab_factories:
+            self.notebook.add(tab_name)
         self.notebook.pack(pady=10, padx=10, fill="both", expand=True)
 
-        # Apply theme to initially loaded tabs
-        self._apply_theme_to_tabs()
+        if LAZY_TABS:
+            self._build_tab(self.notebook.get())
+        else:
+            for tab_name in self.tab_factories:
+                self._build_tab(tab_name)
+        self.after(0, self._record_first_paint, login_time)
+
+    # --- Tab Factories ---
+    def _make_scheduling_tab(self, parent):
+        from scheduling import SchedulingTab
+        return SchedulingTab(parent, self.current_user)
+
+    def _make_notes_tab(self, parent):
+        from notes import NotesTab
+        return NotesTab(parent, self.current_user)
+
+    def _make_flashcards_tab(self, parent):
+        from flashcards import FlashcardsTab
+        from progress import log_study_session as log_flashcard_progress
+        return FlashcardsTab(parent, self.current_user, log_flashcard_progress)
+
+    def _make_progress_tab(self, parent):
+        from progress import ProgressTab
+        linked_student = self.linked_student if self.current_role == "parent" else None
+        return ProgressTab(parent, self.current_user, self.current_role, linked_student,
+                           self._student_exists, self._update_linked_student)
+
+    def _build_tab(self, tab_name):
+        """Builds a tab's content unless it already exists."""
+        if tab_name not in self.tab_factories:
+            return
+        attribute, build = self.tab_factories[tab_name]
+        if getattr(self, attribute, None) is not None:
+            return
+        tab = build(self.notebook.tab(tab_name))
+        tab.pack(fill="both", expand=True, padx=10, pady=10)
+        setattr(self, attribute, tab)
+        tab.apply_theme(self.current_theme)
+
+    def _on_tab_selected(self):
+        self._build_tab(self.notebook.get())
+
+    def _record_first_paint(self, login_time):
+        """Runs once the first tab has been laid out and drawn, then starts the prefetch."""
+        self.update_idletasks()
+        self.first_paint_seconds = time.perf_counter() - login_time
+        if os.environ.get(STARTUP_TIMING_ENV_VAR):
+            print(f"Login to first paint: {self.first_paint_seconds * 1000:.0f} ms")
+        if LAZY_TABS and TAB_PREFETCH_DELAY_MS is not None:
+            self.prefetch_job = self.after(TAB_PREFETCH_DELAY_MS, self._prefetch_next_tab)
+
+    def _prefetch_next_tab(self):
+        """Builds the next unbuilt tab, one per call, until every tab exists."""
+        self.prefetch_job = None
+        for tab_name, (attribute, _) in self.tab_factories.items():
+            if getattr(self, attribute, None) is None:
+                self._build_tab(tab_name)
+                self.prefetch_job = self.after(TAB_PREFETCH_GAP_MS, self._prefetch_next_tab)
+                return
+
+    def _cancel_tab_prefetch(self):
+        if self.prefetch_job is not None:
+            self.after_cancel(self.prefetch_job)
+            self.prefetch_job = None
 
     def _logout(self):
         """Logs the current user out and returns to the login screen."""
@@ -245,12 +310,7 @@ class StudyBuddyApp(CTk):
             self.current_user = None
             self.current_role = None
             self.linked_student = None
-            # Destroy specific tab references
-            self.schedule_tab = None
-            self.notes_tab = None
-            self.flashcards_tab = None
-            self.progress_tab = None
-            self._show_login_screen()
+            self._show_login_screen()  # Also cancels any tab prefetch and drops the tab references
 
     def _update_clock(self):
         """Updates the clock label every second."""
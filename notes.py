@@ -1,15 +1,14 @@
 import customtkinter as ctk
 from customtkinter import CTkFrame, CTkLabel, CTkEntry, CTkButton, CTkTextbox, CTkScrollableFrame, CTkProgressBar
-from utils import (get_notes_dir, get_student_data_path, read_csv, write_csv,
-                   read_txt, write_txt, delete_file, get_current_datetime_str,
-                   DATETIME_FORMAT, validate_not_empty)
+from utils import (get_notes_dir, read_txt, write_txt, ensure_dir_exists,
+                   delete_file, get_current_datetime_str, DATETIME_FORMAT, validate_not_empty)
+from storage import get_storage
+from records import NoteMeta
+from workers import get_workers
 import os
 import random
 from CTkMessagebox import CTkMessagebox
 
-NOTES_METADATA_FILE = "notes_metadata.csv"
-NOTES_METADATA_HEADERS = ['title', 'last_modified', 'file_path', 'student_id', 'subject']
-
 # Note-Taking Tips
 NOTE_TAKING_TIPS = [
     "Use bullet points to organize your thoughts clearly!",
@@ -19,16 +18,19 @@ NOTE_TAKING_TIPS = [
     "Review your notes within 24 hours to improve retention!"
 ]
 
+NOTE_BACKGROUND_READ_BYTES = 256 * 1024  # Notes at least this large are read on an I/O worker
+
 class NotesTab(CTkFrame):
     """GUI Frame for managing notes."""
     def __init__(self, parent, username):
         super().__init__(parent, corner_radius=15, fg_color=("#e6f0ff", "#1a2a44"))
         self.username = username
         self.notes_dir = get_notes_dir(self.username)
-        self.metadata_file_path = get_student_data_path(self.username, NOTES_METADATA_FILE)
+        self.repository = get_storage().notes_metadata(self.username)
         self.notes_metadata = []
         self.current_note_title = None
         self.selected_note_index = -1
+        self.note_loading = False  # True while the selected note's text is being read
         self.note_buttons = []
 
         # Inner frame for shadow effect
@@ -154,7 +156,7 @@ class NotesTab(CTkFrame):
         self.save_button.bind("<Enter>", lambda event: self._scale_button_in(self.save_button))
         self.save_button.bind("<Leave>", lambda event: self._scale_button_out(self.save_button))
 
-        self.progress_bar = CTkProgressBar(self.save_frame, mode="indeterminate", width=200)
+        self.progress_bar = CTkProgressBar(self.save_frame, mode="determinate", width=200)
         self.progress_bar.pack_forget()
         self.save_frame.pack(pady=5)
 
@@ -186,14 +188,11 @@ class NotesTab(CTkFrame):
         return os.path.join(self.notes_dir, safe_filename)
 
     def _load_metadata(self):
-        self.notes_metadata = read_csv(self.metadata_file_path, NOTES_METADATA_HEADERS)
-        self.notes_metadata.sort(key=lambda x: x.get('last_modified', '0000-00-00 00:00'), reverse=True)
+        self.notes_metadata = self.repository.list_all()
+        self.notes_metadata.sort(key=NoteMeta.sort_key, reverse=True)
         self._populate_listbox()
         self._clear_content_area()
 
-    def _save_metadata(self):
-        write_csv(self.metadata_file_path, self.notes_metadata, NOTES_METADATA_HEADERS)
-
     def _populate_listbox(self):
         for widget in self.notes_scroll.winfo_children():
             widget.destroy()
@@ -203,11 +202,11 @@ class NotesTab(CTkFrame):
         search_query = self.search_entry.get().strip().lower()
         filtered_notes = [
             meta for meta in self.notes_metadata
-            if search_query in meta.get('title', 'Untitled').lower()
+            if search_query in meta.title.lower()
         ]
 
         for i, meta in enumerate(filtered_notes):
-            title = meta.get('title', 'Untitled')
+            title = meta.title or 'Untitled'
             btn = CTkButton(
                 self.notes_scroll,
                 text=f"📝 {title}",
@@ -226,7 +225,7 @@ class NotesTab(CTkFrame):
 
         if self.current_note_title:
             for i, meta in enumerate(filtered_notes):
-                if meta.get('title') == self.current_note_title:
+                if meta.title == self.current_note_title:
                     self._select_note(i)
                     break
 
@@ -247,14 +246,14 @@ class NotesTab(CTkFrame):
         search_query = self.search_entry.get().strip().lower()
         filtered_notes = [
             meta for meta in self.notes_metadata
-            if search_query in meta.get('title', 'Untitled').lower()
+            if search_query in meta.title.lower()
         ]
 
         selected_meta = filtered_notes[index]
-        self.current_note_title = selected_meta.get('title')
-        file_path = selected_meta.get('file_path')
-        subject = selected_meta.get('subject', 'N/A')
-        last_modified = selected_meta.get('last_modified', 'N/A')
+        self.current_note_title = selected_meta.title
+        file_path = selected_meta.file_path
+        subject = selected_meta.subject or 'N/A'
+        last_modified = selected_meta.last_modified or 'N/A'
 
         self.title_label.configure(text=self.current_note_title)
         self.subject_label.configure(text=subject)
@@ -262,23 +261,40 @@ class NotesTab(CTkFrame):
 
         self.note_content_text.configure(state="normal")
         self.note_content_text.delete("1.0", "end")
-        if file_path and os.path.exists(file_path):
-            content = read_txt(file_path)
-            self.note_content_text.insert("1.0", content)
+        if file_path and os.path.exists(file_path) and os.path.getsize(file_path) < NOTE_BACKGROUND_READ_BYTES:
+            self.note_loading = False
+            self.note_content_text.insert("1.0", read_txt(file_path))
+        elif file_path and os.path.exists(file_path):
+            # Large notes are read on an I/O worker; the text is filled in when it arrives
+            self.note_content_text.insert("1.0", "Loading...")
+            self.note_content_text.configure(state="disabled")
+            self.note_loading = True
+            get_workers().run_io(read_txt, file_path, on_done=lambda content: self._show_note_content(selected_meta.title, content))
         else:
+            self.note_loading = False
             self.note_content_text.insert("1.0", f"[Error: Note file not found at {file_path}]")
             print(f"Warning: Note file not found: {file_path} for title '{self.current_note_title}'")
         self._fade_in_content()
 
+    def _show_note_content(self, title, content):
+        if title != self.current_note_title:
+            return  # Another note was selected while this one was loading
+        self.note_loading = False
+        self.note_content_text.configure(state="normal")
+        self.note_content_text.delete("1.0", "end")
+        self.note_content_text.insert("1.0", content)
+
     def _clear_content_area(self):
         self.current_note_title = None
         self.selected_note_index = -1
+        self.note_loading = False
         for btn in self.note_buttons:
             idx = self.note_buttons.index(btn)
             btn.configure(fg_color=("gray90", "gray20") if idx % 2 == 0 else ("gray80", "gray30"))
         self.title_label.configure(text="")
         self.subject_label.configure(text="")
         self.last_modified_label.configure(text="")
+        self.note_content_text.configure(state="normal")
         self.note_content_text.delete("1.0", "end")
         self.note_content_text.configure(state="disabled")
 
@@ -291,7 +307,7 @@ class NotesTab(CTkFrame):
 
             return
 
-        if any(meta.get('title', '').lower() == title.strip().lower() for meta in self.notes_metadata):
+        if any(meta.title.lower() == title.strip().lower() for meta in self.notes_metadata):
             CTkMessagebox(title="Error", message=f"A note with the title '{title}' already exists.", icon="cancel")
 
             return
@@ -307,23 +323,18 @@ class NotesTab(CTkFrame):
         file_path = self._get_note_filepath(title)
         timestamp = get_current_datetime_str()
 
-        new_meta = {
-            'title': title.strip(),
-            'subject': subject.strip(),
-            'last_modified': timestamp,
-            'file_path': file_path,
-            'student_id': self.username
-        }
+        new_meta = NoteMeta(title.strip(), subject.strip(), file_path)
+        new_meta.set_last_modified(timestamp)
 
         write_txt(file_path, f"# {title.strip()}\n\nSubject: {subject.strip()}\n\n")
 
         self.notes_metadata.append(new_meta)
-        self.notes_metadata.sort(key=lambda x: x.get('last_modified', '0000-00-00 00:00'), reverse=True)
-        self._save_metadata()
+        self.notes_metadata.sort(key=NoteMeta.sort_key, reverse=True)
+        self.repository.upsert(new_meta)
         self._populate_listbox()
 
         for i, meta in enumerate(self.notes_metadata):
-            if meta.get('title') == title.strip():
+            if meta.title == title.strip():
                 self._select_note(i)
                 break
 
@@ -332,39 +343,59 @@ class NotesTab(CTkFrame):
             CTkMessagebox(title="Save Error", message="No note selected to save.", icon="warning").get()
 
             return
+        if self.note_loading:
+            CTkMessagebox(title="Save Error", message="The note is still loading.", icon="warning").get()
 
-        self.save_button.pack_forget()
-        self.progress_bar.pack(pady=10)
-        self.progress_bar.start()
-
-        self.after(1000, self._complete_save)
+            return
 
-    def _complete_save(self):
         current_meta = self.notes_metadata[self.selected_note_index]
-        if current_meta.get('title') != self.current_note_title:
+        if current_meta.title != self.current_note_title:
             CTkMessagebox(title="Save Error", message=f"Metadata mismatch for '{self.current_note_title}'.", icon="cancel").get()
-            self.progress_bar.stop()
-            self.progress_bar.pack_forget()
-            self.save_button.pack(pady=10)
 
             return
 
         content = self.note_content_text.get("1.0", "end").strip()
-        file_path = current_meta.get('file_path')
         timestamp = get_current_datetime_str()
+        saved_meta = NoteMeta(current_meta.title, current_meta.subject, current_meta.file_path)
+        saved_meta.set_last_modified(timestamp)
 
-        write_txt(file_path, content)
-
-        self.notes_metadata[self.selected_note_index]['last_modified'] = timestamp
-        self.last_modified_label.configure(text=timestamp)
-        self.notes_metadata.sort(key=lambda x: x.get('last_modified', '0000-00-00 00:00'), reverse=True)
+        self.save_button.pack_forget()
+        self.progress_bar.set(0)
+        self.progress_bar.pack(pady=10)
+        get_workers().run_io(self._write_note, saved_meta, content,
+                             on_done=lambda _: self._complete_save(current_meta, timestamp),
+                             on_error=self._save_failed,
+                             on_progress=self.progress_bar.set)
+
+    def _write_note(self, saved_meta, content, progress):
+        """Runs on an I/O worker: writes the note file, then its metadata.
+
+        Written directly rather than through write_txt, which reports and
+        swallows errors: a failure must reach on_error, not a success message.
+        """
+        ensure_dir_exists(os.path.dirname(saved_meta.file_path))
+        with open(saved_meta.file_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        progress(0.5)
+        self.repository.upsert(saved_meta)
+        progress(1.0)
+
+    def _complete_save(self, current_meta, timestamp):
+        current_meta.set_last_modified(timestamp)
+        if current_meta.title == self.current_note_title:
+            self.last_modified_label.configure(text=timestamp)
+        self.notes_metadata.sort(key=NoteMeta.sort_key, reverse=True)
         self._populate_listbox()
 
-        self.progress_bar.stop()
         self.progress_bar.pack_forget()
         self.save_button.pack(pady=10)
 
-        CTkMessagebox(title="Save Success", message=f"Note '{self.current_note_title}' saved successfully.", icon="check").get()
+        CTkMessagebox(title="Save Success", message=f"Note '{current_meta.title}' saved successfully.", icon="check").get()
+
+    def _save_failed(self, error):
+        self.progress_bar.pack_forget()
+        self.save_button.pack(pady=10)
+        CTkMessagebox(title="Save Error", message=f"Could not save the note: {error}", icon="cancel").get()
 
     def _delete_note(self):
         if self.selected_note_index == -1:
@@ -372,15 +403,15 @@ class NotesTab(CTkFrame):
 
             return
 
-        selected_title = self.notes_metadata[self.selected_note_index].get('title')
+        selected_title = self.notes_metadata[self.selected_note_index].title
 
         if CTkMessagebox(title="Confirm Delete", message=f"Are you sure you want to permanently delete the note '{selected_title}'?", option_1="Yes", option_2="No").get() == "Yes":
             meta_to_delete = self.notes_metadata[self.selected_note_index]
-            file_path = meta_to_delete.get('file_path')
+            file_path = meta_to_delete.file_path
             if file_path:
                 delete_file(file_path)
             del self.notes_metadata[self.selected_note_index]
-            self._save_metadata()
+            self.repository.delete(selected_title)
             self._populate_listbox()
             self._clear_content_area()
             CTkMessagebox(title="Delete Success", message=f"Note '{selected_title}' deleted.", icon="check").get()
@@ -1,23 +1,14 @@
 import customtkinter as ctk
 from customtkinter import CTkFrame, CTkLabel, CTkOptionMenu, CTkProgressBar, CTkEntry, CTkButton
-from utils import (get_student_data_path, read_csv, write_csv,
-                   DATE_FORMAT, get_current_date_str, parse_date_str)
-import os
+from utils import (DATE_FORMAT, get_current_date_str, parse_date_str, load_pyplot)
+from storage import get_storage
+from deck_index import DeckColumns
+from workers import get_workers
 from collections import defaultdict
-from datetime import datetime
-import matplotlib
-matplotlib.use("TkAgg")
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from datetime import date, datetime, timedelta
 from CTkMessagebox import CTkMessagebox
 import random
 
-# Constants
-PROGRESS_FILE = "progress.csv"
-PROGRESS_HEADERS = ['date', 'subject', 'study_hours', 'cards_reviewed', 'student_id']
-USERS_FILE = "data/users.csv"
-USER_HEADERS = ['username', 'password', 'role', 'linked_student']
-
 # Progress Tips
 PROGRESS_TIPS = [
     "Track your progress daily to stay motivated!",
@@ -27,13 +18,18 @@ PROGRESS_TIPS = [
     "Mix subjects to keep your study sessions engaging!"
 ]
 
+# Chart views
+CHART_VIEWS = ["Study Hours", "Review Forecast"]
+FORECAST_DAYS = 14
+
 def create_matplotlib_chart(parent_frame, data_dict, title, xlabel, ylabel, theme="light"):
     """Creates a Matplotlib bar chart and embeds it into the parent frame."""
     for widget in parent_frame.winfo_children():
-        if isinstance(widget, CTkLabel) and widget.cget("text") == "Study Hours per Subject":
+        if isinstance(widget, (CTkLabel, CTkProgressBar)):  # Keep the section title and the loading bar
             continue
         widget.destroy()
 
+    plt, FigureCanvasTkAgg = load_pyplot()
     fig, ax = plt.subplots(figsize=(6, 4))
     
     # Enhanced theme-specific styling
@@ -87,32 +83,23 @@ def create_matplotlib_chart(parent_frame, data_dict, title, xlabel, ylabel, them
 
     return canvas
 
-# Helper functions (assumed to be in utils.py or auth.py)
-def student_exists(student_id):
-    """Check if a student exists in users.csv."""
-    if not student_id:
-        return False
-    users = read_csv(USERS_FILE, USER_HEADERS)
-    return any(user['username'] == student_id and user['role'] == "student" for user in users)
-
-def update_linked_student(parent_username, new_student_id):
-    """Update the linked_student field for a parent in users.csv."""
-    users = read_csv(USERS_FILE, USER_HEADERS)
-    for user in users:
-        if user['username'] == parent_username:
-            user['linked_student'] = new_student_id
-            break
-    write_csv(USERS_FILE, users, USER_HEADERS)
-
 class ProgressTab(CTkFrame):
-    """GUI Frame for displaying study progress."""
-    def __init__(self, parent, username, role, linked_student=None):
+    """GUI Frame for displaying study progress.
+
+    student_exists(student_id) and link_student(student_id) are the app's
+    account lookups, so relinking goes through its in-memory user index.
+    """
+    def __init__(self, parent, username, role, linked_student, student_exists, link_student):
         super().__init__(parent, corner_radius=15, fg_color=("#e6f0ff", "#1a2a44"))
         self.current_user_role = role
         self.current_username = username  # Store the parent's username
+        self.student_exists = student_exists
+        self.link_student = link_student
         self.student_username = linked_student if role == "parent" else username
         self.is_read_only = (role == "parent")
-        self.progress_file_path = get_student_data_path(self.student_username, PROGRESS_FILE)
+        self.display_generation = 0  # Bumped per refresh, so results of a superseded refresh are dropped
+        self.display_results = {}
+        self.chart_theme = None  # Appearance mode the chart was last drawn in
 
         # Inner frame for shadow effect
         self.inner_frame = CTkFrame(self, corner_radius=15, fg_color=("#ffffff", "#2b2b2b"),
@@ -132,7 +119,7 @@ class ProgressTab(CTkFrame):
 
         # Check if the linked student exists (for parents only)
         self.link_frame = None
-        if self.is_read_only and not student_exists(self.student_username):
+        if self.is_read_only and not self.student_exists(self.student_username):
             self._show_link_student_option()
         else:
             self._build_progress_ui()
@@ -175,16 +162,15 @@ class ProgressTab(CTkFrame):
             CTkMessagebox(title="Error", message="Student username cannot be empty.", icon="cancel").get()
             return
 
-        if not student_exists(new_student_id):
+        if not self.student_exists(new_student_id):
             CTkMessagebox(title="Error", message=f"Student '{new_student_id}' does not exist.", icon="cancel").get()
             return
 
         # Update the linked_student field in users.csv
-        update_linked_student(self.current_username, new_student_id)
+        self.link_student(new_student_id)
 
         # Update the internal state
         self.student_username = new_student_id
-        self.progress_file_path = get_student_data_path(self.student_username, PROGRESS_FILE)
 
         # Rebuild the progress UI
         self._build_progress_ui()
@@ -249,6 +235,26 @@ class ProgressTab(CTkFrame):
         self.subject_filter_menu.bind("<Enter>", lambda event: self._scale_menu_in(self.subject_filter_menu))
         self.subject_filter_menu.bind("<Leave>", lambda event: self._scale_menu_out(self.subject_filter_menu))
 
+        CTkLabel(filter_frame, text="📈 Chart:", width=60, anchor="w",
+                 font=("Helvetica", 12)).pack(side="left", padx=(20, 5))
+        self.chart_view_var = ctk.StringVar(value=CHART_VIEWS[0])
+        self.chart_view_menu = CTkOptionMenu(
+            filter_frame,
+            variable=self.chart_view_var,
+            values=CHART_VIEWS,
+            command=self._redraw_chart,
+            width=160,
+            corner_radius=8,
+            fg_color=("#1f77b4", "#4a90e2"),
+            button_color=("#165a92", "#357abd"),
+            button_hover_color=("#0f4a7b", "#2a6aa3"),
+            text_color=("white", "white"),
+            font=("Helvetica", 12)
+        )
+        self.chart_view_menu.pack(side="left", padx=5)
+        self.chart_view_menu.bind("<Enter>", lambda event: self._scale_menu_in(self.chart_view_menu))
+        self.chart_view_menu.bind("<Leave>", lambda event: self._scale_menu_out(self.chart_view_menu))
+
         # --- Metrics Display Frame ---
         self.metrics_frame = CTkFrame(self.inner_frame, corner_radius=10, fg_color=("#f5f5f5", "#333333"))
         self.metrics_frame.pack(pady=10, padx=10, fill="x")
@@ -263,16 +269,18 @@ class ProgressTab(CTkFrame):
         self.hours_per_subject_label = CTkLabel(self.metrics_frame, text="📊 Hours per Subject: N/A", anchor="w",
                                                 font=("Helvetica", 12))
         self.hours_per_subject_label.pack(anchor="w", pady=2)
+        self.deck_stats_label = CTkLabel(self.metrics_frame, text="🗂️ Flashcard Deck: N/A", anchor="w",
+                                         font=("Helvetica", 12))
+        self.deck_stats_label.pack(anchor="w", pady=2)
 
         # --- Chart Display Frame ---
         self.chart_frame = CTkFrame(self.inner_frame, corner_radius=10, fg_color=("#f5f5f5", "#333333"))
         self.chart_frame.pack(pady=10, padx=10, fill="both", expand=True)
-        CTkLabel(self.chart_frame, text="Study Hours per Subject", font=("Helvetica", 14, "bold")).pack(anchor="w", pady=5)
+        self.chart_title_label = CTkLabel(self.chart_frame, text="Study Hours per Subject", font=("Helvetica", 14, "bold"))
+        self.chart_title_label.pack(anchor="w", pady=5)
 
         # Progress Bar for Chart Loading
-        self.chart_progress_bar = CTkProgressBar(self.chart_frame, mode="indeterminate", width=200)
-        self.chart_progress_bar.pack(pady=10)
-        self.chart_progress_bar.start()
+        self.chart_progress_bar = CTkProgressBar(self.chart_frame, mode="determinate", width=200)
         self.chart_canvas = None
 
         # Load and display initial data
@@ -305,51 +313,45 @@ class ProgressTab(CTkFrame):
         """Simulates a fade-in effect for metrics by ensuring visibility."""
         self.metrics_frame.pack(pady=10, padx=10, fill="x")
 
-    def _load_progress_data(self):
-        if not os.path.exists(self.progress_file_path):
-            write_csv(self.progress_file_path, [], PROGRESS_HEADERS)
-        return read_csv(self.progress_file_path, PROGRESS_HEADERS)
-
-    def _calculate_metrics(self, progress_data, subject_filter="All"):
-        total_hours = 0.0
-        total_cards = 0
-        hours_by_subject = defaultdict(float)
-        subjects = set(["All"])
-
-        for entry in progress_data:
-            try:
-                subject = entry.get('subject', 'Unknown')
-                subjects.add(subject)
-
-                if subject_filter == "All" or subject == subject_filter:
-                    hours = float(entry.get('study_hours', 0))
-                    cards = int(entry.get('cards_reviewed', 0))
-
-                    total_hours += hours
-                    total_cards += cards
-                    hours_by_subject[subject] += hours
-
-            except (ValueError, TypeError) as e:
-                print(f"Warning: Skipping invalid progress entry: {entry}. Error: {e}")
-                continue
-
-        return {
-            "total_hours": total_hours,
-            "total_cards": total_cards,
-            "hours_by_subject": dict(hours_by_subject),
-            "all_subjects": sorted(list(subjects))
-        }
-
     def _update_display(self, event=None):
-        progress_data = self._load_progress_data()
-        current_filter = self.subject_filter_var.get()
+        """Refreshes metrics and chart; the data is read and aggregated off the Tk thread."""
+        self.display_generation += 1
+        generation = self.display_generation
+        self.display_results = {}
+        self.chart_progress_bar.set(0)
+        self.chart_progress_bar.pack(pady=10)
 
-        metrics = self._calculate_metrics(progress_data, current_filter)
+        workers = get_workers()
+        workers.run_io(summarize_sized, summarize_progress, self.student_username, self.subject_filter_var.get(),
+                       on_done=lambda summary: self._on_summary(generation, 'progress', summary),
+                       on_error=self._on_summary_error)
+        workers.run_io(summarize_sized, summarize_deck, self.student_username, FORECAST_DAYS, date.today().toordinal(),
+                       on_done=lambda summary: self._on_summary(generation, 'deck', summary),
+                       on_error=self._on_summary_error)
+
+    def _redraw_chart(self, event=None):
+        """Redraws the chart from the last summaries (a chart view or theme change); nothing is read again."""
+        if len(self.display_results) == DISPLAY_SUMMARIES:
+            self._complete_chart_update(self.display_results['progress'], self.display_results['deck'])
+
+    def _on_summary(self, generation, name, summary):
+        if generation != self.display_generation:
+            return
+        self.display_results[name] = summary
+        self.chart_progress_bar.set(len(self.display_results) / DISPLAY_SUMMARIES)
+        if len(self.display_results) == DISPLAY_SUMMARIES:
+            self._show_metrics(self.display_results['progress'], self.display_results['deck'])
+            self._complete_chart_update(self.display_results['progress'], self.display_results['deck'])
+
+    def _on_summary_error(self, error):
+        print(f"Warning: Could not load progress for {self.student_username}: {error!r}")
+        self.chart_progress_bar.pack_forget()
 
+    def _show_metrics(self, metrics, deck_summary):
+        current_filter = metrics["subject_filter"]
         self.subject_filter_menu.configure(values=metrics["all_subjects"])
-        if current_filter not in metrics["all_subjects"]:
-            self.subject_filter_var.set("All")
-            metrics = self._calculate_metrics(progress_data, "All")
+        if self.subject_filter_var.get() != current_filter:
+            self.subject_filter_var.set(current_filter)
 
         # Update metrics with icons
         self.total_hours_label.configure(text=f"⏰ Total Study Hours ({current_filter}): {metrics['total_hours']:.2f}")
@@ -361,65 +363,116 @@ class ProgressTab(CTkFrame):
         else:
             self.hours_per_subject_label.configure(text="")
 
-        self._fade_in_metrics()
-
-        # Update chart with a progress bar animation
-        self.chart_progress_bar.pack(pady=10)
-        self.chart_progress_bar.start()
-        self.after(1000, self._complete_chart_update, progress_data)
+        stats = deck_summary["stats"]
+        self.deck_stats_label.configure(
+            text=f"🗂️ Flashcard Deck: {stats['cards']} cards, {stats['due']} due ({stats['overdue']} overdue), "
+                 f"{stats['new']} new, {stats['mature']} mature, average ease {stats['average_ease']:.2f}")
 
-    def _complete_chart_update(self, progress_data):
-        current_filter = self.subject_filter_var.get()
-        chart_metrics = self._calculate_metrics(progress_data, "All")
-        
+        self._fade_in_metrics()
 
+    def _complete_chart_update(self, metrics, deck_summary):
         theme = ctk.get_appearance_mode().lower()
-        self.chart_canvas = create_matplotlib_chart(
-            parent_frame=self.chart_frame,
-            data_dict=chart_metrics['hours_by_subject'],
-            title="Total Study Hours per Subject",
-            xlabel="Subject",
-            ylabel="Total Hours",
-            theme=theme
-        )
+        self.chart_theme = theme
+
+        if self.chart_view_var.get() == "Review Forecast":
+            self.chart_title_label.configure(text="Flashcard Review Forecast")
+            self.chart_canvas = create_matplotlib_chart(
+                parent_frame=self.chart_frame,
+                data_dict=deck_summary["forecast"],
+                title=f"Reviews Due (next {FORECAST_DAYS} days)",
+                xlabel="Day",
+                ylabel="Cards Due",
+                theme=theme
+            )
+        else:
+            self.chart_title_label.configure(text="Study Hours per Subject")
+            self.chart_canvas = create_matplotlib_chart(
+                parent_frame=self.chart_frame,
+                data_dict=metrics['chart_hours'],
+                title="Total Study Hours per Subject",
+                xlabel="Subject",
+                ylabel="Total Hours",
+                theme=theme
+            )
 
-        self.chart_progress_bar.stop()
         self.chart_progress_bar.pack_forget()
 
     def apply_theme(self, theme):
-        self._update_display()
+        # A refresh still running draws in the new theme when it completes
+        if ctk.get_appearance_mode().lower() != self.chart_theme:
+            self._redraw_chart()
+
+# --- Background Aggregation ---
+# These run on an I/O thread, or in the worker process pool (workers.py) when
+# the student's data is large. Each reads the data itself and returns only a
+# small summary.
+DISPLAY_SUMMARIES = 2  # summarize_progress and summarize_deck
+# Measured: at 20k progress and flashcard rows each summary takes ~100 ms, about what
+# starting a pool worker (re-importing numpy and customtkinter) costs; below that, inline wins
+CPU_SUMMARY_MIN_ROWS = 20000
+
+def summarize_sized(summarize, username, *args):
+    """Runs on an I/O thread: sizes the student's data there (never on the Tk thread), then
+    aggregates it in place, or in the process pool once it reaches CPU_SUMMARY_MIN_ROWS."""
+    storage = get_storage()
+    rows = storage.progress(username).count() + storage.flashcards(username).count()
+    if rows < CPU_SUMMARY_MIN_ROWS:
+        return summarize(username, *args)
+    return get_workers().run_cpu(summarize, username, *args).result()
+
+def calculate_metrics(progress_data, subject_filter="All"):
+    total_hours = 0.0
+    total_cards = 0
+    hours_by_subject = defaultdict(float)
+    subjects = set(["All"])
+
+    # ProgressEntry records arrive typed; totals that did not parse are None
+    for entry in progress_data:
+        subject = entry.subject
+        subjects.add(subject)
+
+        if subject_filter == "All" or subject == subject_filter:
+            if entry.study_hours is None or entry.cards_reviewed is None:
+                print(f"Warning: Skipping invalid progress entry: {entry}.")
+                continue
+            total_hours += entry.study_hours
+            total_cards += entry.cards_reviewed
+            hours_by_subject[subject] += entry.study_hours
+
+    return {
+        "total_hours": total_hours,
+        "total_cards": total_cards,
+        "hours_by_subject": dict(hours_by_subject),
+        "all_subjects": sorted(list(subjects))
+    }
+
+def summarize_progress(username, subject_filter):
+    """Returns the metrics for subject_filter ("All" if that subject is gone) plus the all-subject hours for the chart."""
+    progress_data = get_storage().progress(username).list_all()
+    metrics = calculate_metrics(progress_data, subject_filter)
+    if subject_filter not in metrics["all_subjects"]:
+        subject_filter = "All"
+        metrics = calculate_metrics(progress_data, subject_filter)
+    metrics["subject_filter"] = subject_filter
+    metrics["chart_hours"] = (metrics["hours_by_subject"] if subject_filter == "All"
+                              else calculate_metrics(progress_data, "All")["hours_by_subject"])
+    return metrics
+
+def summarize_deck(username, forecast_days, today_ordinal):
+    """Returns deck statistics and {day label: projected reviews} over the next forecast_days days."""
+    # Only the scheduling columns are read; the deck's question and answer text is never parsed here
+    deck_columns = DeckColumns.load(get_storage().flashcards(username))
+    today = date.fromordinal(today_ordinal)
+    counts = deck_columns.forecast(forecast_days, today=today)
+    return {
+        "stats": deck_columns.statistics(today),
+        "forecast": {(today + timedelta(days=offset)).strftime("%a %d"): count for offset, count in enumerate(counts)}
+    }
 
 def log_study_session(username, subject, hours, cards, log_date=None):
     if not username: return
     if hours <= 0 and cards <= 0: return
 
-    file_path = get_student_data_path(username, PROGRESS_FILE)
-    headers = PROGRESS_HEADERS
     today_str = log_date if log_date and parse_date_str(log_date) else get_current_date_str()
-
-    progress_data = read_csv(file_path, headers)
-
-    updated = False
-    for entry in progress_data:
-        if entry.get('date') == today_str and entry.get('subject') == subject and entry.get('student_id') == username:
-            try:
-                entry['study_hours'] = str(float(entry.get('study_hours', 0)) + hours)
-                entry['cards_reviewed'] = str(int(entry.get('cards_reviewed', 0)) + cards)
-                updated = True
-                break
-            except (ValueError, TypeError):
-                print(f"Error updating progress entry: {entry}")
-                continue
-
-    if not updated:
-        new_entry = {
-            'date': today_str,
-            'subject': subject,
-            'study_hours': str(hours),
-            'cards_reviewed': str(cards),
-            'student_id': username
-        }
-        progress_data.append(new_entry)
-
-    write_csv(file_path, progress_data, headers)
-    print(f"Progress logged for {username}: {subject} - {hours:.2f} hrs, {cards} cards on {today_str}")
\ No newline at end of file
+    get_storage().progress(username).add_session(today_str, subject, hours, cards)
+    print(f"Progress logged for {username}: {subject} - {hours:.2f} hrs, {cards} cards on {today_str}")
@@ -0,0 +1,93 @@
+import time
+from collections import deque
+from datetime import date
+from scheduler import schedule_review, AGAIN
+
+class QuizSession:
+    """Headless state machine for one flashcard quiz.
+
+    Cards are served from a deque; a card rated "again" goes back to the end
+    of the queue so it is seen again before the session ends. Each rating
+    updates the Flashcard in place with the SM-2 scheduler. The optional
+    on_review hook receives (card, rating, previous_interval, previous_ease,
+    response_time) and load_balancer maps interval days to balanced ones.
+    Time and date can be injected so sessions can be simulated without a display.
+    """
+    def __init__(self, cards, on_review=None, load_balancer=None, requeue_failed=True, clock=time.time, today=None):
+        self.queue = deque(cards)
+        self.on_review = on_review
+        self.load_balancer = load_balancer
+        self.requeue_failed = requeue_failed
+        self.clock = clock
+        self.today = today
+        self.current_card = None
+        self.revealed = False
+        self.position = 0  # How many cards have been shown, counting repeats
+        self.cards_reviewed_count = 0
+        self.subject_times = {}
+        self.updated_cards = {}  # card id -> copy after its latest rating
+        self.start_time = clock()
+        self.card_start_time = self.start_time
+
+    @property
+    def total(self):
+        """Cards shown so far plus cards still waiting (grows when a card is re-queued)."""
+        return self.position + len(self.queue)
+
+    @property
+    def is_finished(self):
+        return self.current_card is None and not self.queue
+
+    def next_card(self):
+        """Returns the card to show, or None once the queue is empty."""
+        if self.current_card is None:
+            if not self.queue:
+                return None
+            self.current_card = self.queue.popleft()
+            self.position += 1
+            self.revealed = False
+            self.card_start_time = self.clock()
+        return self.current_card
+
+    def reveal(self):
+        """Marks the current card's answer as shown and returns the card."""
+        if self.current_card is not None:
+            self.revealed = True
+        return self.current_card
+
+    def assess(self, rating):
+        """Applies a rating to the current card and returns the updated card (None if no card is showing)."""
+        card = self.current_card
+        if card is None:
+            return None
+
+        interval = card.interval
+        ease_factor = card.ease_factor
+        new_interval, new_ease, interval_days = schedule_review(interval, ease_factor, rating)
+        if self.load_balancer and interval_days > 0:
+            interval_days = self.load_balancer(interval_days)
+        today = self.today or date.today()
+        card.interval = new_interval
+        card.ease_factor = new_ease
+        card.due_ordinal = today.toordinal() + interval_days
+
+        self.updated_cards[card.id] = card.copy()
+        self.cards_reviewed_count += 1
+
+        time_spent_on_card = self.clock() - self.card_start_time
+        if self.on_review:
+            self.on_review(card, rating, interval, ease_factor, time_spent_on_card)
+        subject = card.topic
+        self.subject_times[subject] = self.subject_times.get(subject, 0) + time_spent_on_card
+
+        if rating == AGAIN and self.requeue_failed:
+            self.queue.append(card)
+        self.current_card = None
+        return card
+
+    def finish(self):
+        """Ends the session; returns (updated_cards, cards_reviewed_count, duration_seconds, subject_times)."""
+        self.current_card = None
+        self.queue.clear()
+        duration = self.clock() - self.start_time
+        return list(self.updated_cards.values()), self.cards_reviewed_count, duration, self.subject_times
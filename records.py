@@ -0,0 +1,451 @@
+import sys
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from utils import DATE_FORMAT
+
+INITIAL_EASE = 2.5  # SM-2 starting ease, re-exported by scheduler; kept here so storage loads without numpy
+
+# --- Field Conversion ---
+# Records are built once, where rows leave storage, and turned back into
+# string rows only when they are written. Dates are kept as proleptic
+# ordinals (date.toordinal()) and short repeated strings such as topics,
+# subjects and priorities are interned so a deck shares one copy of each.
+
+@lru_cache(maxsize=4096)
+def date_ordinal(date_str):
+    """Returns the ordinal of a YYYY-MM-DD string, or None if it does not parse (cached: decks share few dates)."""
+    try:
+        return datetime.strptime(date_str, DATE_FORMAT).toordinal()
+    except (ValueError, TypeError):
+        return None
+
+def ordinal_to_str(ordinal):
+    """Formats an ordinal back as YYYY-MM-DD ('' for None)."""
+    return date.fromordinal(ordinal).strftime(DATE_FORMAT) if ordinal is not None else ''
+
+def clock_minute(time_str):
+    """Returns the minute of the day of an HH:MM string, or None if it does not parse."""
+    try:
+        hours, minutes = time_str.split(':')
+        hours, minutes = int(hours), int(minutes)
+    except (ValueError, AttributeError):
+        return None
+    if 0 <= hours < 24 and 0 <= minutes < 60:
+        return hours * 60 + minutes
+    return None
+
+def minute_to_str(minute):
+    """Formats a minute of the day as HH:MM."""
+    return f"{minute // 60:02d}:{minute % 60:02d}"
+
+# Points in time are absolute minute keys (day ordinal * MINUTES_PER_DAY +
+# minute of the day), so comparing or measuring them is integer arithmetic.
+MINUTES_PER_DAY = 24 * 60
+
+def minute_key(moment):
+    """Returns the minute key of a datetime (seconds are dropped)."""
+    return moment.toordinal() * MINUTES_PER_DAY + moment.hour * 60 + moment.minute
+
+def key_to_datetime(key):
+    return datetime.fromordinal(key // MINUTES_PER_DAY) + timedelta(minutes=key % MINUTES_PER_DAY)
+
+def key_to_str(key):
+    """Formats a minute key as 'YYYY-MM-DD HH:MM'."""
+    return f"{ordinal_to_str(key // MINUTES_PER_DAY)} {minute_to_str(key % MINUTES_PER_DAY)}"
+
+def intern_text(value):
+    return sys.intern(str(value or '').strip())
+
+def parse_float(value, default):
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return default
+
+def parse_int(value, default):
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return default
+
+# --- Records ---
+class Flashcard:
+    """One flashcard with its SM-2 state; the next review date is an ordinal."""
+    __slots__ = ('id', 'question', 'answer', 'topic', 'interval', 'ease_factor', 'due_ordinal')
+
+    def __init__(self, card_id, question, answer, topic, interval=0.0, ease_factor=INITIAL_EASE, due_ordinal=None):
+        self.id = card_id
+        self.question = question
+        self.answer = answer
+        self.topic = intern_text(topic)
+        self.interval = interval
+        self.ease_factor = ease_factor
+        self.due_ordinal = due_ordinal if due_ordinal is not None else date.today().toordinal()
+
+    @classmethod
+    def from_row(cls, row):
+        """Builds a card from a stored row; bad numbers fall back to defaults and a bad date to today.
+
+        An id that does not parse becomes None rather than a shared default,
+        so the caller can give the card a fresh one (see FlashcardsTab).
+        """
+        return cls(
+            parse_int(row.get('id'), None),
+            row.get('question') or '',
+            row.get('answer') or '',
+            row.get('topic'),
+            parse_float(row.get('interval'), 0.0),
+            parse_float(row.get('ease_factor'), INITIAL_EASE),
+            date_ordinal(row.get('next_review_date'))
+        )
+
+    def to_row(self, student_id):
+        return {
+            'id': str(self.id),
+            'question': self.question,
+            'answer': self.answer,
+            'topic': self.topic,
+            'interval': str(self.interval),
+            'next_review_date': self.next_review_date,
+            'ease_factor': str(round(self.ease_factor, 3)),
+            'student_id': student_id
+        }
+
+    @property
+    def next_review_date(self):
+        return ordinal_to_str(self.due_ordinal)
+
+    def copy(self):
+        return Flashcard(self.id, self.question, self.answer, self.topic, self.interval, self.ease_factor, self.due_ordinal)
+
+    def __repr__(self):
+        return f"Flashcard({self.id!r}, {self.question!r}, topic={self.topic!r}, due={self.next_review_date})"
+
+class ScheduleItem:
+    """One study session: a day ordinal plus start and end minutes of that day.
+
+    A time that does not parse is kept verbatim in time_text, so rewriting
+    the file never loses it.
+    """
+    __slots__ = ('id', 'subject', 'topic', 'priority', 'day_ordinal', 'start_minute', 'end_minute', 'time_text')
+
+    def __init__(self, item_id, subject, topic, priority, day_ordinal=None, start_minute=None, end_minute=None, time_text=''):
+        self.id = item_id
+        self.subject = intern_text(subject)
+        self.topic = intern_text(topic)
+        self.priority = intern_text(priority)
+        self.day_ordinal = day_ordinal
+        self.start_minute = start_minute
+        self.end_minute = end_minute
+        self.time_text = time_text
+
+    @staticmethod
+    def parse_time(time_str):
+        """Splits 'YYYY-MM-DD HH:MM-HH:MM' into (day_ordinal, start_minute, end_minute), or None."""
+        try:
+            day_part, range_part = time_str.split(' ')
+            start_part, end_part = range_part.split('-')
+        except (ValueError, AttributeError):
+            return None
+        parsed = (date_ordinal(day_part), clock_minute(start_part), clock_minute(end_part))
+        return parsed if None not in parsed else None
+
+    @classmethod
+    def from_row(cls, row):
+        time_str = row.get('time') or ''
+        parsed = cls.parse_time(time_str)
+        if parsed is None:
+            return cls(parse_int(row.get('id'), 0), row.get('subject'), row.get('topic'), row.get('priority'), time_text=time_str)
+        return cls(parse_int(row.get('id'), 0), row.get('subject'), row.get('topic'), row.get('priority'), *parsed)
+
+    def to_row(self, student_id):
+        return {
+            'subject': self.subject,
+            'topic': self.topic,
+            'time': self.time,
+            'priority': self.priority,
+            'student_id': student_id,
+            'id': str(self.id)
+        }
+
+    @property
+    def start_key(self):
+        """Minute key of the start, or None if the time did not parse."""
+        return None if self.day_ordinal is None else self.day_ordinal * MINUTES_PER_DAY + self.start_minute
+
+    @property
+    def end_key(self):
+        return None if self.day_ordinal is None else self.day_ordinal * MINUTES_PER_DAY + self.end_minute
+
+    @property
+    def time(self):
+        """The session as 'YYYY-MM-DD HH:MM-HH:MM', as entered."""
+        if self.day_ordinal is None:
+            return self.time_text
+        return f"{ordinal_to_str(self.day_ordinal)} {minute_to_str(self.start_minute)}-{minute_to_str(self.end_minute)}"
+
+    def __repr__(self):
+        return f"ScheduleItem({self.id!r}, {self.subject!r}, {self.topic!r}, {self.time!r})"
+
+# --- Recurring Sessions ---
+REPEAT_DAILY = "daily"
+REPEAT_WEEKLY = "weekly"
+WEEKDAY_NAMES = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+
+def weekday_of(ordinal):
+    """Monday is 0, as date.weekday() (ordinal 1, 0001-01-01, was a Monday)."""
+    return (ordinal - 1) % 7
+
+def _days_on_weekday(first, stop, weekday):
+    """Counts the days in [first, stop) falling on weekday."""
+    residue = weekday + 1  # Ordinals on this weekday are congruent to it modulo 7
+    return (stop - residue + 6) // 7 - (first - residue + 6) // 7
+
+class ScheduleSeries:
+    """A recurring study session, stored once; its occurrences are generated per window and never stored.
+
+    Repeats daily, or weekly on a set of weekdays, from the first session's
+    day, ending on until_ordinal and/or after count sessions (with neither it
+    never ends). Exception days are skipped but still count towards count.
+    """
+    __slots__ = ('id', 'subject', 'topic', 'priority', 'first_ordinal', 'start_minute', 'end_minute',
+                 'frequency', 'weekdays', 'until_ordinal', 'count', 'exceptions', 'time_text')
+
+    def __init__(self, series_id, subject, topic, priority, first_ordinal, start_minute, end_minute,
+                 frequency=REPEAT_WEEKLY, weekdays=(), until_ordinal=None, count=None, exceptions=(), time_text=''):
+        self.id = series_id
+        self.subject = intern_text(subject)
+        self.topic = intern_text(topic)
+        self.priority = intern_text(priority)
+        self.first_ordinal = first_ordinal
+        self.start_minute = start_minute
+        self.end_minute = end_minute
+        self.frequency = frequency if frequency in (REPEAT_DAILY, REPEAT_WEEKLY) else REPEAT_WEEKLY
+        self.weekdays = frozenset(weekdays)
+        if self.frequency == REPEAT_WEEKLY and not self.weekdays and first_ordinal is not None:
+            self.weekdays = frozenset([weekday_of(first_ordinal)])  # Weekly on the first session's weekday
+        self.until_ordinal = until_ordinal
+        self.count = count
+        self.exceptions = set(exceptions)
+        self.time_text = time_text
+
+    @classmethod
+    def from_row(cls, row):
+        time_str = row.get('time') or ''
+        parsed = ScheduleItem.parse_time(time_str) or (None, None, None)
+        weekdays = [WEEKDAY_NAMES.index(name) for name in (row.get('weekdays') or '').split(',') if name in WEEKDAY_NAMES]
+        exceptions = [date_ordinal(day) for day in (row.get('exceptions') or '').split(';') if day]
+        return cls(
+            parse_int(row.get('id'), 0), row.get('subject'), row.get('topic'), row.get('priority'), *parsed,
+            frequency=(row.get('frequency') or '').strip().lower(),
+            weekdays=weekdays,
+            until_ordinal=date_ordinal(row.get('until')),
+            count=parse_int(row.get('count'), None),
+            exceptions=[day for day in exceptions if day is not None],
+            time_text=time_str
+        )
+
+    def to_row(self, student_id):
+        return {
+            'id': str(self.id),
+            'subject': self.subject,
+            'topic': self.topic,
+            'time': self.time,
+            'priority': self.priority,
+            'frequency': self.frequency,
+            'weekdays': ','.join(WEEKDAY_NAMES[day] for day in sorted(self.weekdays)),
+            'until': ordinal_to_str(self.until_ordinal),
+            'count': '' if self.count is None else str(self.count),
+            'exceptions': ';'.join(ordinal_to_str(day) for day in sorted(self.exceptions)),
+            'student_id': student_id
+        }
+
+    @property
+    def time(self):
+        """The first session as 'YYYY-MM-DD HH:MM-HH:MM'."""
+        if self.first_ordinal is None:
+            return self.time_text
+        return f"{ordinal_to_str(self.first_ordinal)} {minute_to_str(self.start_minute)}-{minute_to_str(self.end_minute)}"
+
+    def describe(self):
+        """The rule in words, e.g. 'Weekly on Mon, Wed until 2025-06-30'."""
+        if self.frequency == REPEAT_DAILY:
+            text = "Daily"
+        else:
+            text = "Weekly on " + ", ".join(WEEKDAY_NAMES[day] for day in sorted(self.weekdays))
+        if self.until_ordinal is not None:
+            text += f" until {ordinal_to_str(self.until_ordinal)}"
+        if self.count is not None:
+            text += f", {self.count} sessions"
+        return text
+
+    # --- Expansion ---
+    def _on_rule(self, ordinal):
+        return self.frequency == REPEAT_DAILY or weekday_of(ordinal) in self.weekdays
+
+    def _sessions_before(self, ordinal):
+        """Counts the rule's days (exceptions included) from the first session up to, not including, ordinal."""
+        if ordinal <= self.first_ordinal:
+            return 0
+        if self.frequency == REPEAT_DAILY:
+            return ordinal - self.first_ordinal
+        return sum(_days_on_weekday(self.first_ordinal, ordinal, weekday) for weekday in self.weekdays)
+
+    def last_ordinal(self):
+        """The last day the series can occur on, or None if it never ends."""
+        last = self.until_ordinal
+        if self.count is not None:
+            # The first day by which count sessions have happened; a week holds at least one
+            low, high = self.first_ordinal, self.first_ordinal + 7 * max(self.count, 1)
+            while low < high:
+                middle = (low + high) // 2
+                if self._sessions_before(middle + 1) >= self.count:
+                    high = middle
+                else:
+                    low = middle + 1
+            last = low if last is None else min(last, low)
+        return last
+
+    def occurs_on(self, ordinal):
+        if self.first_ordinal is None or ordinal < self.first_ordinal or ordinal in self.exceptions:
+            return False
+        last = self.last_ordinal()
+        return (last is None or ordinal <= last) and self._on_rule(ordinal) and (self.count is None or self.count > 0)
+
+    def occurrences(self, first_ordinal, last_ordinal=None):
+        """Yields the sessions from first_ordinal through last_ordinal (inclusive; None for no end), in order."""
+        if self.first_ordinal is None or not (self.frequency == REPEAT_DAILY or self.weekdays):
+            return
+        if self.count is not None and self.count <= 0:
+            return
+        end = self.last_ordinal()
+        if last_ordinal is not None:
+            end = last_ordinal if end is None else min(end, last_ordinal)
+        day = max(first_ordinal, self.first_ordinal)
+        while end is None or day <= end:
+            if self._on_rule(day) and day not in self.exceptions:
+                yield Occurrence(self, day)
+            day += 1
+
+    def next_occurrence(self, from_key):
+        """Returns the first session starting at or after minute key from_key, or None."""
+        day, minute = divmod(from_key, MINUTES_PER_DAY)
+        if self.start_minute is not None and self.start_minute < minute:
+            day += 1
+        return next(self.occurrences(day), None)
+
+    def __repr__(self):
+        return f"ScheduleSeries({self.id!r}, {self.subject!r}, {self.time!r}, {self.describe()!r})"
+
+class Occurrence(ScheduleItem):
+    """One generated session of a ScheduleSeries; its id is (series id, day ordinal)."""
+    __slots__ = ('series',)
+
+    def __init__(self, series, day_ordinal):
+        ScheduleItem.__init__(self, (series.id, day_ordinal), series.subject, series.topic, series.priority,
+                              day_ordinal, series.start_minute, series.end_minute)
+        self.series = series
+
+    def __repr__(self):
+        return f"Occurrence({self.series.id!r}, {self.time!r})"
+
+class ProgressEntry:
+    """Study totals for one subject on one day.
+
+    A date or total that does not parse is None, and its text is kept
+    verbatim in date_text, hours_text or cards_text, so rewriting the file
+    never loses it.
+    """
+    __slots__ = ('day_ordinal', 'subject', 'study_hours', 'cards_reviewed', 'date_text', 'hours_text', 'cards_text')
+
+    def __init__(self, day_ordinal, subject, study_hours=0.0, cards_reviewed=0, date_text='', hours_text='', cards_text=''):
+        self.day_ordinal = day_ordinal
+        self.subject = intern_text(subject)
+        self.study_hours = study_hours
+        self.cards_reviewed = cards_reviewed
+        self.date_text = date_text
+        self.hours_text = hours_text
+        self.cards_text = cards_text
+
+    @classmethod
+    def from_row(cls, row):
+        date_str, hours, cards = row.get('date'), row.get('study_hours'), row.get('cards_reviewed')
+        day_ordinal = date_ordinal(date_str)
+        study_hours = parse_float(hours, None)
+        cards_reviewed = parse_int(cards, None)
+        return cls(
+            day_ordinal,
+            row.get('subject'),
+            study_hours,
+            cards_reviewed,
+            date_text=str(date_str or '') if day_ordinal is None else '',
+            hours_text=str(hours or '') if study_hours is None else '',
+            cards_text=str(cards or '') if cards_reviewed is None else ''
+        )
+
+    def to_row(self, student_id):
+        return {
+            'date': self.date,
+            'subject': self.subject,
+            'study_hours': self.hours_text if self.study_hours is None else str(self.study_hours),
+            'cards_reviewed': self.cards_text if self.cards_reviewed is None else str(self.cards_reviewed),
+            'student_id': student_id
+        }
+
+    @property
+    def date(self):
+        """The day as YYYY-MM-DD, as entered."""
+        if self.day_ordinal is None:
+            return self.date_text
+        return ordinal_to_str(self.day_ordinal)
+
+    def __repr__(self):
+        return f"ProgressEntry({self.date!r}, {self.subject!r}, {self.study_hours!r}, {self.cards_reviewed!r})"
+
+class NoteMeta:
+    """Metadata of one note; last modified is a day ordinal plus a minute of that day."""
+    __slots__ = ('title', 'subject', 'file_path', 'modified_ordinal', 'modified_minute')
+
+    def __init__(self, title, subject, file_path, modified_ordinal=None, modified_minute=0):
+        self.title = title
+        self.subject = intern_text(subject)
+        self.file_path = file_path
+        self.modified_ordinal = modified_ordinal
+        self.modified_minute = modified_minute
+
+    @classmethod
+    def from_row(cls, row):
+        meta = cls(row.get('title') or '', row.get('subject'), row.get('file_path') or '')
+        meta.set_last_modified(row.get('last_modified'))
+        return meta
+
+    def to_row(self, student_id):
+        return {
+            'title': self.title,
+            'last_modified': self.last_modified,
+            'file_path': self.file_path,
+            'student_id': student_id,
+            'subject': self.subject
+        }
+
+    def set_last_modified(self, datetime_str):
+        """Stores a 'YYYY-MM-DD HH:MM' timestamp; one that does not parse leaves the note undated."""
+        try:
+            day_part, clock_part = datetime_str.split(' ')
+        except (ValueError, AttributeError):
+            day_part, clock_part = None, None
+        self.modified_ordinal = date_ordinal(day_part)
+        self.modified_minute = clock_minute(clock_part) or 0
+
+    @property
+    def last_modified(self):
+        if self.modified_ordinal is None:
+            return ''
+        return f"{ordinal_to_str(self.modified_ordinal)} {minute_to_str(self.modified_minute)}"
+
+    def sort_key(self):
+        """Orders notes by last modified; undated notes sort first (last when reversed)."""
+        return (self.modified_ordinal or 0, self.modified_minute)
+
+    def __repr__(self):
+        return f"NoteMeta({self.title!r}, {self.subject!r}, {self.last_modified!r})"
@@ -0,0 +1,151 @@
+import heapq
+import itertools
+from datetime import datetime
+from records import Occurrence, minute_key, key_to_datetime
+
+# --- Reminder Queue ---
+# Session starts are minute keys (see records.py), so "is it due" is an
+# integer comparison and every session starting in the same minute shares
+# one key. A recurring series has only its next occurrence queued; the one
+# after it is generated when that fires.
+
+REMINDER_GRACE_MINUTES = 5  # A start missed by up to this much (a busy or sleeping machine) is still shown
+MAX_TIMER_MS = 15 * 60 * 1000  # Longer waits are split, so a change to the system clock is picked up
+TIMER_SLACK_MS = 50  # Fire just after the minute starts, never just before
+
+class ReminderQueue:
+    """Upcoming session starts in a min-heap.
+
+    Removal is lazy: the item is forgotten and its heap entry is skipped when
+    it reaches the top, so add and remove are O(log n) and O(1).
+    """
+    def __init__(self):
+        self._heap = []  # (minute key, push order, item id); ids of one-offs (int) and occurrences (tuple) do not compare
+        self._items = {}  # item id -> item still waiting for its reminder
+        self._order = itertools.count()
+
+    def __len__(self):
+        return len(self._items)
+
+    def add(self, item):
+        key = item.start_key
+        if key is None:
+            return
+        self._items[item.id] = item
+        heapq.heappush(self._heap, (key, next(self._order), item.id))
+
+    def remove(self, item_id):
+        self._items.pop(item_id, None)
+
+    def clear(self):
+        self._heap = []
+        self._items = {}
+
+    def _live(self, key, order, item_id):
+        item = self._items.get(item_id)
+        return item is not None and item.start_key == key
+
+    def next_key(self):
+        """Returns the minute key of the earliest waiting start, or None."""
+        heap = self._heap
+        while heap and not self._live(*heap[0]):
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
+
+    def pop_due(self, now_key):
+        """Removes every start at or before now_key; returns [(minute key, [items])], one group per minute."""
+        groups = []
+        while True:
+            key = self.next_key()
+            if key is None or key > now_key:
+                return groups
+            _, _, item_id = heapq.heappop(self._heap)
+            item = self._items.pop(item_id)
+            if groups and groups[-1][0] == key:
+                groups[-1][1].append(item)
+            else:
+                groups.append((key, [item]))
+
+class ReminderTimer:
+    """Keeps a single after() armed for the next start in a ReminderQueue.
+
+    notify(minute_key, items) runs on the Tk thread once per minute that has
+    sessions starting, with all of them. Starts already in the past when an
+    item is added are not reminded.
+    """
+    def __init__(self, widget, notify, clock=datetime.now):
+        self.widget = widget
+        self.notify = notify
+        self.clock = clock
+        self.queue = ReminderQueue()
+        self._series = {}  # series id -> (series, id of its queued occurrence or None)
+        self._job = None
+
+    def reset(self, items, series=()):
+        """Replaces the queue with the given items' and series' upcoming starts."""
+        self.queue.clear()
+        self._series = {}
+        now_key = minute_key(self.clock())
+        for item in items:
+            key = item.start_key
+            if key is not None and key >= now_key:
+                self.queue.add(item)
+        for series_item in series:
+            self._queue_next(series_item, now_key)
+        self._arm()
+
+    def add(self, item):
+        key = item.start_key
+        if key is not None and key >= minute_key(self.clock()):
+            self.queue.add(item)
+            self._arm()
+
+    def remove(self, item_id):
+        self.queue.remove(item_id)
+        self._arm()
+
+    def add_series(self, series):
+        """Adds or replaces a recurring series, queueing its next occurrence."""
+        self._forget_series(series.id)
+        self._queue_next(series, minute_key(self.clock()))
+        self._arm()
+
+    def remove_series(self, series_id):
+        self._forget_series(series_id)
+        self._arm()
+
+    def _forget_series(self, series_id):
+        _, queued_id = self._series.pop(series_id, (None, None))
+        if queued_id is not None:
+            self.queue.remove(queued_id)
+
+    def _queue_next(self, series, from_key):
+        occurrence = series.next_occurrence(from_key)
+        if occurrence is not None:
+            self.queue.add(occurrence)
+        self._series[series.id] = (series, occurrence.id if occurrence is not None else None)
+
+    def stop(self):
+        if self._job is not None:
+            self.widget.after_cancel(self._job)
+            self._job = None
+
+    def _arm(self):
+        self.stop()
+        key = self.queue.next_key()
+        if key is None:
+            return
+        delay_ms = int((key_to_datetime(key) - self.clock()).total_seconds() * 1000) + TIMER_SLACK_MS
+        self._job = self.widget.after(min(max(0, delay_ms), MAX_TIMER_MS), self._fire)
+
+    def _fire(self):
+        self._job = None
+        now_key = minute_key(self.clock())
+        for key, items in self.queue.pop_due(now_key):
+            for item in items:
+                if isinstance(item, Occurrence) and self._series.get(item.series.id, (None,))[0] is item.series:
+                    # Skip straight to now: after a long sleep the missed days are not replayed
+                    self._queue_next(item.series, max(key, now_key) + 1)
+            if now_key - key <= REMINDER_GRACE_MINUTES:
+                self.notify(key, items)
+        self._arm()
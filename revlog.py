@@ -0,0 +1,82 @@
+import os
+import struct
+import time
+import numpy as np
+from utils import get_student_data_path, ensure_dir_exists
+
+# --- Review Log Layout ---
+# One fixed-width little-endian record per quiz rating, appended to revlog.bin
+# in the student's folder. The struct and the NumPy dtype describe the same
+# 53-byte record, so the log can be written without NumPy and read back as a
+# structured array in one call.
+REVLOG_FILE = "revlog.bin"
+REVLOG_RECORD = struct.Struct('<qqBddddf')
+REVLOG_DTYPE = np.dtype([
+    ('card_id', '<i8'),
+    ('timestamp_ms', '<i8'),  # Unix time of the rating, in milliseconds
+    ('rating', 'u1'),  # 0 = again, 1 = good, 2 = easy
+    ('previous_interval', '<f8'),
+    ('new_interval', '<f8'),
+    ('previous_ease', '<f8'),
+    ('new_ease', '<f8'),
+    ('response_time', '<f4'),  # Seconds from showing the card to rating it
+])
+assert REVLOG_DTYPE.itemsize == REVLOG_RECORD.size
+
+class ReviewLog:
+    """Append-only binary history of every flashcard rating for one student.
+
+    The file is opened once and each record is flushed as it is written, so
+    logging a review never rewrites existing history.
+    """
+    def __init__(self, username):
+        self.file_path = get_student_data_path(username, REVLOG_FILE)
+        self._file = None
+
+    def append(self, card_id, rating, previous_interval, new_interval, previous_ease, new_ease,
+               response_time, timestamp=None):
+        """Appends one review record."""
+        if timestamp is None:
+            timestamp = time.time()
+        try:
+            if self._file is None:
+                ensure_dir_exists(os.path.dirname(self.file_path))
+                self._file = open(self.file_path, 'ab')
+                self._trim_partial_record()
+            self._file.write(REVLOG_RECORD.pack(
+                int(card_id), int(timestamp * 1000), int(rating),
+                float(previous_interval), float(new_interval),
+                float(previous_ease), float(new_ease), float(response_time)
+            ))
+            self._file.flush()
+        except (OSError, ValueError, struct.error) as e:
+            print(f"Warning: Could not write to review log {self.file_path}: {e}")
+
+    def _trim_partial_record(self):
+        # A crash mid-write can leave a torn record; drop it so new records stay aligned
+        size = os.fstat(self._file.fileno()).st_size
+        if size % REVLOG_RECORD.size:
+            self._file.truncate(size - size % REVLOG_RECORD.size)
+
+    def close(self):
+        if self._file is None:
+            return
+        try:
+            os.fsync(self._file.fileno())
+            self._file.close()
+        except OSError as e:
+            print(f"Warning: Could not close review log {self.file_path}: {e}")
+        self._file = None
+
+def load_revlog(username):
+    """Returns a student's review history as a NumPy structured array (empty if there is none)."""
+    file_path = get_student_data_path(username, REVLOG_FILE)
+    if not os.path.exists(file_path):
+        return np.empty(0, dtype=REVLOG_DTYPE)
+    count = os.path.getsize(file_path) // REVLOG_DTYPE.itemsize
+    return np.fromfile(file_path, dtype=REVLOG_DTYPE, count=count)
+
+def highest_logged_card_id(username):
+    """Returns the highest card id in a student's review history (0 if there is none)."""
+    card_ids = load_revlog(username)['card_id']
+    return int(card_ids.max()) if card_ids.size else 0
@@ -0,0 +1,194 @@
+import heapq
+import random
+from records import Occurrence, MINUTES_PER_DAY
+
+# --- Interval Index ---
+# Sessions are half-open [start, end) intervals of minute keys (see
+# records.py), so back-to-back sessions (09:00-10:00, 10:00-11:00) do not
+# conflict. Recurring series are kept beside the tree and expanded only over
+# the days a query asks about.
+
+class _Node:
+    __slots__ = ('start', 'end', 'item', 'priority', 'max_end', 'left', 'right')
+
+    def __init__(self, start, end, item):
+        self.start = start
+        self.end = end
+        self.item = item
+        self.priority = random.random()
+        self.max_end = end
+        self.left = None
+        self.right = None
+
+    def key(self):
+        return (self.start, self.end, self.item.id)
+
+def _update(node):
+    max_end = node.end
+    if node.left is not None and node.left.max_end > max_end:
+        max_end = node.left.max_end
+    if node.right is not None and node.right.max_end > max_end:
+        max_end = node.right.max_end
+    node.max_end = max_end
+
+def _split(node, key):
+    """Splits a subtree into (nodes with key < key, nodes with key >= key)."""
+    if node is None:
+        return None, None
+    if node.key() < key:
+        node.right, right = _split(node.right, key)
+        _update(node)
+        return node, right
+    left, node.left = _split(node.left, key)
+    _update(node)
+    return left, node
+
+def _merge(left, right):
+    """Joins two subtrees where every key in left is below every key in right."""
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        _update(left)
+        return left
+    right.left = _merge(left, right.left)
+    _update(right)
+    return right
+
+def _build(nodes, lo, hi):
+    """Builds a balanced subtree from nodes[lo:hi], which are sorted by key."""
+    if lo >= hi:
+        return None
+    mid = (lo + hi) // 2
+    node = nodes[mid]
+    node.left = _build(nodes, lo, mid)
+    node.right = _build(nodes, mid + 1, hi)
+    _update(node)
+    return node
+
+def _remove(node, key):
+    if node is None:
+        return None
+    node_key = node.key()
+    if key == node_key:
+        return _merge(node.left, node.right)
+    if key < node_key:
+        node.left = _remove(node.left, key)
+    else:
+        node.right = _remove(node.right, key)
+    _update(node)
+    return node
+
+class ScheduleIndex:
+    """Interval tree over one student's sessions: a treap ordered by start, with the
+    largest end of each subtree kept on its root.
+
+    Overlap and free-slot queries visit only subtrees that can reach the
+    window, O(log n + k) for k matching sessions; add and remove are
+    O(log n) expected. Sessions whose time did not parse are not indexed.
+    A query also costs one expansion per series over the days it covers.
+    """
+    def __init__(self, items=(), series=()):
+        self._root = None
+        self._keys = {}  # item id -> node key, for removal
+        self._series = {series_item.id: series_item for series_item in series}  # series id -> ScheduleSeries
+        self._bulk_load(items)
+
+    def _bulk_load(self, items):
+        """Builds the tree in one pass from sorted sessions rather than by n inserts."""
+        latest = {item.id: item for item in items if item.start_key is not None}
+        nodes = sorted((_Node(item.start_key, item.end_key, item) for item in latest.values()), key=_Node.key)
+        self._root = _build(nodes, 0, len(nodes))
+        self._keys = {node.item.id: node.key() for node in nodes}
+        # Keep the heap order on priorities: hand them out largest first, level by level
+        priorities = sorted((node.priority for node in nodes), reverse=True)
+        level = [self._root] if self._root is not None else []
+        position = 0
+        while level:
+            next_level = []
+            for node in level:
+                node.priority = priorities[position]
+                position += 1
+                next_level.extend(child for child in (node.left, node.right) if child is not None)
+            level = next_level
+
+    def __len__(self):
+        return len(self._keys)
+
+    def add(self, item):
+        start, end = item.start_key, item.end_key
+        if start is None:
+            return
+        self.remove(item.id)
+        node = _Node(start, end, item)
+        left, right = _split(self._root, node.key())
+        self._root = _merge(_merge(left, node), right)
+        self._keys[item.id] = node.key()
+
+    def remove(self, item_id):
+        key = self._keys.pop(item_id, None)
+        if key is not None:
+            self._root = _remove(self._root, key)
+
+    def add_series(self, series):
+        """Adds or replaces a recurring series (e.g. after an exception day was added)."""
+        self._series[series.id] = series
+
+    def remove_series(self, series_id):
+        self._series.pop(series_id, None)
+
+    def overlapping(self, start, end):
+        """Returns the sessions overlapping [start, end), ordered by start.
+
+        Occurrences of recurring series are generated for the window's days
+        and merged in with the one-off sessions.
+        """
+        found = []
+        self._collect(self._root, start, end, found)
+        if not self._series or end <= start:
+            return found
+        first_day, last_day = start // MINUTES_PER_DAY, (end - 1) // MINUTES_PER_DAY
+        expansions = [
+            (occurrence for occurrence in series.occurrences(first_day, last_day)
+             if occurrence.start_key < end and occurrence.end_key > start)
+            for series in self._series.values()
+        ]
+        return list(heapq.merge(found, *expansions, key=lambda item: item.start_key))
+
+    def _collect(self, node, start, end, found):
+        # Nothing below ends after start: the whole subtree is before the window
+        if node is None or node.max_end <= start:
+            return
+        self._collect(node.left, start, end, found)
+        if node.start < end:
+            if node.end > start:
+                found.append(node.item)
+            self._collect(node.right, start, end, found)
+
+    def conflicts(self, start, end, ignore_id=None):
+        """Returns the sessions a new session [start, end) would overlap."""
+        return [item for item in self.overlapping(start, end) if item.id != ignore_id]
+
+    def series_conflicts(self, series, first_day, last_day):
+        """Returns [(occurrence, [sessions])] for the occurrences of series between two days that overlap others."""
+        found = []
+        for occurrence in series.occurrences(first_day, last_day):
+            conflicts = [item for item in self.overlapping(occurrence.start_key, occurrence.end_key)
+                         if not (isinstance(item, Occurrence) and item.series.id == series.id)]
+            if conflicts:
+                found.append((occurrence, conflicts))
+        return found
+
+    def free_slots(self, start, end, min_minutes):
+        """Returns [(slot_start, slot_end)] of the gaps of at least min_minutes between start and end."""
+        slots = []
+        cursor = start
+        for item in self.overlapping(start, end):
+            if item.start_key - cursor >= min_minutes:
+                slots.append((cursor, item.start_key))
+            cursor = max(cursor, item.end_key)
+        if end - cursor >= min_minutes:
+            slots.append((cursor, end))
+        return slots
@@ -0,0 +1,188 @@
+import numpy as np
+from records import INITIAL_EASE
+
+# SM2 Algorithm Constants (INITIAL_EASE lives in records, the card defaults)
+MIN_EASE = 1.3
+EASY_BONUS = 1.2
+
+# Ratings, as given by the quiz buttons
+AGAIN, GOOD, EASY = 0, 1, 2
+
+# --- Single Card ---
+def schedule_review(interval, ease_factor, rating):
+    """Applies one rating to a card's SM-2 state.
+
+    Returns (new_interval, new_ease, interval_days): the interval rounded to
+    2 places and the ease to 3, as stored on the card, plus the whole number
+    of days until the next review.
+    """
+    if rating == AGAIN:
+        interval = 0
+        ease_factor = max(MIN_EASE, ease_factor - 0.2)
+    else:
+        if interval == 0:
+            if rating == GOOD:
+                interval = 1
+                ease_factor += 0.05
+            elif rating == EASY:
+                interval = 4
+                ease_factor += 0.1
+        else:
+            if rating == GOOD:
+                interval = interval * ease_factor
+                ease_factor += 0.05
+            elif rating == EASY:
+                interval = interval * ease_factor * EASY_BONUS
+                ease_factor += 0.1
+        ease_factor = max(MIN_EASE, ease_factor)
+
+    interval_days = max(1, round(interval)) if rating > 0 else 0
+    return round(interval, 2), round(ease_factor, 3), interval_days
+
+# --- Whole Decks ---
+def _round_like_python(values, digits):
+    """Rounds like the built-in round(value, digits), element-wise.
+
+    np.round scales by 10**digits first, which can tip a value sitting next to
+    a .5 boundary the other way; those few elements are redone with round().
+    """
+    rounded = np.round(values, digits)
+    scaled = values * 10.0 ** digits
+    near_tie = np.abs(np.abs(scaled - np.floor(scaled)) - 0.5) < 1e-6
+    for i in np.flatnonzero(near_tie):
+        rounded[i] = round(float(values[i]), digits)
+    return rounded
+
+def schedule_reviews(intervals, ease_factors, ratings):
+    """Applies one rating per card to whole arrays of SM-2 state at once.
+
+    Gives exactly the results of schedule_review() applied card by card, as
+    three arrays: new intervals (2 places), new eases (3 places) and interval
+    days (int64).
+    """
+    intervals = np.asarray(intervals, dtype=np.float64)
+    ease_factors = np.asarray(ease_factors, dtype=np.float64)
+    ratings = np.asarray(ratings)
+
+    again = ratings == AGAIN
+    good = ratings == GOOD
+    easy = ratings == EASY
+    new_card = intervals == 0
+
+    new_intervals = np.select(
+        [again, new_card & good, new_card & easy, good, easy],
+        [0.0, 1.0, 4.0, intervals * ease_factors, intervals * ease_factors * EASY_BONUS],
+        default=intervals
+    )
+    new_eases = np.select(
+        [again, good, easy],
+        [ease_factors - 0.2, ease_factors + 0.05, ease_factors + 0.1],
+        default=ease_factors
+    )
+    new_eases = np.maximum(MIN_EASE, new_eases)
+
+    # np.rint and round() both round half to even, so whole days match without a fallback
+    interval_days = np.where(ratings > 0, np.maximum(1, np.rint(new_intervals)), 0).astype(np.int64)
+    return _round_like_python(new_intervals, 2), _round_like_python(new_eases, 3), interval_days
+
+# --- Workload Forecast ---
+FORECAST_RATING = GOOD  # Simulated reviews assume every card is remembered
+LOAD_BALANCE_FRACTION = 0.1  # A new due date may move by up to this share of its interval...
+LOAD_BALANCE_MAX_DAYS = 7  # ...but never by more than this many days either way
+
+def load_balance_tolerance(interval_days):
+    """Returns how many days each due date may move either way (0 for short intervals)."""
+    tolerance = (np.asarray(interval_days, dtype=np.float64) * LOAD_BALANCE_FRACTION).astype(np.int64)
+    return np.minimum(LOAD_BALANCE_MAX_DAYS, tolerance)
+
+def _fill_window(window, units, target):
+    """Spreads units over a window of day loads so the busiest day stays as low as possible.
+
+    Water-fills the emptiest days first; days nearer target win ties.
+    Returns the number of units given to each day.
+    """
+    low, high = int(window.min()), int(window.min()) + units
+    while low < high:
+        middle = (low + high) // 2
+        if np.maximum(0, middle - window).sum() >= units:
+            high = middle
+        else:
+            low = middle + 1
+    added = np.maximum(0, low - 1 - window)
+    remaining = units - int(added.sum())
+    if remaining:
+        preference = np.argsort(np.abs(np.arange(window.size) - target), kind="stable")
+        eligible = preference[window[preference] <= low - 1]
+        added[eligible[:remaining]] += 1
+    return added
+
+def balance_due_offsets(offsets, tolerances, load):
+    """Moves due dates within their tolerance to keep the daily load flat.
+
+    offsets are due days counted from a fixed day 0 and load is an int array of
+    reviews already due on each day; load is updated in place with the new
+    cards. Cards are placed in due-date order, each group filling the least
+    loaded days of its window. Due days beyond the end of load are left alone.
+    """
+    offsets = np.asarray(offsets, dtype=np.int64)
+    tolerances = np.asarray(tolerances, dtype=np.int64)
+    balanced = offsets.copy()
+    if not offsets.size:
+        return balanced
+    horizon = load.size
+    order = np.lexsort((tolerances, offsets))
+    group_keys = offsets[order] * (LOAD_BALANCE_MAX_DAYS + 1) + tolerances[order]
+    starts = np.flatnonzero(np.r_[True, group_keys[1:] != group_keys[:-1]])
+    ends = np.r_[starts[1:], order.size]
+    for start, end in zip(starts, ends):
+        members = order[start:end]
+        target, tolerance = int(offsets[members[0]]), int(tolerances[members[0]])
+        if target >= horizon:
+            continue
+        first, last = max(0, target - tolerance), min(horizon - 1, target + tolerance)
+        added = _fill_window(load[first:last + 1], members.size, target - first)
+        load[first:last + 1] += added
+        balanced[members] = first + np.repeat(np.arange(added.size), added)
+    return balanced
+
+def balance_interval_days(interval_days, window_loads):
+    """Picks the least busy day for one card.
+
+    window_loads holds the reviews already due on each day from
+    interval_days - tolerance to interval_days + tolerance.
+    """
+    tolerance = int(load_balance_tolerance(interval_days))
+    if not tolerance or len(window_loads) != 2 * tolerance + 1:
+        return interval_days
+    (offset,) = balance_due_offsets([tolerance], [tolerance], np.array(window_loads, dtype=np.int64))
+    return interval_days - tolerance + int(offset)
+
+def forecast_due_counts(due_offsets, intervals, ease_factors, days, load_balance=False):
+    """Projects how many reviews fall due on each of the next `days` days.
+
+    due_offsets are days from today to each card's next review (overdue cards
+    count as due today). Every simulated review is rated FORECAST_RATING and
+    rescheduled with schedule_reviews(), a round at a time across the whole
+    deck, until every card's next review is beyond the horizon. With
+    load_balance, each rescheduled due date is spread over its tolerance window.
+    Returns an int64 array of daily counts, today first.
+    """
+    due = np.maximum(0, np.asarray(due_offsets, dtype=np.int64))
+    intervals = np.asarray(intervals, dtype=np.float64)
+    ease_factors = np.asarray(ease_factors, dtype=np.float64)
+    in_horizon = due < days
+    due, intervals, ease_factors = due[in_horizon], intervals[in_horizon], ease_factors[in_horizon]
+    counts = np.bincount(due, minlength=days).astype(np.int64)
+
+    while due.size:
+        intervals, ease_factors, interval_days = schedule_reviews(
+            intervals, ease_factors, np.full(due.size, FORECAST_RATING))
+        due = due + interval_days
+        if load_balance:
+            # Balancing adds the placed cards to counts itself
+            due = balance_due_offsets(due, load_balance_tolerance(interval_days), counts)
+        in_horizon = due < days
+        due, intervals, ease_factors = due[in_horizon], intervals[in_horizon], ease_factors[in_horizon]
+        if not load_balance:
+            counts += np.bincount(due, minlength=days)
+    return counts
@@ -1,16 +1,20 @@
 import customtkinter as ctk
-from customtkinter import CTkFrame, CTkLabel, CTkEntry, CTkButton, CTkOptionMenu, CTkScrollableFrame, CTkProgressBar
-from utils import (get_student_data_path, read_csv, write_csv,
-                   validate_not_empty, validate_time_range,
+from customtkinter import (CTkFrame, CTkLabel, CTkEntry, CTkButton, CTkOptionMenu, CTkScrollableFrame, CTkProgressBar,
+                           CTkToplevel, CTkCheckBox)
+from utils import (validate_not_empty, validate_time_range,
                    get_current_datetime_str, parse_datetime_str)
+from storage import get_storage
+from records import (ScheduleItem, ScheduleSeries, Occurrence, minute_to_str, date_ordinal, parse_int,
+                     MINUTES_PER_DAY, REPEAT_DAILY, REPEAT_WEEKLY, WEEKDAY_NAMES)
+from workers import get_workers
+from reminders import ReminderTimer
+from schedule_index import ScheduleIndex
+import heapq
 import os
 import random
-from datetime import datetime
+from datetime import date
 from CTkMessagebox import CTkMessagebox
 
-SCHEDULE_FILE = "schedules.csv"
-SCHEDULE_HEADERS = ['subject', 'topic', 'time', 'priority', 'student_id', 'id']
-
 # Scheduling Tips
 SCHEDULING_TIPS = [
     "Schedule your most challenging subjects when you're most alert!",
@@ -20,16 +24,28 @@ SCHEDULING_TIPS = [
     "Review your schedule weekly to stay on track!"
 ]
 
+REPEAT_OPTIONS = {"Never": None, "Daily": REPEAT_DAILY, "Weekly": REPEAT_WEEKLY}
+SERIES_DISPLAY_DAYS = 14  # Recurring sessions are listed from today through this many days
+SERIES_CONFLICT_DAYS = 90  # A new series is checked for conflicts over its first this many days
+MAX_CONFLICTS_SHOWN = 5
+
 class SchedulingTab(CTkFrame):
     """GUI Frame for managing study schedules."""
     def __init__(self, parent, username):
         super().__init__(parent, corner_radius=15, fg_color=("#e6f0ff", "#1a2a44"))
         self.username = username
-        self.schedule_file_path = get_student_data_path(self.username, SCHEDULE_FILE)
+        self.repository = get_storage().schedules(self.username)
         self.schedule_data = []
-        self.next_id = 1
+        self.id_sequence = get_storage().id_sequence(self.username, "schedules")
+        # Recurring sessions: one stored row per series, occurrences generated per window
+        self.series_repository = get_storage().schedule_series(self.username)
+        self.series_data = []
+        self.series_sequence = get_storage().id_sequence(self.username, "schedule_series")
         self.selected_schedule_id = None
         self.schedule_rows = []
+        # One after() armed for the next session start, instead of polling every minute
+        self.reminders = ReminderTimer(self, self._show_reminder)
+        self.schedule_index = ScheduleIndex()  # Interval tree for conflict and free-time queries
 
         # Inner frame for shadow effect
         self.inner_frame = CTkFrame(self, corner_radius=15, fg_color=("#ffffff", "#2b2b2b"),
@@ -117,6 +133,42 @@ class SchedulingTab(CTkFrame):
         self.priority_menu.bind("<Leave>", lambda event: self._scale_menu_out(self.priority_menu))
         f_priority.pack(pady=5, padx=10, fill="x")
 
+        # Repeat (weekdays default to the first session's day)
+        f_repeat = CTkFrame(input_frame, fg_color="transparent")
+        CTkLabel(f_repeat, text="🔁", font=("Helvetica", 16)).pack(side="left", padx=(5, 0))
+        CTkLabel(f_repeat, text="Repeat:", width=120, anchor="w", font=("Helvetica", 12)).pack(side="left", padx=5)
+        self.repeat_var = ctk.StringVar(value="Never")
+        self.repeat_menu = CTkOptionMenu(
+            f_repeat,
+            variable=self.repeat_var,
+            values=list(REPEAT_OPTIONS),
+            width=100,
+            corner_radius=8,
+            fg_color=("#1f77b4", "#4a90e2"),
+            button_color=("#165a92", "#357abd"),
+            button_hover_color=("#0f4a7b", "#2a6aa3"),
+            text_color=("white", "white"),
+            font=("Helvetica", 12)
+        )
+        self.repeat_menu.pack(side="left", padx=5)
+        self.weekday_vars = []
+        for name in WEEKDAY_NAMES:
+            weekday_var = ctk.BooleanVar(value=False)
+            CTkCheckBox(f_repeat, text=name, variable=weekday_var, width=50,
+                        font=("Helvetica", 11)).pack(side="left", padx=2)
+            self.weekday_vars.append(weekday_var)
+        CTkLabel(f_repeat, text="Ends:", font=("Helvetica", 12)).pack(side="left", padx=(10, 5))
+        self.ends_entry = CTkEntry(
+            f_repeat,
+            width=140,
+            placeholder_text="date, count or blank",
+            corner_radius=8,
+            border_width=0,
+            fg_color=("#e0e0e0", "#444444")
+        )
+        self.ends_entry.pack(side="left", padx=5, fill="x", expand=True)
+        f_repeat.pack(pady=5, padx=10, fill="x")
+
         # Buttons
         button_frame = CTkFrame(input_frame, fg_color="transparent")
         self.add_button = CTkButton(
@@ -158,7 +210,7 @@ class SchedulingTab(CTkFrame):
         self.clear_button.bind("<Enter>", lambda event: self._scale_button_in(self.clear_button))
         self.clear_button.bind("<Leave>", lambda event: self._scale_button_out(self.clear_button))
 
-        self.progress_bar = CTkProgressBar(button_frame, mode="indeterminate", width=100)
+        self.progress_bar = CTkProgressBar(button_frame, mode="determinate", width=100)
         self.progress_bar.pack_forget()
         button_frame.pack(pady=10)
 
@@ -178,13 +230,11 @@ class SchedulingTab(CTkFrame):
         self.schedule_scroll = CTkScrollableFrame(tree_frame, corner_radius=10)
         self.schedule_scroll.pack(fill="both", expand=True)
 
-        # Load initial data
+        # Load initial data (this also arms the reminders); the id sequences are stored before any delete
+        self.id_sequence.ensure_stored()
+        self.series_sequence.ensure_stored()
         self._load_schedules()
 
-        # Reminder Check
-        self._check_reminders()
-        self.after(60000, self._check_reminders)
-
     def _animate_title(self, label, text, index=0):
         """Animates the title by typing it out."""
         if index <= len(text):
@@ -212,26 +262,18 @@ class SchedulingTab(CTkFrame):
         """Simulates a fade-in effect for the schedule display."""
         self.schedule_scroll.pack(fill="both", expand=True)
 
-    def _get_max_id(self):
-        if not self.schedule_data:
-            return 0
-        max_id = 0
-        for item in self.schedule_data:
-            try:
-                item_id = int(item.get('id', 0))
-                if item_id > max_id:
-                    max_id = item_id
-            except (ValueError, TypeError):
-                continue
-        return max_id
-
     def _load_schedules(self):
-        self.schedule_data = read_csv(self.schedule_file_path, SCHEDULE_HEADERS)
-        self.next_id = self._get_max_id() + 1
+        self.schedule_data = self.repository.list_all()
+        self.series_data = self.series_repository.list_all()
+        self.schedule_index = ScheduleIndex(self.schedule_data, self.series_data)
+        self.reminders.reset(self.schedule_data, self.series_data)
         self._populate_schedule_display()
 
-    def _save_schedules(self):
-        write_csv(self.schedule_file_path, self.schedule_data, SCHEDULE_HEADERS)
+    def _upcoming_occurrences(self):
+        """The series' sessions from today through SERIES_DISPLAY_DAYS, in start order."""
+        today = date.today().toordinal()
+        expansions = [series.occurrences(today, today + SERIES_DISPLAY_DAYS - 1) for series in self.series_data]
+        return list(heapq.merge(*expansions, key=lambda item: item.start_key))
 
     def _populate_schedule_display(self):
         for widget in self.schedule_scroll.winfo_children():
@@ -239,17 +281,16 @@ class SchedulingTab(CTkFrame):
         self.schedule_rows = []
         self.selected_schedule_id = None
 
-        try:
-            self.schedule_data.sort(key=lambda x: datetime.strptime(x.get('time', '').split(' ')[0], '%Y-%m-%d') if x.get('time') else datetime.max.date())
-        except Exception as e:
-            print(f"Warning: Could not sort schedules by time - {e}")
+        # By start time, as reminders and conflict checks order them; undated sessions last
+        displayed = sorted(self.schedule_data + self._upcoming_occurrences(),
+                           key=lambda item: (item.day_ordinal is None, item.start_key or 0))
 
-        for idx, item in enumerate(self.schedule_data):
-            item_id = item.get('id', '')
-            subject = item.get('subject', 'N/A')
-            topic = item.get('topic', 'N/A')
-            time_str = item.get('time', 'N/A')
-            priority = item.get('priority', 'N/A')
+        for idx, item in enumerate(displayed):
+            item_id = item.id
+            subject = item.subject
+            topic = item.topic
+            time_str = f"🔁 {item.time}" if isinstance(item, Occurrence) else item.time
+            priority = item.priority
 
             # Color-code priority
             priority_color = {
@@ -323,8 +364,7 @@ class SchedulingTab(CTkFrame):
 
     def _select_schedule(self, schedule_id):
         self.selected_schedule_id = schedule_id
-        for item_id, row_frame in self.schedule_rows:
-            idx = self.schedule_data.index(next(item for item in self.schedule_data if item.get('id') == item_id))
+        for idx, (item_id, row_frame) in enumerate(self.schedule_rows):
             if item_id == schedule_id:
                 row_frame.configure(fg_color=("gray70", "gray50"))
                 for widget in row_frame.winfo_children():
@@ -341,10 +381,17 @@ class SchedulingTab(CTkFrame):
         self.topic_entry.delete(0, "end")
         self.time_entry.delete(0, "end")
         self.priority_var.set("Medium")
+        self._clear_repeat_fields()
         if self.selected_schedule_id:
             self.selected_schedule_id = None
             self._populate_schedule_display()
 
+    def _clear_repeat_fields(self):
+        self.repeat_var.set("Never")
+        for weekday_var in self.weekday_vars:
+            weekday_var.set(False)
+        self.ends_entry.delete(0, "end")
+
     def _add_schedule(self):
         subject = self.subject_entry.get()
         topic = self.topic_entry.get()
@@ -365,81 +412,203 @@ class SchedulingTab(CTkFrame):
             CTkMessagebox(title="Input Error", message="Please select a priority.", icon="warning").get()
             return
 
+        # The time was validated above, so it parses
+        parsed_time = ScheduleItem.parse_time(time_str)
+        frequency = REPEAT_OPTIONS.get(self.repeat_var.get())
+        if frequency is not None:
+            self._add_series(subject, topic, priority, parsed_time, frequency)
+            return
+        if not self._confirm_conflicts(*parsed_time):
+            return
+
+        self._show_progress()
+        get_workers().run_io(self._store_schedule, subject, topic, priority, parsed_time,
+                             on_done=self._complete_add_schedule,
+                             on_error=self._add_schedule_failed,
+                             on_progress=self.progress_bar.set)
+
+    def _add_series(self, subject, topic, priority, parsed_time, frequency):
+        """Validates the repeat fields and stores a recurring session starting at parsed_time."""
+        ends = self.ends_entry.get().strip()
+        until_ordinal, count = None, None
+        if ends.isdigit():
+            count = parse_int(ends, None)
+        elif ends:
+            until_ordinal = date_ordinal(ends)
+        if (ends and until_ordinal is None and not count) or (until_ordinal is not None and until_ordinal < parsed_time[0]):
+            CTkMessagebox(title="Input Error", message="Ends must be a date on or after the first session, "
+                          "a number of sessions, or blank.", icon="warning").get()
+            return
+        weekdays = [weekday for weekday, weekday_var in enumerate(self.weekday_vars) if weekday_var.get()]
+        # The id is allocated when the series is stored
+        new_series = ScheduleSeries(None, subject, topic, priority, *parsed_time, frequency=frequency,
+                                    weekdays=weekdays, until_ordinal=until_ordinal, count=count)
+        if next(new_series.occurrences(parsed_time[0]), None) is None:
+            CTkMessagebox(title="Input Error", message="This series has no sessions; check the weekdays.",
+                          icon="warning").get()
+            return
+        if not self._confirm_series_conflicts(new_series):
+            return
+
+        self._show_progress()
+        get_workers().run_io(self._store_series, new_series,
+                             on_done=self._complete_add_series,
+                             on_error=self._add_schedule_failed,
+                             on_progress=self.progress_bar.set)
+
+    def _show_progress(self):
         self.add_button.pack_forget()
         self.delete_button.pack_forget()
         self.clear_button.pack_forget()
+        self.progress_bar.set(0)
         self.progress_bar.pack(side="left", padx=5)
-        self.progress_bar.start()
-        self.after(1000, self._complete_add_schedule, subject, topic, time_str, priority)
-
-    def _complete_add_schedule(self, subject, topic, time_str, priority):
-        new_schedule = {
-            'id': str(self.next_id),
-            'subject': subject,
-            'topic': topic,
-            'time': time_str,
-            'priority': priority,
-            'student_id': self.username
-        }
+
+    def _confirm_conflicts(self, day_ordinal, start_minute, end_minute):
+        """Warns if the new session overlaps existing ones; returns True to go ahead with it."""
+        day_start = day_ordinal * MINUTES_PER_DAY
+        conflicts = self.schedule_index.conflicts(day_start + start_minute, day_start + end_minute)
+        if not conflicts:
+            return True
+
+        lines = [f"• {item.subject}: {item.topic} ({item.time})" for item in conflicts]
+        # Suggest the first gap long enough for the session later that day
+        free_slots = self.schedule_index.free_slots(day_start + start_minute, day_start + MINUTES_PER_DAY,
+                                                    end_minute - start_minute)
+        if free_slots:
+            slot_start = free_slots[0][0] - day_start
+            lines.append(f"\nThe next free slot that day starts at {minute_to_str(slot_start)}.")
+        message = "This session overlaps:\n" + "\n".join(lines) + "\n\nAdd it anyway?"
+        return CTkMessagebox(title="Schedule Conflict", message=message, icon="warning",
+                             option_1="Yes", option_2="No").get() == "Yes"
+
+    def _confirm_series_conflicts(self, series):
+        """Warns if the series' first SERIES_CONFLICT_DAYS days overlap other sessions; returns True to go ahead."""
+        first_day = series.first_ordinal
+        conflicts = self.schedule_index.series_conflicts(series, first_day, first_day + SERIES_CONFLICT_DAYS - 1)
+        if not conflicts:
+            return True
+
+        lines = [f"• {occurrence.time} overlaps {', '.join(item.subject for item in items)}"
+                 for occurrence, items in conflicts[:MAX_CONFLICTS_SHOWN]]
+        if len(conflicts) > MAX_CONFLICTS_SHOWN:
+            lines.append(f"...and {len(conflicts) - MAX_CONFLICTS_SHOWN} more")
+        message = (f"In the next {SERIES_CONFLICT_DAYS} days, {len(conflicts)} of these sessions overlap others:\n"
+                   + "\n".join(lines) + "\n\nAdd the series anyway?")
+        return CTkMessagebox(title="Schedule Conflict", message=message, icon="warning",
+                             option_1="Yes", option_2="No").get() == "Yes"
+
+    def _store_schedule(self, subject, topic, priority, parsed_time, progress):
+        """Runs on an I/O worker: allocates the new session's id and stores it."""
+        new_schedule = ScheduleItem(self.id_sequence.allocate(), subject, topic, priority, *parsed_time)
+        progress(0.5)
+        self.repository.upsert(new_schedule)
+        progress(1.0)
+        return new_schedule
+
+    def _complete_add_schedule(self, new_schedule):
         self.schedule_data.append(new_schedule)
-        self.next_id += 1
-        self._save_schedules()
+        self.schedule_index.add(new_schedule)
+        self.reminders.add(new_schedule)
+        self._populate_schedule_display()
+
+        self.subject_entry.delete(0, "end")
+        self.topic_entry.delete(0, "end")
+        self.time_entry.delete(0, "end")
+        self.priority_var.set("Medium")
+
+        self._restore_buttons()
+        CTkMessagebox(title="Success", message="Schedule added successfully!", icon="check").get()
+
+    def _store_series(self, new_series, progress):
+        """Runs on an I/O worker: allocates the new series' id and stores it."""
+        new_series.id = self.series_sequence.allocate()
+        progress(0.5)
+        self.series_repository.upsert(new_series)
+        progress(1.0)
+        return new_series
+
+    def _complete_add_series(self, new_series):
+        self.series_data.append(new_series)
+        self.schedule_index.add_series(new_series)
+        self.reminders.add_series(new_series)
         self._populate_schedule_display()
 
         self.subject_entry.delete(0, "end")
         self.topic_entry.delete(0, "end")
         self.time_entry.delete(0, "end")
         self.priority_var.set("Medium")
+        self._clear_repeat_fields()
+
+        self._restore_buttons()
+        CTkMessagebox(title="Success", message=f"Recurring session added: {new_series.describe()}.", icon="check").get()
 
-        self.progress_bar.stop()
+    def _add_schedule_failed(self, error):
+        self._restore_buttons()
+        CTkMessagebox(title="Error", message=f"Could not add the schedule: {error}", icon="cancel").get()
+
+    def _restore_buttons(self):
         self.progress_bar.pack_forget()
         self.add_button.pack(side="left", padx=5)
         self.delete_button.pack(side="left", padx=5)
         self.clear_button.pack(side="left", padx=5)
 
-        CTkMessagebox(title="Success", message="Schedule added successfully!", icon="check").get()
-
     def _delete_schedule(self):
         if not self.selected_schedule_id:
             CTkMessagebox(title="Selection Error", message="Please select a schedule to delete.", icon="warning").get()
             return
+        if isinstance(self.selected_schedule_id, tuple):  # An occurrence: (series id, day ordinal)
+            self._delete_occurrence(*self.selected_schedule_id)
+            return
 
         if CTkMessagebox(title="Confirm Delete", message="Are you sure you want to delete this schedule?",
                          option_1="Yes", option_2="No").get() == "Yes":
-            self.schedule_data = [item for item in self.schedule_data if item.get('id') != self.selected_schedule_id]
-            self._save_schedules()
+            self.schedule_data = [item for item in self.schedule_data if item.id != self.selected_schedule_id]
+            self.repository.delete(self.selected_schedule_id)
+            self.schedule_index.remove(self.selected_schedule_id)
+            self.reminders.remove(self.selected_schedule_id)
             self._populate_schedule_display()
             CTkMessagebox(title="Success", message="Schedule deleted successfully!", icon="check").get()
 
-    def _check_reminders(self):
-        now = datetime.now()
-        today_str = now.strftime("%Y-%m-%d")
-        current_hour_minute = now.strftime("%H:%M")
-
-        for item in self.schedule_data:
-            time_str = item.get('time', '')
-            if not time_str:
-                continue
-
-            try:
-                parts = time_str.split(' ')
-                if len(parts) == 2:
-                    date_part = parts[0]
-                    time_range = parts[1]
-                    start_time_str = time_range.split('-')[0]
-
-                    if date_part == today_str and start_time_str == current_hour_minute:
-                        subject = item.get('subject', 'N/A')
-                        topic = item.get('topic', 'N/A')
-                        CTkMessagebox(
-                            title="Study Reminder",
-                            message=f"Time for your study session!\n\nSubject: {subject}\nTopic: {topic}\nTime: {start_time_str}",
-                            icon="info"
-                        ).get()
-            except Exception as e:
-                print(f"Error parsing time for reminder: {time_str} - {e}")
-
-        self.after(60000, self._check_reminders)
+    def _delete_occurrence(self, series_id, day_ordinal):
+        """Deletes one session of a series (as an exception day) or the whole series."""
+        series = next((item for item in self.series_data if item.id == series_id), None)
+        if series is None:
+            return
+        choice = CTkMessagebox(title="Confirm Delete",
+                               message=f"This is a recurring session ({series.describe()}). Delete it:",
+                               option_1="This Session", option_2="Whole Series", option_3="Cancel").get()
+        if choice == "This Session":
+            series.exceptions.add(day_ordinal)
+            self.series_repository.upsert(series)
+            self.schedule_index.add_series(series)
+            self.reminders.add_series(series)
+        elif choice == "Whole Series":
+            self.series_data = [item for item in self.series_data if item.id != series_id]
+            self.series_repository.delete(series_id)
+            self.schedule_index.remove_series(series_id)
+            self.reminders.remove_series(series_id)
+        else:
+            return
+        self._populate_schedule_display()
+        CTkMessagebox(title="Success", message="Schedule deleted successfully!", icon="check").get()
+
+    def _show_reminder(self, minute_key, items):
+        """Shows one non-modal window for all the sessions starting in the same minute."""
+        reminder = CTkToplevel(self)
+        reminder.title("Study Reminder")
+        reminder.transient(self)
+        reminder.attributes("-topmost", True)
+        heading = "Time for your study session!" if len(items) == 1 else f"Time for your {len(items)} study sessions!"
+        CTkLabel(reminder, text=f"⏰ {heading}", font=("Helvetica", 14, "bold")).pack(padx=20, pady=(15, 5))
+        for item in items:
+            CTkLabel(reminder, text=f"{item.subject}: {item.topic} ({minute_to_str(item.start_minute)}-{minute_to_str(item.end_minute)})",
+                     font=("Helvetica", 12), wraplength=400).pack(padx=20, pady=2)
+        CTkButton(reminder, text="Dismiss", command=reminder.destroy, corner_radius=8,
+                  font=("Helvetica", 12, "bold")).pack(pady=15)
+
+    def destroy(self):
+        self.reminders.stop()  # Logging out destroys the tab; its timer must not fire afterwards
+        super().destroy()
 
     def apply_theme(self, theme):
         if theme == "light":
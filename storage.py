@@ -0,0 +1,817 @@
+import csv
+import os
+import sqlite3
+import sys
+import threading
+import time
+from utils import (BASE_DIR, USERS_FILE, read_csv, iter_csv, write_csv, append_csv, append_csv_rows,
+                   get_student_data_path, ensure_dir_exists)
+from records import Flashcard, ScheduleItem, ScheduleSeries, ProgressEntry, NoteMeta, parse_int, parse_float, date_ordinal
+
+# --- Record Layouts ---
+USER_HEADERS = ['username', 'password', 'role', 'linked_student']
+FLASHCARDS_FILE = "flashcards.csv"
+FLASHCARDS_HEADERS = ['id', 'question', 'answer', 'topic', 'interval', 'next_review_date', 'ease_factor', 'student_id']
+SCHEDULE_FILE = "schedules.csv"
+SCHEDULE_HEADERS = ['subject', 'topic', 'time', 'priority', 'student_id', 'id']
+SCHEDULE_SERIES_FILE = "schedule_series.csv"  # Recurring sessions, one row per series
+SCHEDULE_SERIES_HEADERS = ['id', 'subject', 'topic', 'time', 'priority', 'frequency', 'weekdays', 'until', 'count',
+                           'exceptions', 'student_id']
+PROGRESS_FILE = "progress.csv"
+PROGRESS_HEADERS = ['date', 'subject', 'study_hours', 'cards_reviewed', 'student_id']
+PROGRESS_JOURNAL_FILE = "progress_journal.csv"
+PROGRESS_FOLDING_FILE = "progress_journal.folding.csv"  # The journal being compacted, renamed aside
+JOURNAL_COMPACT_BYTES = 64 * 1024  # Fold the journal into progress.csv once it grows past this size
+QUIZ_JOURNAL_FILE = "quiz_journal.csv"
+QUIZ_JOURNAL_FSYNC_EVERY = 16  # fsync the quiz journal after this many reviews...
+QUIZ_JOURNAL_FSYNC_SECONDS = 2.0  # ...or once this long has passed since the last fsync
+SEARCH_INDEX_FILE = "flashcards_search.json"  # Saved search index; only kept for the CSV backend
+NOTES_METADATA_FILE = "notes_metadata.csv"
+NOTES_METADATA_HEADERS = ['title', 'last_modified', 'file_path', 'student_id', 'subject']
+ID_SEQUENCES_FILE = "id_sequences.csv"
+ID_SEQUENCES_HEADERS = ['name', 'next_id', 'student_id']
+
+SQLITE_FILE = os.path.join(BASE_DIR, "studybuddy.db")
+STORAGE_ENV_VAR = "STUDYBUDDY_STORAGE"  # "csv" (default) or "sqlite"
+
+# Per-student keys; student_id is added to every key by the per-student repositories.
+FLASHCARDS_KEY = ('id',)
+SCHEDULE_KEY = ('id',)
+SCHEDULE_SERIES_KEY = ('id',)
+PROGRESS_KEY = ('date', 'subject')
+NOTES_METADATA_KEY = ('title',)
+ID_SEQUENCES_KEY = ('name',)
+USER_KEY = ('username',)
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    username TEXT PRIMARY KEY,
+    password TEXT NOT NULL,
+    role TEXT NOT NULL,
+    linked_student TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_users_role ON users (role);
+
+CREATE TABLE IF NOT EXISTS flashcards (
+    student_id TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    question TEXT,
+    answer TEXT,
+    topic TEXT,
+    interval REAL,
+    next_review_date TEXT,
+    ease_factor REAL,
+    PRIMARY KEY (student_id, id)
+);
+CREATE INDEX IF NOT EXISTS idx_flashcards_due ON flashcards (student_id, next_review_date);
+CREATE INDEX IF NOT EXISTS idx_flashcards_topic ON flashcards (student_id, topic);
+
+CREATE TABLE IF NOT EXISTS schedules (
+    student_id TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    subject TEXT,
+    topic TEXT,
+    time TEXT,
+    priority TEXT,
+    PRIMARY KEY (student_id, id)
+);
+CREATE INDEX IF NOT EXISTS idx_schedules_time ON schedules (student_id, time);
+
+CREATE TABLE IF NOT EXISTS schedule_series (
+    student_id TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    subject TEXT,
+    topic TEXT,
+    time TEXT,
+    priority TEXT,
+    frequency TEXT,
+    weekdays TEXT,
+    until TEXT,
+    count INTEGER,
+    exceptions TEXT,
+    PRIMARY KEY (student_id, id)
+);
+
+CREATE TABLE IF NOT EXISTS progress (
+    student_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    study_hours REAL NOT NULL DEFAULT 0,
+    cards_reviewed INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (student_id, date, subject)
+);
+
+CREATE TABLE IF NOT EXISTS id_sequences (
+    student_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    next_id INTEGER NOT NULL,
+    PRIMARY KEY (student_id, name)
+);
+
+CREATE TABLE IF NOT EXISTS notes_metadata (
+    student_id TEXT NOT NULL,
+    title TEXT NOT NULL,
+    last_modified TEXT,
+    file_path TEXT,
+    subject TEXT,
+    PRIMARY KEY (student_id, title)
+);
+"""
+
+def _key_of(row, key_fields):
+    """Returns the normalized key tuple of a row."""
+    return tuple(str(row.get(field, '')) for field in key_fields)
+
+# Writes may come from the Tk thread and the I/O workers (workers.py) at once;
+# this keeps each read-modify-write of a CSV file whole.
+_csv_write_lock = threading.RLock()
+
+# --- Progress Journal ---
+# progress.csv is the compacted snapshot; every study session is appended to
+# progress_journal.csv and folded in on read, so logging never rewrites history.
+_journal_lock = threading.Lock()
+
+def _fold_progress_rows(rows):
+    """Folds progress rows into one entry per (date, subject, student_id), keeping first-seen order."""
+    folded = {}
+    result = []
+    for row in rows:
+        key = (row.get('date'), row.get('subject'), row.get('student_id'))
+        entry = folded.get(key)
+        if entry is None:
+            entry = dict(row)
+            folded[key] = entry
+            result.append(entry)
+            continue
+        try:
+            study_hours = str(float(entry.get('study_hours', 0)) + float(row.get('study_hours', 0)))
+            cards_reviewed = str(int(entry.get('cards_reviewed', 0)) + int(row.get('cards_reviewed', 0)))
+            entry['study_hours'] = study_hours
+            entry['cards_reviewed'] = cards_reviewed
+        except (ValueError, TypeError):
+            print(f"Error updating progress entry: {entry}")
+            result.append(dict(row))
+    return result
+
+def _count_data_lines(file_path):
+    """Counts the lines after the header of a CSV file (0 if it is missing)."""
+    try:
+        with open(file_path, 'rb') as f:
+            lines = sum(chunk.count(b'\n') for chunk in iter(lambda: f.read(1 << 20), b''))
+    except OSError:
+        return 0
+    return max(0, lines - 1)
+
+def _read_rows_quietly(file_path):
+    """Reads CSV rows without any UI side effects (safe off the Tk thread)."""
+    if not os.path.exists(file_path):
+        return []
+    with open(file_path, 'r', newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+# Compaction renames the journal aside (PROGRESS_FOLDING_FILE), writes the
+# folded snapshot to progress.csv.new, removes the aside file and only then
+# renames the new snapshot into place. Whatever step a crash interrupts, the
+# files left say which data counts:
+#   - an aside file: it is not in progress.csv yet, and any .new is incomplete;
+#   - a .new without an aside file: it is complete and holds the aside rows.
+# _settle_progress_compaction() finishes or rolls back such a state before
+# progress is read or compacted again, so no session is counted twice or lost.
+
+def _settle_progress_compaction(snapshot_path, folding_path):
+    """Completes or rolls back a compaction a crash interrupted (call with _journal_lock held)."""
+    new_path = snapshot_path + ".new"
+    if not os.path.exists(new_path):
+        return
+    if os.path.exists(folding_path):
+        os.remove(new_path)  # Possibly partial; the aside rows are read separately until folded again
+    else:
+        os.replace(new_path, snapshot_path)
+
+def _fold_aside(snapshot_path, folding_path):
+    """Folds the renamed-aside journal into the snapshot (call with _journal_lock held)."""
+    new_path = snapshot_path + ".new"
+    rows = _fold_progress_rows(_read_rows_quietly(snapshot_path) + _read_rows_quietly(folding_path))
+    with open(new_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=PROGRESS_HEADERS, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(rows)
+        f.flush()
+        os.fsync(f.fileno())
+    os.remove(folding_path)  # From here on the new snapshot is the one that counts
+    os.replace(new_path, snapshot_path)
+
+def progress_paths(student_dir):
+    """Returns the (snapshot, aside journal, journal) paths of a student folder, settling an interrupted compaction."""
+    snapshot_path = os.path.join(student_dir, PROGRESS_FILE)
+    folding_path = os.path.join(student_dir, PROGRESS_FOLDING_FILE)
+    _settle_progress_compaction(snapshot_path, folding_path)
+    return snapshot_path, folding_path, os.path.join(student_dir, PROGRESS_JOURNAL_FILE)
+
+def compact_progress_journal(username):
+    """Merges the progress journal into the progress.csv snapshot and clears the journal."""
+    with _journal_lock:
+        try:
+            student_dir = os.path.dirname(get_student_data_path(username, PROGRESS_FILE))
+            snapshot_path, folding_path, journal_path = progress_paths(student_dir)
+            if os.path.exists(folding_path):
+                _fold_aside(snapshot_path, folding_path)  # Left by an interrupted compaction
+            if not _read_rows_quietly(journal_path):
+                return
+            os.replace(journal_path, folding_path)
+            _fold_aside(snapshot_path, folding_path)
+        except (OSError, csv.Error) as e:
+            print(f"Warning: Could not compact progress journal for {username}: {e}")
+
+def _compact_in_background(username):
+    """Starts journal compaction on a daemon thread."""
+    threading.Thread(target=compact_progress_journal, args=(username,), daemon=True).start()
+
+# --- Quiz Journal ---
+def _complete_journal_row(row):
+    """True if a journal row has every field and its id, numbers and date parse (a crash can cut off the last line)."""
+    if any(row.get(field) is None for field in FLASHCARDS_HEADERS):
+        return False
+    return (parse_int(row['id'], None) is not None
+            and parse_float(row['interval'], None) is not None
+            and parse_float(row['ease_factor'], None) is not None
+            and date_ordinal(row['next_review_date']) is not None)
+
+class QuizJournal:
+    """Append-only log of flashcard rows assessed during a quiz.
+
+    Each review is appended and flushed as soon as it is rated, with an fsync
+    every few reviews, so a crash mid-quiz loses at most the last batch.
+    The rows are folded into the flashcard repository in one write when the
+    quiz ends, and recover() folds in a log left behind by a crash.
+    """
+    def __init__(self, username):
+        self.username = username
+        self.file_path = get_student_data_path(username, QUIZ_JOURNAL_FILE)
+        self._file = None
+        self._writer = None
+        self._unsynced = 0
+        self._last_sync = 0.0
+
+    def append(self, card):
+        """Logs one reviewed Flashcard."""
+        try:
+            if self._file is None:
+                ensure_dir_exists(os.path.dirname(self.file_path))
+                is_new = not os.path.exists(self.file_path) or os.path.getsize(self.file_path) == 0
+                self._file = open(self.file_path, 'a', newline='', encoding='utf-8')
+                self._writer = csv.DictWriter(self._file, fieldnames=FLASHCARDS_HEADERS, extrasaction='ignore')
+                if is_new:
+                    self._writer.writeheader()
+                self._last_sync = time.monotonic()
+            self._writer.writerow(card.to_row(self.username))
+            self._file.flush()
+            self._unsynced += 1
+            if self._unsynced >= QUIZ_JOURNAL_FSYNC_EVERY or time.monotonic() - self._last_sync >= QUIZ_JOURNAL_FSYNC_SECONDS:
+                self._sync()
+        except (OSError, csv.Error) as e:
+            print(f"Warning: Could not write to quiz journal {self.file_path}: {e}")
+
+    def _sync(self):
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        """Syncs and closes the log file, keeping it on disk."""
+        if self._file is None:
+            return
+        try:
+            if self._unsynced:
+                self._sync()
+            self._file.close()
+        except OSError as e:
+            print(f"Warning: Could not close quiz journal {self.file_path}: {e}")
+        self._file = None
+        self._writer = None
+
+    def fold(self, repository, cards):
+        """Writes the quiz's final cards to the repository, then discards the log."""
+        self.close()
+        if cards:
+            repository.upsert_many(cards)
+        self._discard()
+
+    def recover(self, repository):
+        """Folds a log left by an interrupted quiz into the repository; returns the cards recovered."""
+        self.close()
+        latest = {}
+        skipped = 0
+        for row in _read_rows_quietly(self.file_path):
+            if not _complete_journal_row(row):
+                skipped += 1  # Folding a partial row in would overwrite the stored card with defaults
+                continue
+            card = Flashcard.from_row(row)
+            latest[card.id] = card  # A card reviewed twice keeps its last review
+        if skipped:
+            print(f"Warning: Skipped {skipped} incomplete rows in quiz journal {self.file_path}.")
+        if latest:
+            repository.upsert_many(list(latest.values()))
+        self._discard()
+        return len(latest)
+
+    def _discard(self):
+        try:
+            if os.path.exists(self.file_path):
+                os.remove(self.file_path)
+        except OSError as e:
+            print(f"Warning: Could not remove quiz journal {self.file_path}: {e}")
+
+# --- Id Sequences ---
+class IdSequence:
+    """Persistent, monotonic id allocator for one record type of one student.
+
+    The next free id is stored alongside the data (id_sequences.csv, or the
+    id_sequences table) and is written before the ids it hands out are used,
+    so an id is never handed out twice, even after the newest record is
+    deleted. A new sequence is seeded from the highest id already stored;
+    call ensure_stored() when the records are loaded, before anything can
+    be deleted, so a deleted newest id is never seeded over. After that,
+    allocating is O(1) and never scans the records.
+    """
+    def __init__(self, repository, name, records):
+        self.repository = repository  # Row repository of sequences
+        self.name = name
+        self.records = records  # Only read to seed a new sequence
+        self._next_id = None
+
+    @property
+    def next_id(self):
+        """The id the next allocation will return."""
+        if self._next_id is None:
+            row = self.repository.get(self.name)
+            stored = parse_int(row.get('next_id'), None) if row else None
+            self._next_id = stored if stored is not None else self._seed()
+        return self._next_id
+
+    def _seed(self):
+        highest = max((parse_int(card_id, 0) for (card_id,) in self.records.iter_fields(('id',))), default=0)
+        return highest + 1
+
+    def ensure_stored(self, highest_used=None):
+        """Seeds and stores a sequence that has never been stored.
+
+        highest_used, if given, returns the highest id referenced outside
+        the records (a review log, say); it is only called when seeding.
+        """
+        row = self.repository.get(self.name)
+        stored = parse_int(row.get('next_id'), None) if row else None
+        if stored is not None:
+            self._next_id = stored
+            return
+        self._next_id = max(self._seed(), highest_used() + 1 if highest_used is not None else 1)
+        self._store()
+
+    def _store(self):
+        self.repository.upsert({'name': self.name, 'next_id': str(self._next_id), 'student_id': self.records.student_id})
+
+    def reserve(self, count):
+        """Reserves count consecutive ids (a block for a bulk import) and returns the first."""
+        first_id = self.next_id
+        self._next_id = first_id + count
+        self._store()
+        return first_id
+
+    def allocate(self):
+        """Returns a new id."""
+        return self.reserve(1)
+
+# --- CSV Repositories ---
+class CsvRepository:
+    """Repository over a whole-file CSV. Reads are cached; writes rewrite the file."""
+    def __init__(self, file_path, headers, key_fields):
+        self.file_path = file_path
+        self.headers = headers
+        self.key_fields = key_fields
+
+    def list_all(self):
+        return read_csv(self.file_path, self.headers)
+
+    def count(self):
+        """Returns the number of rows without parsing them (lines after the header, so only an estimate
+        if a field holds a newline)."""
+        return _count_data_lines(self.file_path)
+
+    def iter_fields(self, fields):
+        """Yields a tuple of the named fields per row, streaming the file without building dicts."""
+        positions = [self.headers.index(field) for field in fields]
+        for row in iter_csv(self.file_path, self.headers, row_format="tuple"):
+            yield tuple(row[position] for position in positions)
+
+    def get(self, *key):
+        key = tuple(str(part) for part in key)
+        for row in self.list_all():
+            if _key_of(row, self.key_fields) == key:
+                return row
+        return None
+
+    def upsert(self, row):
+        self.upsert_many([row])
+
+    def upsert_many(self, rows):
+        with _csv_write_lock:
+            existing = self.list_all()
+            positions = {_key_of(item, self.key_fields): i for i, item in enumerate(existing)}
+            new_rows = {}
+            replaced = False
+            for row in rows:
+                key = _key_of(row, self.key_fields)
+                if key in positions:
+                    existing[positions[key]] = row
+                    replaced = True
+                else:
+                    new_rows[key] = row
+            if replaced:
+                write_csv(self.file_path, existing + list(new_rows.values()), self.headers)
+            elif new_rows:
+                # Pure inserts only need the new rows appended to the file, in one write
+                append_csv_rows(self.file_path, list(new_rows.values()), self.headers)
+
+    def delete(self, *key):
+        key = tuple(str(part) for part in key)
+        with _csv_write_lock:
+            rows = self.list_all()
+            remaining = [row for row in rows if _key_of(row, self.key_fields) != key]
+            if len(remaining) != len(rows):
+                write_csv(self.file_path, remaining, self.headers)
+                return True
+        return False
+
+    def replace_all(self, rows):
+        with _csv_write_lock:
+            write_csv(self.file_path, rows, self.headers)
+
+    def insert(self, row):
+        """Appends a row the caller knows to be new, without reading the file."""
+        with _csv_write_lock:
+            append_csv(self.file_path, row, self.headers)
+
+    def version(self):
+        """Returns a token that changes whenever the file changes, or None if it is missing."""
+        try:
+            stat_result = os.stat(self.file_path)
+        except OSError:
+            return None
+        return (stat_result.st_mtime_ns, stat_result.st_size, stat_result.st_ino)
+
+class CsvProgressRepository(CsvRepository):
+    """Progress repository: progress.csv snapshot plus an append-only session journal."""
+    def __init__(self, username):
+        super().__init__(get_student_data_path(username, PROGRESS_FILE), PROGRESS_HEADERS, PROGRESS_KEY)
+        self.username = username
+        self.journal_path = get_student_data_path(username, PROGRESS_JOURNAL_FILE)
+        self.folding_path = get_student_data_path(username, PROGRESS_FOLDING_FILE)
+
+    def list_all(self):
+        with _journal_lock:
+            _settle_progress_compaction(self.file_path, self.folding_path)
+            rows = read_csv(self.file_path, self.headers)
+            rows.extend(read_csv(self.folding_path))
+            rows.extend(read_csv(self.journal_path))
+        return _fold_progress_rows(rows)
+
+    def count(self):
+        # Journal rows are not folded here: an upper bound is enough for sizing work
+        with _journal_lock:
+            return sum(_count_data_lines(path) for path in (self.file_path, self.folding_path, self.journal_path))
+
+    def iter_fields(self, fields):
+        # Totals are only known once the journal has been folded in
+        for row in self.list_all():
+            yield tuple(row.get(field) for field in fields)
+
+    def add_session(self, log_date, subject, hours, cards):
+        """Records one study session; totals are folded in on read."""
+        new_entry = {
+            'date': log_date,
+            'subject': subject,
+            'study_hours': str(hours),
+            'cards_reviewed': str(cards),
+            'student_id': self.username
+        }
+        with _journal_lock:
+            append_csv(self.journal_path, new_entry, PROGRESS_HEADERS)
+            needs_compaction = os.path.exists(self.journal_path) and os.path.getsize(self.journal_path) >= JOURNAL_COMPACT_BYTES
+        if needs_compaction:
+            _compact_in_background(self.username)
+
+    def replace_all(self, rows):
+        with _journal_lock:
+            write_csv(self.file_path, rows, self.headers)
+            for path in (self.folding_path, self.journal_path, self.file_path + ".new"):
+                if os.path.exists(path):
+                    os.remove(path)
+
+# --- Typed Records ---
+class RecordRepository:
+    """Per-student repository of typed records over a row repository of either backend.
+
+    This is the one place stored string rows become records (see records.py)
+    and records become rows again. Anything else the row repository offers,
+    such as add_session on progress, is passed through unchanged.
+    """
+    def __init__(self, rows, record_type, student_id):
+        self.rows = rows
+        self.record_type = record_type
+        self.student_id = student_id
+
+    def list_all(self):
+        from_row = self.record_type.from_row
+        return [from_row(row) for row in self.rows.list_all()]
+
+    def get(self, *key):
+        row = self.rows.get(*key)
+        return self.record_type.from_row(row) if row is not None else None
+
+    def upsert(self, record):
+        self.rows.upsert(record.to_row(self.student_id))
+
+    def upsert_many(self, records):
+        self.rows.upsert_many([record.to_row(self.student_id) for record in records])
+
+    def delete(self, *key):
+        return self.rows.delete(*key)
+
+    def replace_all(self, records):
+        self.rows.replace_all([record.to_row(self.student_id) for record in records])
+
+    def insert(self, record):
+        self.rows.insert(record.to_row(self.student_id))
+
+    def version(self):
+        return self.rows.version()
+
+    def __getattr__(self, name):
+        return getattr(self.rows, name)
+
+class CsvStorage:
+    """Storage backend keeping the original data/<user>/*.csv layout."""
+    name = "csv"
+
+    def users(self):
+        return CsvRepository(USERS_FILE, USER_HEADERS, USER_KEY)
+
+    def flashcards(self, username):
+        rows = CsvRepository(get_student_data_path(username, FLASHCARDS_FILE), FLASHCARDS_HEADERS, FLASHCARDS_KEY)
+        return RecordRepository(rows, Flashcard, username)
+
+    def schedules(self, username):
+        rows = CsvRepository(get_student_data_path(username, SCHEDULE_FILE), SCHEDULE_HEADERS, SCHEDULE_KEY)
+        return RecordRepository(rows, ScheduleItem, username)
+
+    def schedule_series(self, username):
+        rows = CsvRepository(get_student_data_path(username, SCHEDULE_SERIES_FILE), SCHEDULE_SERIES_HEADERS, SCHEDULE_SERIES_KEY)
+        return RecordRepository(rows, ScheduleSeries, username)
+
+    def progress(self, username):
+        return RecordRepository(CsvProgressRepository(username), ProgressEntry, username)
+
+    def notes_metadata(self, username):
+        rows = CsvRepository(get_student_data_path(username, NOTES_METADATA_FILE), NOTES_METADATA_HEADERS, NOTES_METADATA_KEY)
+        return RecordRepository(rows, NoteMeta, username)
+
+    def id_sequence(self, username, name):
+        """Returns the id allocator for one record type ("flashcards", "schedules" or "schedule_series")."""
+        rows = CsvRepository(get_student_data_path(username, ID_SEQUENCES_FILE), ID_SEQUENCES_HEADERS, ID_SEQUENCES_KEY)
+        return IdSequence(rows, name, getattr(self, name)(username))
+
+# --- SQLite Repositories ---
+class SqliteRepository:
+    """Repository over one SQLite table, optionally scoped to a single student.
+
+    Statements are built once per repository and always parameterized, so
+    sqlite3's statement cache reuses the compiled form on every call.
+    """
+    def __init__(self, storage, table, headers, key_fields, student_id=None):
+        self.storage = storage
+        self.table = table
+        self.headers = headers
+        self.student_id = student_id
+        self.scope_fields = ('student_id',) if student_id is not None else ()
+        self.key_fields = self.scope_fields + key_fields
+
+        columns = ", ".join(f'"{h}"' for h in headers)
+        placeholders = ", ".join("?" for _ in headers)
+        key_clause = " AND ".join(f'"{k}" = ?' for k in self.key_fields)
+        scope_clause = " AND ".join(f'"{k}" = ?' for k in self.scope_fields) or "1"
+        self._scope_clause = scope_clause
+        updates = ", ".join(f'"{h}" = excluded."{h}"' for h in headers if h not in self.key_fields)
+        conflict = ", ".join(f'"{k}"' for k in self.key_fields)
+        self._select_all_sql = f'SELECT {columns} FROM {table} WHERE {scope_clause} ORDER BY rowid'
+        self._select_one_sql = f'SELECT {columns} FROM {table} WHERE {key_clause}'
+        self._insert_sql = f'INSERT INTO {table} ({columns}) VALUES ({placeholders})'
+        self._upsert_sql = (f'INSERT INTO {table} ({columns}) VALUES ({placeholders}) '
+                            f'ON CONFLICT ({conflict}) DO ' + (f'UPDATE SET {updates}' if updates else 'NOTHING'))
+        self._delete_sql = f'DELETE FROM {table} WHERE {key_clause}'
+        self._delete_scope_sql = f'DELETE FROM {table} WHERE {scope_clause}'
+        with storage.lock:
+            # Empty text is stored as NULL, except in NOT NULL columns, where it stays ''
+            self._not_null = {name for _, name, _, not_null, _, _ in
+                              storage.connection.execute(f'PRAGMA table_info({table})') if not_null}
+
+    def _scope_params(self):
+        return (self.student_id,) if self.student_id is not None else ()
+
+    def _to_row(self, values):
+        return {h: '' if v is None else str(v) for h, v in zip(self.headers, values)}
+
+    def _to_params(self, row):
+        params = []
+        for h in self.headers:
+            if h == 'student_id' and self.student_id is not None:
+                params.append(self.student_id)
+            else:
+                value = row.get(h)
+                if h in self._not_null:
+                    params.append('' if value is None else value)
+                else:
+                    params.append(None if value == '' else value)
+        return params
+
+    def list_all(self):
+        with self.storage.lock:
+            cursor = self.storage.connection.execute(self._select_all_sql, self._scope_params())
+            return [self._to_row(values) for values in cursor.fetchall()]
+
+    def iter_fields(self, fields):
+        """Returns a tuple of the named columns per row, selecting only those columns."""
+        unknown = [field for field in fields if field not in self.headers]
+        if unknown:
+            raise ValueError(f"Unknown fields for table {self.table}: {unknown}")
+        columns = ", ".join(f'"{field}"' for field in fields)
+        sql = f'SELECT {columns} FROM {self.table} WHERE {self._scope_clause} ORDER BY rowid'
+        with self.storage.lock:
+            return self.storage.connection.execute(sql, self._scope_params()).fetchall()
+
+    def count(self):
+        with self.storage.lock:
+            sql = f'SELECT COUNT(*) FROM {self.table} WHERE {self._scope_clause}'
+            return self.storage.connection.execute(sql, self._scope_params()).fetchone()[0]
+
+    def get(self, *key):
+        with self.storage.lock:
+            cursor = self.storage.connection.execute(self._select_one_sql, self._scope_params() + key)
+            values = cursor.fetchone()
+        return self._to_row(values) if values else None
+
+    def upsert(self, row):
+        self.upsert_many([row])
+
+    def upsert_many(self, rows):
+        with self.storage.lock, self.storage.connection:
+            self.storage.connection.executemany(self._upsert_sql, [self._to_params(row) for row in rows])
+
+    def delete(self, *key):
+        with self.storage.lock, self.storage.connection:
+            cursor = self.storage.connection.execute(self._delete_sql, self._scope_params() + key)
+        return cursor.rowcount > 0
+
+    def replace_all(self, rows):
+        with self.storage.lock, self.storage.connection:
+            self.storage.connection.execute(self._delete_scope_sql, self._scope_params())
+            self.storage.connection.executemany(self._upsert_sql, [self._to_params(row) for row in rows])
+
+    def insert(self, row):
+        """Inserts a row the caller knows to be new."""
+        with self.storage.lock, self.storage.connection:
+            self.storage.connection.execute(self._insert_sql, self._to_params(row))
+
+    def version(self):
+        """Returns a token that changes whenever this or another connection commits."""
+        with self.storage.lock:
+            data_version = self.storage.connection.execute("PRAGMA data_version").fetchone()[0]
+            return (data_version, self.storage.connection.total_changes)
+
+class SqliteProgressRepository(SqliteRepository):
+    """Progress repository where logging a session is a single accumulating upsert."""
+    def __init__(self, storage, username):
+        super().__init__(storage, "progress", PROGRESS_HEADERS, PROGRESS_KEY, username)
+        self._add_session_sql = (
+            'INSERT INTO progress (student_id, date, subject, study_hours, cards_reviewed) VALUES (?, ?, ?, ?, ?) '
+            'ON CONFLICT (student_id, date, subject) DO UPDATE SET '
+            'study_hours = study_hours + excluded.study_hours, '
+            'cards_reviewed = cards_reviewed + excluded.cards_reviewed'
+        )
+
+    def add_session(self, log_date, subject, hours, cards):
+        """Records one study session by adding it to the day's totals."""
+        with self.storage.lock, self.storage.connection:
+            self.storage.connection.execute(self._add_session_sql, (self.student_id, log_date, subject, hours, cards))
+
+class SqliteStorage:
+    """Storage backend using one SQLite database with indexed tables in WAL mode."""
+    name = "sqlite"
+
+    def __init__(self, db_path=SQLITE_FILE):
+        ensure_dir_exists(os.path.dirname(db_path) or ".")
+        self.db_path = db_path
+        self.lock = threading.RLock()
+        self.connection = sqlite3.connect(db_path, check_same_thread=False, cached_statements=256)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SQLITE_SCHEMA)
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+    def users(self):
+        return SqliteRepository(self, "users", USER_HEADERS, USER_KEY)
+
+    def flashcards(self, username):
+        return RecordRepository(SqliteRepository(self, "flashcards", FLASHCARDS_HEADERS, FLASHCARDS_KEY, username), Flashcard, username)
+
+    def schedules(self, username):
+        return RecordRepository(SqliteRepository(self, "schedules", SCHEDULE_HEADERS, SCHEDULE_KEY, username), ScheduleItem, username)
+
+    def schedule_series(self, username):
+        rows = SqliteRepository(self, "schedule_series", SCHEDULE_SERIES_HEADERS, SCHEDULE_SERIES_KEY, username)
+        return RecordRepository(rows, ScheduleSeries, username)
+
+    def progress(self, username):
+        return RecordRepository(SqliteProgressRepository(self, username), ProgressEntry, username)
+
+    def notes_metadata(self, username):
+        rows = SqliteRepository(self, "notes_metadata", NOTES_METADATA_HEADERS, NOTES_METADATA_KEY, username)
+        return RecordRepository(rows, NoteMeta, username)
+
+    def id_sequence(self, username, name):
+        """Returns the id allocator for one record type ("flashcards", "schedules" or "schedule_series")."""
+        rows = SqliteRepository(self, "id_sequences", ID_SEQUENCES_HEADERS, ID_SEQUENCES_KEY, username)
+        return IdSequence(rows, name, getattr(self, name)(username))
+
+# --- Backend Selection ---
+_storage = None
+
+def get_storage():
+    """Returns the process-wide storage backend, chosen by the STUDYBUDDY_STORAGE env var."""
+    global _storage
+    if _storage is None:
+        if os.environ.get(STORAGE_ENV_VAR, "csv").lower() == "sqlite":
+            _storage = SqliteStorage()
+        else:
+            _storage = CsvStorage()
+    return _storage
+
+# --- Migration ---
+def _copy_rows(repository, rows, label):
+    """Replaces a table's rows; if any row is rejected, copies the rest one by one. Returns the rows copied."""
+    try:
+        repository.replace_all(rows)
+        return len(rows)
+    except sqlite3.IntegrityError:
+        pass
+    repository.replace_all([])
+    copied = 0
+    for row in rows:
+        try:
+            repository.upsert(row)
+            copied += 1
+        except sqlite3.IntegrityError as e:
+            print(f"Warning: Skipped a damaged row in {label}: {e} ({row})")
+    return copied
+
+def migrate_csv_to_sqlite(base_dir=BASE_DIR, db_path=SQLITE_FILE):
+    """Copies the data/<user>/*.csv layout into a SQLite database; returns row counts per table."""
+    storage = SqliteStorage(db_path)
+    counts = {'users': 0, 'flashcards': 0, 'schedules': 0, 'schedule_series': 0, 'progress': 0, 'notes_metadata': 0,
+              'id_sequences': 0}
+    try:
+        users = _read_rows_quietly(os.path.join(base_dir, "users.csv"))
+        counts['users'] = _copy_rows(storage.users(), users, "users")
+
+        for entry in sorted(os.listdir(base_dir)):
+            student_dir = os.path.join(base_dir, entry)
+            if not os.path.isdir(student_dir):
+                continue
+            # Copied as rows through the row repositories, without a round trip through records
+            tables = [
+                ('flashcards', storage.flashcards(entry).rows, _read_rows_quietly(os.path.join(student_dir, FLASHCARDS_FILE))),
+                ('schedules', storage.schedules(entry).rows, _read_rows_quietly(os.path.join(student_dir, SCHEDULE_FILE))),
+                ('schedule_series', storage.schedule_series(entry).rows,
+                 _read_rows_quietly(os.path.join(student_dir, SCHEDULE_SERIES_FILE))),
+                ('notes_metadata', storage.notes_metadata(entry).rows, _read_rows_quietly(os.path.join(student_dir, NOTES_METADATA_FILE))),
+                ('id_sequences', storage.id_sequence(entry, 'flashcards').repository,
+                 _read_rows_quietly(os.path.join(student_dir, ID_SEQUENCES_FILE))),
+                ('progress', storage.progress(entry).rows, _fold_progress_rows(
+                    [row for path in progress_paths(student_dir) for row in _read_rows_quietly(path)])),
+            ]
+            for table, repository, rows in tables:
+                counts[table] += _copy_rows(repository, rows, f"{entry}/{table}")
+    finally:
+        storage.close()
+    return counts
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] == "migrate":
+        target = sys.argv[2] if len(sys.argv) > 2 else SQLITE_FILE
+        summary = migrate_csv_to_sqlite(BASE_DIR, target)
+        print(f"Migrated into {target}: " + ", ".join(f"{table}={count}" for table, count in summary.items()))
+        print(f"Set {STORAGE_ENV_VAR}=sqlite to use it.")
+    else:
+        print("Usage: python storage.py migrate [db_path]")
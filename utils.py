@@ -1,11 +1,13 @@
 import hashlib
 import csv
 import os
+import threading
+import multiprocessing
+from collections import OrderedDict, namedtuple
 import tkinter as tk
 from tkinter import messagebox, ttk
 from datetime import datetime, timedelta, date
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from workers import get_workers
 
 # --- Constants ---
 BASE_DIR = "data"
@@ -35,6 +37,100 @@ def get_student_data_path(username, filename):
     """Returns the full path for a student's specific data file."""
     return os.path.join(get_student_dir(username), filename)
 
+# --- CSV Cache ---
+class CsvCache:
+    """Bounded LRU cache of parsed CSV files, validated against file metadata.
+
+    Entries are keyed by absolute path and only served while the file's
+    (mtime_ns, size, inode) still match the values seen when it was parsed.
+    Memory is accounted by on-disk size, which tracks the parsed rows closely.
+    """
+    def __init__(self, max_entries=32, max_bytes=32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.current_bytes = 0
+        self._entries = OrderedDict()  # path -> (validator, rows, nbytes)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(file_path):
+        return os.path.abspath(file_path)
+
+    @staticmethod
+    def _validator(stat_result):
+        return (stat_result.st_mtime_ns, stat_result.st_size, stat_result.st_ino)
+
+    def get(self, file_path, stat_result):
+        """Returns a fresh copy of the cached rows, or None if missing or stale."""
+        key = self._key(file_path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != self._validator(stat_result):
+                if entry is not None:
+                    self._drop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            rows = entry[1]
+        return [dict(row) for row in rows]
+
+    def put(self, file_path, stat_result, rows):
+        """Stores parsed rows for a file, evicting least recently used entries as needed."""
+        nbytes = stat_result.st_size
+        if nbytes > self.max_bytes:
+            return
+        key = self._key(file_path)
+        with self._lock:
+            self._drop(key)
+            self._entries[key] = (self._validator(stat_result), [dict(row) for row in rows], nbytes)
+            self.current_bytes += nbytes
+            while len(self._entries) > self.max_entries or self.current_bytes > self.max_bytes:
+                oldest_key = next(iter(self._entries))
+                self._drop(oldest_key)
+
+    def invalidate(self, file_path):
+        """Forgets any cached rows for a file."""
+        with self._lock:
+            self._drop(self._key(file_path))
+
+    def clear(self):
+        """Empties the cache and resets the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Returns hit/miss counters and current occupancy."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'bytes': self.current_bytes
+            }
+
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.current_bytes -= entry[2]
+
+csv_cache = CsvCache()
+
+# --- Error Reporting ---
+def show_error(title, message):
+    """Shows an error dialog from any thread; pool processes, which have no UI, print it instead."""
+    if multiprocessing.parent_process() is not None:
+        print(f"Warning: {title}: {message}")
+    elif threading.current_thread() is threading.main_thread():
+        messagebox.showerror(title, message)
+    else:
+        get_workers().call_soon(messagebox.showerror, title, message)
+
 # --- CSV Handling ---
 def read_csv(file_path, expected_headers=None):
     """Reads a CSV file and returns a list of dictionaries."""
@@ -48,38 +144,78 @@ def read_csv(file_path, expected_headers=None):
                     writer.writerow(expected_headers)
                 return [] # Return empty list as the file was just created
             except IOError as e:
-                messagebox.showerror("File Error", f"Could not create file {file_path}: {e}")
+                show_error("File Error", f"Could not create file {file_path}: {e}")
                 return [] # Return empty on error
         else:
             return [] # File doesn't exist and no headers specified
 
     try:
         with open(file_path, 'r', newline='', encoding='utf-8') as f:
+            stat_result = os.fstat(f.fileno())
+            cached_rows = csv_cache.get(file_path, stat_result)
+            if cached_rows is not None:
+                return cached_rows
+
+            # Single pass: DictReader consumes the header row to expose fieldnames,
+            # so the headers can be checked without rewinding the file.
             reader = csv.DictReader(f)
-            # Check headers if provided
             if expected_headers and reader.fieldnames != expected_headers:
-                 # Handle potentially corrupted file or incorrect format
-                 # Option 1: Show error and return empty
-                 print(f"Warning: Header mismatch in {file_path}. Expected {expected_headers}, got {reader.fieldnames}. Attempting to read anyway.")
-                 # Option 2: Try reading anyway (might fail later)
-                 # Option 3: Offer to recreate/fix (more complex)
-                 # For now, let's try reading anyway, but log the warning.
-                 # If critical, raise an error or return []
-                 # messagebox.showerror("File Error", f"Incorrect headers in {file_path}. Expected {expected_headers}.")
-                 # return []
-
-            # Reset reader if headers were checked
-            f.seek(0) # Go back to the start
-            reader = csv.DictReader(f) # Recreate reader
+                # Try reading anyway (might fail later), but log the warning.
+                print(f"Warning: Header mismatch in {file_path}. Expected {expected_headers}, got {reader.fieldnames}. Attempting to read anyway.")
             data = list(reader)
+            csv_cache.put(file_path, stat_result, data)
     except FileNotFoundError:
         pass # Handled above by initial check
     except Exception as e:
-        messagebox.showerror("Read Error", f"Error reading {file_path}: {e}")
+        show_error("Read Error", f"Error reading {file_path}: {e}")
     return data
 
+def iter_csv(file_path, expected_headers=None, row_format="dict"):
+    """Lazily yields rows from a CSV file, parsing it in a single pass.
+
+    row_format selects the row type: "dict" (as csv.DictReader), "tuple"
+    (field values in header order) or "namedtuple" (attributes named after
+    the headers). Tuple rows are padded with None or truncated to the
+    header width. Rows are not cached; use read_csv for small, hot files.
+    """
+    if row_format not in ("dict", "tuple", "namedtuple"):
+        raise ValueError(f"Unknown row_format: {row_format}")
+    if not os.path.exists(file_path):
+        return
+
+    try:
+        with open(file_path, 'r', newline='', encoding='utf-8') as f:
+            if row_format == "dict":
+                reader = csv.DictReader(f)
+                headers = reader.fieldnames
+            else:
+                reader = csv.reader(f)
+                headers = next(reader, None)
+            if headers is None:
+                return
+            if expected_headers and headers != expected_headers:
+                print(f"Warning: Header mismatch in {file_path}. Expected {expected_headers}, got {headers}. Attempting to read anyway.")
+
+            if row_format == "dict":
+                yield from reader
+                return
+
+            width = len(headers)
+            make_row = tuple
+            if row_format == "namedtuple":
+                make_row = namedtuple("CsvRow", headers, rename=True)._make
+            for row in reader:
+                if not row:
+                    continue # Skip blank lines, as DictReader does
+                if len(row) != width:
+                    row = (row + [None] * width)[:width]
+                yield make_row(row)
+    except Exception as e:
+        show_error("Read Error", f"Error reading {file_path}: {e}")
+
 def write_csv(file_path, data, headers):
     """Writes a list of dictionaries to a CSV file."""
+    csv_cache.invalidate(file_path)
     try:
         ensure_dir_exists(os.path.dirname(file_path)) # Ensure directory exists
         with open(file_path, 'w', newline='', encoding='utf-8') as f:
@@ -87,9 +223,27 @@ def write_csv(file_path, data, headers):
             writer.writeheader()
             writer.writerows(data)
     except IOError as e:
-        messagebox.showerror("Write Error", f"Error writing to {file_path}: {e}")
+        show_error("Write Error", f"Error writing to {file_path}: {e}")
     except Exception as e:
-         messagebox.showerror("Write Error", f"An unexpected error occurred writing to {file_path}: {e}")
+         show_error("Write Error", f"An unexpected error occurred writing to {file_path}: {e}")
+
+def append_csv(file_path, row, headers):
+    """Appends a single dictionary row to a CSV file, writing headers if the file is new."""
+    append_csv_rows(file_path, [row], headers)
+
+def append_csv_rows(file_path, rows, headers):
+    """Appends dictionary rows to a CSV file in one write, writing headers if the file is new."""
+    csv_cache.invalidate(file_path)
+    try:
+        ensure_dir_exists(os.path.dirname(file_path))
+        is_new = not os.path.exists(file_path) or os.path.getsize(file_path) == 0
+        with open(file_path, 'a', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=headers)
+            if is_new:
+                writer.writeheader()
+            writer.writerows(rows)
+    except IOError as e:
+        show_error("Write Error", f"Error appending to {file_path}: {e}")
 
 
 # --- Text File Handling ---
@@ -101,7 +255,7 @@ def read_txt(file_path):
     except FileNotFoundError:
         return "" # Return empty string if file doesn't exist
     except Exception as e:
-        messagebox.showerror("Read Error", f"Error reading {file_path}: {e}")
+        show_error("Read Error", f"Error reading {file_path}: {e}")
         return ""
 
 def write_txt(file_path, content):
@@ -111,15 +265,16 @@ def write_txt(file_path, content):
         with open(file_path, 'w', encoding='utf-8') as f:
             f.write(content)
     except IOError as e:
-        messagebox.showerror("Write Error", f"Error writing to {file_path}: {e}")
+        show_error("Write Error", f"Error writing to {file_path}: {e}")
 
 def delete_file(file_path):
     """Deletes a file if it exists."""
+    csv_cache.invalidate(file_path)
     try:
         if os.path.exists(file_path):
             os.remove(file_path)
     except OSError as e:
-        messagebox.showerror("Delete Error", f"Error deleting file {file_path}: {e}")
+        show_error("Delete Error", f"Error deleting file {file_path}: {e}")
 
 
 # --- Security ---
@@ -283,6 +438,18 @@ def setup_style(theme="light"):
         style.map('Treeview', background=[('selected', accent_color)], foreground=[('selected', bg_color)])
 
 # --- Matplotlib Embedding ---
+def load_pyplot():
+    """Imports pyplot on the TkAgg backend and returns (pyplot, FigureCanvasTkAgg).
+
+    matplotlib takes longer to import than the rest of the app together, so
+    it is loaded the first time a chart is drawn rather than at startup.
+    """
+    import matplotlib
+    matplotlib.use("TkAgg")
+    import matplotlib.pyplot as plt
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+    return plt, FigureCanvasTkAgg
+
 def create_matplotlib_chart(parent_frame, data_dict, title, xlabel, ylabel):
     """Creates and embeds a matplotlib bar chart in a Tkinter frame."""
     # Clear previous widgets in the frame
@@ -293,6 +460,7 @@ def create_matplotlib_chart(parent_frame, data_dict, title, xlabel, ylabel):
         ttk.Label(parent_frame, text="No data to display.").pack(pady=20)
         return None # Return None if no chart was created
 
+    plt, FigureCanvasTkAgg = load_pyplot()
     fig = plt.Figure(figsize=(6, 4), dpi=100) # Adjust size as needed
     ax = fig.add_subplot(111)
 
@@ -0,0 +1,341 @@
+from bisect import bisect_left
+from customtkinter import CTkFrame, CTkLabel, CTkScrollbar
+
+STRIPE_COLORS = (("gray90", "gray20"), ("gray80", "gray30"))
+HIGHLIGHT_COLOR = ("gray75", "gray25")
+
+class VirtualTable(CTkFrame):
+    """Scrollable table that only creates widgets for the rows in view.
+
+    A small pool of row frames is created to fill the viewport and rebound
+    to a window of `items` as the user scrolls, so the widget count depends
+    on the window height rather than the number of records. Sorting works
+    on the item list itself; the rows are simply rebound afterwards.
+
+    The table also keeps each item's sort key, so single inserts, updates
+    and removals find their position with a binary search and only rebind
+    the rows at or below the change. set_filter() narrows the rows shown to
+    a set of keys without touching the item list.
+    """
+    def __init__(self, parent, columns, key_func, values_func, sort_key=None, on_select=None,
+                 on_double_click=None, row_height=30, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.columns = columns  # [(header text, width), ...]
+        self.key_func = key_func
+        self.values_func = values_func
+        self.default_sort_key = sort_key
+        self.on_select = on_select
+        self.on_double_click = on_double_click
+        self.row_height = row_height
+        self.items = []
+        self.view = self.items  # The items shown: all of them, or the filtered subset in the same order
+        self.filter_keys = None
+        self.item_by_key = {}
+        self.offset = 0
+        self.visible_count = 1
+        self.selected_key = None
+        self.sort_column = None
+        self.sort_reverse = False
+        self.rows = []  # pool of (row_frame, labels, last bound texts)
+        self.sort_keys = []  # parallel to items, in display order
+        self.sort_key_by_key = {}
+
+        # Header (click a column title to sort by it)
+        self.header_frame = CTkFrame(self, fg_color=("#d3d3d3", "#555555"))
+        for column, (header, width) in enumerate(self.columns):
+            label = CTkLabel(self.header_frame, text=header, width=width, anchor="w", font=("Helvetica", 10, "bold"))
+            label.pack(side="left", padx=2)
+            label.bind("<Button-1>", lambda event, c=column: self.sort_by(c))
+        self.header_frame.pack(fill="x")
+
+        body_container = CTkFrame(self, fg_color="transparent")
+        body_container.pack(fill="both", expand=True)
+        self.scrollbar = CTkScrollbar(body_container, command=self._on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+        self.body = CTkFrame(body_container, fg_color="transparent", height=300)
+        self.body.pack(side="left", fill="both", expand=True)
+        self.body.grid_propagate(False)  # The pool follows the viewport, never the other way round
+        self.body.grid_columnconfigure(0, weight=1)
+        self.body.bind("<Configure>", self._on_resize)
+        self._bind_scroll_wheel(self.body)
+
+    # --- Row Pool ---
+    def _create_row(self, slot):
+        row_frame = CTkFrame(self.body, height=self.row_height - 4, fg_color=STRIPE_COLORS[slot % 2])
+        labels = []
+        for _, width in self.columns:
+            label = CTkLabel(row_frame, text="", width=width, anchor="w")
+            label.pack(side="left", padx=2)
+            labels.append(label)
+
+        for widget in [row_frame] + labels:
+            widget.bind("<Button-1>", lambda event, s=slot: self._on_row_click(s))
+            widget.bind("<Double-1>", lambda event, s=slot: self._on_row_double_click(s))
+            self._bind_scroll_wheel(widget)
+        row_frame.bind("<Enter>", lambda event, s=slot: self._on_row_hover(s, True))
+        row_frame.bind("<Leave>", lambda event, s=slot: self._on_row_hover(s, False))
+        self.rows.append((row_frame, labels, [None] * len(labels)))
+
+    def _on_resize(self, event):
+        self.visible_count = max(1, event.height // self.row_height)
+        while len(self.rows) < self.visible_count:
+            self._create_row(len(self.rows))
+        self._clamp_offset()
+        self.refresh()
+
+    def _row_color(self, index):
+        if index < len(self.view) and self.key_func(self.view[index]) == self.selected_key:
+            return HIGHLIGHT_COLOR
+        return STRIPE_COLORS[index % 2]
+
+    def _bind_row(self, slot):
+        row_frame, labels, texts = self.rows[slot]
+        index = self.offset + slot
+        if slot >= self.visible_count or index >= len(self.view):
+            row_frame.grid_remove()
+            return
+        for position, value in enumerate(self.values_func(self.view[index])):
+            text = str(value)
+            if texts[position] != text:
+                labels[position].configure(text=text)
+                texts[position] = text
+        row_frame.configure(fg_color=self._row_color(index))
+        row_frame.grid(row=slot, column=0, sticky="ew", pady=2)
+
+    def refresh(self, from_index=0):
+        """Rebinds the pooled rows showing items at or after from_index."""
+        for slot in range(max(0, from_index - self.offset), len(self.rows)):
+            self._bind_row(slot)
+        self._update_scrollbar()
+
+    def _update_scrollbar(self):
+        total = len(self.view)
+        if total <= self.visible_count:
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(self.offset / total, min(1.0, (self.offset + self.visible_count) / total))
+
+    # --- Data ---
+    def _sort_key(self, item):
+        # The item key breaks ties, so every sort key is unique and can be found by bisection
+        if self.sort_column is None:
+            primary = self.default_sort_key(item) if self.default_sort_key else 0
+        else:
+            value = self.values_func(item)[self.sort_column]
+            primary = value if isinstance(value, (int, float)) else str(value).lower()
+        return (primary, self.key_func(item))
+
+    def _position(self, sort_key):
+        """Returns the index where sort_key belongs in the current display order."""
+        if not self.sort_reverse:
+            return bisect_left(self.sort_keys, sort_key)
+        low, high = 0, len(self.sort_keys)
+        while low < high:
+            middle = (low + high) // 2
+            if self.sort_keys[middle] > sort_key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _index_of(self, key):
+        sort_key = self.sort_key_by_key.get(key)
+        if sort_key is None:
+            return None
+        index = self._position(sort_key)
+        if index < len(self.sort_keys) and self.sort_keys[index] == sort_key:
+            return index
+        return None
+
+    def _resort(self):
+        decorated = sorted(((self._sort_key(item), item) for item in self.items),
+                           key=lambda pair: pair[0], reverse=self.sort_reverse)
+        self.items[:] = [item for _, item in decorated]
+        self.sort_keys = [sort_key for sort_key, _ in decorated]
+        self.sort_key_by_key = {sort_key[1]: sort_key for sort_key in self.sort_keys}
+        self.item_by_key = {sort_key[1]: item for sort_key, item in decorated}
+        self._apply_filter()
+
+    def _apply_filter(self):
+        if self.filter_keys is None:
+            self.view = self.items
+            return
+        keys = self.filter_keys
+        if len(keys) * 16 > len(self.items):
+            # Broad filters: one pass over the already sorted items beats sorting the matches
+            self.view = [item for item, sort_key in zip(self.items, self.sort_keys) if sort_key[1] in keys]
+            return
+        keys = [key for key in keys if key in self.sort_key_by_key]
+        keys.sort(key=self.sort_key_by_key.__getitem__, reverse=self.sort_reverse)
+        self.view = [self.item_by_key[key] for key in keys]
+
+    def set_filter(self, keys, keep_offset=False):
+        """Shows only the items whose key is in keys; None shows everything again.
+
+        A new filter starts from the top; with keep_offset the view stays
+        where it was (e.g. when an edit only changed whether one item matches).
+        """
+        self.filter_keys = keys
+        self._apply_filter()
+        if keep_offset:
+            self._clamp_offset()
+        else:
+            self.offset = 0
+        self.refresh()
+
+    def _view_index(self, index, item):
+        """Maps an index into items to the item's row in the view (None if filtered out)."""
+        if self.filter_keys is None:
+            return index
+        for position, shown in enumerate(self.view):
+            if shown is item:
+                return position
+        return None
+
+    def _refresh_after_change(self, index):
+        # Unfiltered, only rows from index down move; a filtered view is rebuilt from the keys
+        if self.filter_keys is None:
+            self.refresh(index)
+        else:
+            self._apply_filter()
+            self._clamp_offset()
+            self.refresh()
+
+    def set_items(self, items):
+        """Shows a new item list, sorting it in place (the table keeps a reference, not a copy)."""
+        self.items = items
+        self._resort()
+        self._clamp_offset()
+        self.refresh()
+
+    def sort_by(self, column, reverse=None):
+        """Sorts the item list in place by a column's displayed value."""
+        if reverse is None:
+            reverse = not self.sort_reverse if self.sort_column == column else False
+        self.sort_column = column
+        self.sort_reverse = reverse
+        self._resort()
+        self.refresh()
+
+    def insert_item(self, item):
+        """Inserts an item at its sorted position and returns its row in the view (None if filtered out)."""
+        sort_key = self._sort_key(item)
+        index = self._insert_at_position(item, sort_key)
+        self._refresh_after_change(index)
+        return self._view_index(index, item)
+
+    def update_item(self, item):
+        """Rebinds an edited item, moving it only if its sort position changed."""
+        index = self._index_of(self.key_func(item))
+        if index is None:
+            return self.insert_item(item)
+        sort_key = self._sort_key(item)
+        if sort_key == self.sort_keys[index] and self.filter_keys is None:
+            self.items[index] = item
+            self.item_by_key[sort_key[1]] = item
+            if 0 <= index - self.offset < len(self.rows):
+                self._bind_row(index - self.offset)
+            return index
+        self._remove_at(index)
+        new_index = self._insert_at_position(item, sort_key)
+        self._refresh_after_change(min(index, new_index))
+        return self._view_index(new_index, item)
+
+    def remove_item(self, key):
+        """Removes the item with the given key; returns False if it is not shown."""
+        index = self._index_of(key)
+        if index is None:
+            return False
+        self._remove_at(index)
+        if key == self.selected_key:
+            self.selected_key = None
+        if self.filter_keys is not None:
+            self._refresh_after_change(index)
+            return True
+        offset = self.offset
+        self._clamp_offset()
+        self.refresh(index if offset == self.offset else 0)
+        return True
+
+    def _insert_at_position(self, item, sort_key):
+        index = self._position(sort_key)
+        self.items.insert(index, item)
+        self.sort_keys.insert(index, sort_key)
+        self.sort_key_by_key[sort_key[1]] = sort_key
+        self.item_by_key[sort_key[1]] = item
+        return index
+
+    def _remove_at(self, index):
+        del self.items[index]
+        sort_key = self.sort_keys.pop(index)
+        self.sort_key_by_key.pop(sort_key[1], None)
+        self.item_by_key.pop(sort_key[1], None)
+
+    # --- Selection ---
+    def _on_row_click(self, slot):
+        index = self.offset + slot
+        if index >= len(self.view):
+            return
+        self.select(self.key_func(self.view[index]))
+        if self.on_select:
+            self.on_select(self.selected_key)
+
+    def _on_row_double_click(self, slot):
+        index = self.offset + slot
+        if index < len(self.view) and self.on_double_click:
+            self.on_double_click(self.key_func(self.view[index]))
+
+    def _on_row_hover(self, slot, entering):
+        index = self.offset + slot
+        if index >= len(self.view):
+            return
+        row_frame = self.rows[slot][0]
+        row_frame.configure(fg_color=HIGHLIGHT_COLOR if entering else self._row_color(index))
+
+    def select(self, key):
+        """Highlights the row with the given key, if it is in view."""
+        self.selected_key = key
+        self.refresh()
+
+    def clear_selection(self):
+        self.selected_key = None
+        self.refresh()
+
+    # --- Scrolling ---
+    def _clamp_offset(self):
+        max_offset = max(0, len(self.view) - self.visible_count)
+        self.offset = min(max(0, self.offset), max_offset)
+
+    def scroll_to(self, index):
+        """Scrolls just enough to bring the item at index into view."""
+        if index < self.offset:
+            self.offset = index
+        elif index >= self.offset + self.visible_count:
+            self.offset = index - self.visible_count + 1
+        self._clamp_offset()
+        self.refresh()
+
+    def _scroll_by(self, rows):
+        self.offset += rows
+        self._clamp_offset()
+        self.refresh()
+
+    def _on_scrollbar(self, *args):
+        if args[0] == "moveto":
+            self.offset = int(float(args[1]) * len(self.view))
+            self._clamp_offset()
+            self.refresh()
+        elif args[0] == "scroll":
+            step = int(args[1])
+            self._scroll_by(step * self.visible_count if args[2] == "pages" else step)
+
+    def _on_scroll_wheel(self, event):
+        if getattr(event, "num", None) == 4 or getattr(event, "delta", 0) > 0:
+            self._scroll_by(-3)
+        else:
+            self._scroll_by(3)
+
+    def _bind_scroll_wheel(self, widget):
+        widget.bind("<MouseWheel>", self._on_scroll_wheel)
+        widget.bind("<Button-4>", self._on_scroll_wheel)
+        widget.bind("<Button-5>", self._on_scroll_wheel)
@@ -0,0 +1,131 @@
+import multiprocessing
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# --- Worker Pools ---
+# Tk may only be used from the thread running mainloop. Slow work is handed
+# to a thread pool (file I/O) or a process pool (CPU-heavy aggregation);
+# results and errors come back on a queue that the Tk thread drains with
+# after(), so every callback runs on the Tk thread.
+
+IO_WORKERS = 4
+CPU_WORKERS = max(1, min(4, (os.cpu_count() or 2) - 1))
+POLL_INTERVAL_MS = 30  # How often the Tk thread drains the result queue
+
+class Workers:
+    """Runs jobs off the Tk thread and delivers their callbacks back on it."""
+    def __init__(self, io_workers=IO_WORKERS, cpu_workers=CPU_WORKERS):
+        self.io_workers = io_workers
+        self.cpu_workers = cpu_workers
+        self._io_pool = None
+        self._cpu_pool = None
+        self._pool_lock = threading.Lock()
+        self._callbacks = queue.SimpleQueue()  # (function, args) to run on the Tk thread
+        self._root = None
+        self._poll_job = None
+
+    # --- Tk side ---
+    def attach(self, root):
+        """Starts draining callbacks on root's event loop; call from the Tk thread."""
+        self._root = root
+        if self._poll_job is None:
+            self._poll_job = root.after(POLL_INTERVAL_MS, self._poll)
+
+    def _poll(self):
+        while True:
+            try:
+                function, args = self._callbacks.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                function(*args)
+            except Exception as e:  # One failing callback must not stop the poll loop
+                print(f"Warning: Background job callback failed: {e!r}")
+        self._poll_job = self._root.after(POLL_INTERVAL_MS, self._poll)
+
+    def call_soon(self, function, *args):
+        """Queues function(*args) to run on the Tk thread; safe to call from any thread."""
+        self._callbacks.put((function, args))
+
+    # --- Job submission ---
+    def run_io(self, function, *args, on_done=None, on_error=None, on_progress=None):
+        """Runs function(*args) on the I/O thread pool.
+
+        on_done(result) or on_error(exception) then runs on the Tk thread. With
+        on_progress, function is also passed progress=callable, which it may
+        call with the fraction completed; on_progress(fraction) runs on the Tk
+        thread each time.
+        """
+        kwargs = {}
+        if on_progress is not None:
+            kwargs['progress'] = lambda fraction: self.call_soon(on_progress, fraction)
+        future = self._io_executor().submit(function, *args, **kwargs)
+        future.add_done_callback(lambda done: self._deliver(done, on_done, on_error))
+        return future
+
+    def run_cpu(self, function, *args, on_done=None, on_error=None):
+        """Runs function(*args) in the process pool; function and arguments must be picklable.
+
+        Keep the arguments small (a username rather than loaded records): the
+        worker should read what it needs itself and return a summary. With
+        neither callback, the caller owns the returned future, e.g. an I/O
+        job waiting on its result.
+        """
+        try:
+            future = self._cpu_executor().submit(function, *args)
+        except BrokenProcessPool:
+            self._cpu_pool = None  # A worker died; start a fresh pool once
+            future = self._cpu_executor().submit(function, *args)
+        if on_done is not None or on_error is not None:
+            future.add_done_callback(lambda done: self._deliver(done, on_done, on_error))
+        return future
+
+    def _deliver(self, future, on_done, on_error):
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            if on_error is not None:
+                self.call_soon(on_error, error)
+            else:
+                print(f"Warning: Background job failed: {error!r}")
+        elif on_done is not None:
+            self.call_soon(on_done, future.result())
+
+    def _io_executor(self):
+        with self._pool_lock:
+            if self._io_pool is None:
+                self._io_pool = ThreadPoolExecutor(max_workers=self.io_workers, thread_name_prefix="studybuddy-io")
+            return self._io_pool
+
+    def _cpu_executor(self):
+        with self._pool_lock:
+            if self._cpu_pool is None:
+                # spawn: forking a process that runs Tk and worker threads is not safe
+                self._cpu_pool = ProcessPoolExecutor(max_workers=self.cpu_workers,
+                                                     mp_context=multiprocessing.get_context("spawn"))
+            return self._cpu_pool
+
+    def shutdown(self):
+        """Stops polling and lets running jobs finish; queued jobs are dropped."""
+        if self._poll_job is not None and self._root is not None:
+            self._root.after_cancel(self._poll_job)
+        self._poll_job = None
+        with self._pool_lock:
+            for pool in (self._io_pool, self._cpu_pool):
+                if pool is not None:
+                    pool.shutdown(wait=False, cancel_futures=True)
+            self._io_pool = None
+            self._cpu_pool = None
+
+_workers = None
+
+def get_workers():
+    """Returns the process-wide worker pools."""
+    global _workers
+    if _workers is None:
+        _workers = Workers()
+    return _workers